@@ -125,6 +125,18 @@ export default function DeviceProvider({
     };
   }, [serverDeviceType]); // 添加 serverDeviceType 作为依赖
 
+  // 在 <html> 上标记水合完成及当前设备类型，并派发 device-hydrated 事件，
+  // 供自动化截图等外部工具判断客户端设备检测何时完成
+  useEffect(() => {
+    if (!isHydrated) return;
+    const root = document.documentElement;
+    root.dataset.deviceType = deviceType;
+    root.dataset.hydrated = 'true';
+    window.dispatchEvent(
+      new CustomEvent('device-hydrated', { detail: { deviceType } })
+    );
+  }, [isHydrated, deviceType]);
+
   return (
     <DeviceContext.Provider value={{ deviceType, isHydrated }}>
       {children}
@@ -0,0 +1,12 @@
+// 模拟 DeviceProvider 水合：短暂延迟后写入水合标记并派发 device-hydrated 事件
+(function () {
+  function hydrate() {
+    var deviceType = window.innerWidth < 768 ? 'mobile' : window.innerWidth < 1024 ? 'tablet' : 'desktop';
+    document.documentElement.dataset.deviceType = deviceType;
+    document.documentElement.dataset.hydrated = 'true';
+    window.dispatchEvent(new CustomEvent('device-hydrated', { detail: { deviceType: deviceType } }));
+  }
+  document.addEventListener('DOMContentLoaded', function () {
+    setTimeout(hydrate, 150);
+  });
+})();
@@ -0,0 +1,30 @@
+"""响应式截图工具
+
+命令行入口为 scripts/test_responsive_screenshots.py；在其他程序中可以直接使用异步接口：
+
+    from responsive_screenshots import capture
+
+    async for result in capture(["localhost:3000/course/1"], options={"full_page": True}):
+        ...
+
+导入本包不会解析命令行参数、启动浏览器或输出任何内容。
+"""
+
+from .api import CaptureResult, capture
+from .devices import MOBILE_DEVICE_SPECS, PC_DEVICES, build_devices
+from .options import build_parser, default_options
+from .report import build_report
+from .targets import build_targets, default_targets
+
+__all__ = [
+    "capture",
+    "CaptureResult",
+    "build_devices",
+    "build_targets",
+    "default_targets",
+    "default_options",
+    "build_parser",
+    "build_report",
+    "PC_DEVICES",
+    "MOBILE_DEVICE_SPECS",
+]
@@ -0,0 +1,173 @@
+"""库接口：在其他 asyncio 程序中直接调用截图引擎
+
+    from responsive_screenshots import capture
+
+    async for result in capture(["localhost:3000/course/1"], options={"full_page": True}):
+        print(result.status, result.page, result.device, result.files)
+
+capture() 在当前进程的事件循环中运行（不启动分片子进程），
+不写任务日志和阶段耗时记录，也不输出进度；耗时历史和截图清单照常保存。
+每次调用使用独立的运行配置和运行状态（engine.RunContext），同一进程内可以同时运行多个 capture()；
+同时运行的调用应使用不同的 output_dir，否则耗时历史和截图清单以最后结束的调用为准。
+需要任务日志、运行前后处理或其他进程的选项（见 UNSUPPORTED_OPTIONS）请使用命令行入口，传入时抛出 ValueError。
+"""
+
+import argparse
+import asyncio
+
+from . import engine
+from .options import default_options
+from .targets import build_targets
+
+# 队列结束标记
+_DONE = object()
+
+# capture() 不支持的选项：爬取、录制回放、续跑、预算规划、分布式、监听、基准测试、性能指标、报告和视觉对比
+# 都由命令行入口在截图前后处理，或需要任务日志、其他进程；页面由 urls 参数指定
+UNSUPPORTED_OPTIONS = ("url", "crawl", "record", "replay", "resume", "budget", "plan_only", "coordinator", "worker",
+                       "watch", "benchmark", "vitals", "vitals_only", "report", "report_only", "compare_to")
+
+
+class CaptureResult:
+    """一个 (页面, 设备) 任务的结果
+
+    status 为 captured / skipped / deduped / linted / failed；files 为 {"View" / "Full": 文件路径}，
+    return_bytes 时截图不写盘，images 为 {"View" / "Full": 编码后的图片字节}。
+    stages 为各阶段耗时（秒），失败时 error / error_class 为错误摘要和分类。
+    lint 模式下 violations 为违规列表 [{"rule", "selector", "detail", "rect"}]（linted 表示检查通过、没有截图）。
+    """
+
+    def __init__(self, status, page, url, device, detail="", elapsed=None, extra=None, outputs=None, run=None):
+        extra = extra or {}
+        self.status = status
+        self.page = page
+        self.url = url
+        self.device = device
+        self.device_name = device["name"] if device else None
+        self.detail = detail
+        self.elapsed = elapsed
+        self.stages = dict(extra.get("stages") or {})
+        self.error = extra.get("error")
+        self.error_class = extra.get("error_class")
+        self.violations = list(extra.get("lint") or [])
+        self.extra = extra
+        self.files = {}
+        self.images = {}
+        if run is not None and run.args.return_bytes:
+            self.images = dict(outputs or {})
+        elif outputs:
+            self.files = dict(outputs)
+        elif run is not None and device and status in ("captured", "skipped"):
+            # 跳过的任务没有新的输出，返回已存在的截图文件
+            view_path, full_path = engine.screenshot_paths(run, device, page)
+            self.files = {"View": view_path}
+            if run.args.full_page:
+                self.files["Full"] = full_path
+
+    @property
+    def ok(self) -> bool:
+        return self.status != "failed"
+
+    def __repr__(self):
+        return f"CaptureResult({self.status!r}, page={self.page!r}, device={self.device_name!r})"
+
+
+class StreamReporter(engine.ProgressReporter):
+    """不输出进度，把每个最终结果转换为 CaptureResult 放入队列"""
+
+    def __init__(self, run, total, results, timings=None, manifest=None):
+        super().__init__(run, total, timings=timings, manifest=manifest, verbose=False)
+        self.results = results
+        self.devices = {device["name"]: device for device in run.devices}
+        self.urls = {target["name"]: target["url"] for target in run.targets}
+
+    def report(self, status, page_name, device_name, detail="", elapsed=None, extra=None, outputs=None):
+        super().report(status, page_name, device_name, detail, elapsed=elapsed, extra=extra, outputs=outputs)
+        if status == "retrying":
+            return
+        self.results.put_nowait(CaptureResult(
+            status, page_name, self.urls.get(page_name), self.devices.get(device_name), detail,
+            elapsed=elapsed, extra=extra, outputs=outputs, run=self.run))
+
+
+def resolve_options(options):
+    """options 可以是 None、选项覆盖字典或完整的 argparse.Namespace"""
+    if options is None:
+        return default_options()
+    if isinstance(options, argparse.Namespace):
+        return argparse.Namespace(**vars(options))
+    return default_options(**options)
+
+
+def check_options(options):
+    """capture() 不支持的选项抛出 ValueError"""
+    used = [name for name in UNSUPPORTED_OPTIONS if getattr(options, name)]
+    if options.workers is not None and options.workers > 1:
+        used.append("workers")
+    if used:
+        raise ValueError(f"capture() 不支持选项: {', '.join(used)}（请使用命令行入口）")
+
+
+async def capture(urls, devices=None, options=None):
+    """异步生成器：对 urls × devices 截图，每完成一个任务产出一个 CaptureResult
+
+    urls 为 URL 字符串或 {"name", "url"} 字典的列表；devices 为设备配置列表，
+    None 时按 options 的 device_type / all_devices 使用内置设备列表（见 build_devices）。
+    options 的名称与命令行参数的 dest 相同，例如 {"full_page": True, "format": "webp"}；
+    未知的选项抛出 TypeError，capture() 不支持的选项（UNSUPPORTED_OPTIONS、workers 大于 1）抛出 ValueError。
+    提前退出 async for 时会取消剩余任务。
+    """
+    results = _capture(urls, devices, options)
+    try:
+        async for result in results:
+            yield result
+    finally:
+        # 提前退出时立即关闭内层生成器（取消剩余任务并保存记录）
+        await results.aclose()
+
+
+async def _capture(urls, devices, options):
+    options = resolve_options(options)
+    check_options(options)
+    if options.return_bytes:
+        # 不写盘时没有已存在的截图可以跳过
+        options.skip_existing = False
+    options.workers = 1
+    run = engine.configure(options, devices=devices, targets=build_targets(urls))
+    if not engine.HAS_PLAYWRIGHT:
+        raise RuntimeError("未安装 Playwright，请执行: pip install playwright && playwright install chromium")
+    needs_pil = (options.format != "png" or options.compress_level is not None
+                 or (options.full_page and options.full_page_mode == "tiled"))
+    if needs_pil and not engine.HAS_PIL:
+        raise RuntimeError("jpeg/webp 输出、compress_level 和分块全长截图需要 Pillow，请执行: pip install pillow")
+
+    manifest = await engine.prepare_library_run(run)
+    timings = engine.TimingHistory(run.timings_path)
+    results = asyncio.Queue()
+    reporter = StreamReporter(run, len(run.devices) * len(run.targets), results, timings=timings, manifest=manifest)
+
+    async def run_jobs():
+        try:
+            await engine.run_devices(run, run.devices, reporter, timings)
+        finally:
+            results.put_nowait(_DONE)
+
+    task = asyncio.ensure_future(run_jobs())
+    try:
+        while True:
+            result = await results.get()
+            if result is _DONE:
+                break
+            yield result
+        # 引擎异常（例如浏览器无法启动）在这里抛给调用方
+        await task
+    finally:
+        if not task.done():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        timings.save()
+        if manifest is not None:
+            manifest.save()
@@ -0,0 +1,313 @@
+"""跨浏览器上下文共享的响应缓存
+
+每个 browser.new_context 都从空的 HTTP 缓存开始，而且只要上下文注册了 route，Playwright 就会
+关闭该上下文的 HTTP 缓存。几十个设备上下文因此会重复下载同样的 _next/static 脚本和样式、
+图片和字体子集。这里的缓存由所有上下文通过 context.route 共用：
+
+- 内存层：按字节预算淘汰的 LRU；
+- 磁盘层（可选）：内存层淘汰的条目写入磁盘目录，跨运行保留，按修改时间淘汰超出预算的文件。
+
+缓存有效期：
+- 带内容哈希的资源（_next/static/、文件名含哈希、或响应带 immutable）在整个运行期间有效；
+- HTML 文档使用 --cache-max-age，按移动端 / 桌面端 UA 分别缓存；
+- 其他脚本、样式、图片、字体使用响应的 max-age，没有时同样使用 --cache-max-age；
+- 非 200 响应、带 Set-Cookie、no-store / private 的响应不缓存。
+"""
+
+import asyncio
+import collections
+import contextlib
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+
+# 参与缓存的请求类型，其余请求（XHR、媒体、WebSocket 等）直接交给后续路由
+CACHEABLE_RESOURCE_TYPES = ("document", "script", "stylesheet", "image", "font")
+
+# 带内容哈希的资源：Next.js 构建产物，或文件名中带 8 位以上十六进制哈希
+HASHED_ASSET_PATTERN = re.compile(
+    r"/_next/static/(?!development/|webpack/)|[.\-_][0-9a-f]{8,}\.(js|mjs|css|woff2?|ttf|otf|webp|avif|png|jpe?g|gif|svg)$",
+    re.IGNORECASE)
+
+# 响应体已由 Playwright 解压，重新响应时去掉与原始传输相关的头
+DROPPED_HEADERS = ("content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive")
+
+# 单个条目最多占内存预算的比例，更大的响应不缓存
+MAX_ENTRY_FRACTION = 0.25
+
+# expires 为 None 表示本次运行内一直有效
+CachedResponse = collections.namedtuple("CachedResponse", "status headers body expires")
+
+
+def parse_cache_control(value: str):
+    """解析 Cache-Control，返回 {指令: 值}（无值的指令值为 True）"""
+    directives = {}
+    for part in (value or "").split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip().strip('"') or True
+    return directives
+
+
+def cache_lifetime(url: str, resource_type: str, status: int, headers, document_max_age: int):
+    """返回响应的缓存有效期（秒），None 表示整个运行期间有效，0 表示不缓存"""
+    if status != 200 or "set-cookie" in headers or headers.get("vary", "").strip() == "*":
+        return 0
+    directives = parse_cache_control(headers.get("cache-control"))
+    if "no-store" in directives or "private" in directives:
+        return 0
+    if resource_type == "document":
+        return document_max_age
+    if "no-cache" in directives:
+        return 0
+    if "immutable" in directives or HASHED_ASSET_PATTERN.search(url.split("?", 1)[0]):
+        return None
+    for name in ("s-maxage", "max-age"):
+        try:
+            max_age = int(directives.get(name))
+        except (TypeError, ValueError):
+            continue
+        if max_age > 0:
+            return max_age
+    return document_max_age
+
+
+class AssetCache:
+    """内存 LRU + 可选磁盘层的响应缓存
+
+    只在一个事件循环中使用。同一资源同时被多个上下文请求时，只有第一个请求访问网络，
+    其余请求等待它写入缓存（fetching / lookup）。
+    """
+
+    def __init__(self, memory_bytes: int, disk_dir=None, disk_bytes: int = 0):
+        self.memory_bytes = memory_bytes
+        self.max_entry_bytes = int(memory_bytes * MAX_ENTRY_FRACTION)
+        self.disk_dir = disk_dir
+        self.disk_bytes = disk_bytes
+        self.entries = collections.OrderedDict()
+        self.used = 0
+        self.peak = 0
+        self._vary_user_agent = set()
+        self._inflight = {}
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "uncacheable": 0,
+                      "bytes_saved": 0, "bytes_fetched": 0, "evicted": 0, "spilled": 0}
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self.prune_disk()
+
+    def key(self, url: str, variant: str, resource_type: str) -> str:
+        """HTML 文档和声明了 Vary: User-Agent 的资源按 UA 分别缓存"""
+        if resource_type == "document" or url in self._vary_user_agent:
+            return f"{variant} {url}"
+        return url
+
+    # ---- 查找 ----
+
+    async def lookup(self, url: str, variant: str, resource_type: str):
+        """返回有效的缓存条目；同一资源正在下载时等待其完成"""
+        key = self.key(url, variant, resource_type)
+        waiter = self._inflight.get(key)
+        if waiter is not None:
+            await waiter.wait()
+            key = self.key(url, variant, resource_type)
+        entry = self._get_memory(key)
+        if entry is not None:
+            self.stats["memory_hits"] += 1
+        else:
+            entry = self._get_disk(key)
+            if entry is not None:
+                self.stats["disk_hits"] += 1
+                self._put_memory(key, entry)
+        if entry is not None:
+            self.stats["bytes_saved"] += len(entry.body)
+        return entry
+
+    def _get_memory(self, key: str):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires is not None and entry.expires <= time.time():
+            self._remove_memory(key)
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def _get_disk(self, key: str):
+        if not self.disk_dir:
+            return None
+        body_path, meta_path = self._disk_paths(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta["key"] != key:
+                return None
+            if meta["expires"] is not None and meta["expires"] <= time.time():
+                self._remove_disk(body_path, meta_path)
+                return None
+            with open(body_path, "rb") as f:
+                body = f.read()
+            # 修改时间即最近使用时间，磁盘层按它淘汰
+            os.utime(meta_path)
+        except (OSError, ValueError, KeyError):
+            return None
+        return CachedResponse(meta["status"], meta["headers"], body, meta["expires"])
+
+    # ---- 写入 ----
+
+    @contextlib.contextmanager
+    def fetching(self, url: str, variant: str, resource_type: str):
+        """标记资源正在下载，结束（无论成功与否）时唤醒等待同一资源的请求"""
+        key = self.key(url, variant, resource_type)
+        if key in self._inflight:
+            yield
+            return
+        event = self._inflight[key] = asyncio.Event()
+        try:
+            yield
+        finally:
+            del self._inflight[key]
+            event.set()
+
+    def store(self, url: str, variant: str, resource_type: str, status: int, headers, body: bytes,
+              document_max_age: int):
+        """按缓存策略保存下载到的响应，返回用于响应当前请求的响应头"""
+        self.stats["misses"] += 1
+        self.stats["bytes_fetched"] += len(body)
+        headers = {name: value for name, value in headers.items() if name.lower() not in DROPPED_HEADERS}
+        lifetime = cache_lifetime(url, resource_type, status, headers, document_max_age)
+        if lifetime == 0 or len(body) > self.max_entry_bytes:
+            self.stats["uncacheable"] += 1
+            return headers
+        if "user-agent" in headers.get("vary", "").lower():
+            self._vary_user_agent.add(url)
+        expires = None if lifetime is None else time.time() + lifetime
+        self._put_memory(self.key(url, variant, resource_type), CachedResponse(status, headers, body, expires))
+        return headers
+
+    def _put_memory(self, key: str, entry):
+        self._remove_memory(key)
+        self.entries[key] = entry
+        self.used += len(entry.body)
+        while self.used > self.memory_bytes and self.entries:
+            old_key, old_entry = self.entries.popitem(last=False)
+            self.used -= len(old_entry.body)
+            self.stats["evicted"] += 1
+            self._spill(old_key, old_entry)
+        self.peak = max(self.peak, self.used)
+
+    def _remove_memory(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.used -= len(entry.body)
+
+    def _spill(self, key: str, entry):
+        """内存层淘汰的条目写入磁盘层（先写内容再写元数据，两者都通过临时文件原子替换）"""
+        if not self.disk_dir or (entry.expires is not None and entry.expires <= time.time()):
+            return
+        body_path, meta_path = self._disk_paths(key)
+        meta = {"key": key, "status": entry.status, "headers": entry.headers, "expires": entry.expires}
+        try:
+            os.makedirs(os.path.dirname(body_path), exist_ok=True)
+            self._write_atomic(body_path, entry.body)
+            self._write_atomic(meta_path, json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+            self.stats["spilled"] += 1
+        except OSError:
+            pass
+
+    @staticmethod
+    def _write_atomic(path: str, data: bytes):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+            raise
+
+    # ---- 磁盘层维护 ----
+
+    def _disk_paths(self, key: str):
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        base = os.path.join(self.disk_dir, digest[:2], digest)
+        return base + ".bin", base + ".json"
+
+    @staticmethod
+    def _remove_disk(body_path: str, meta_path: str):
+        for path in (meta_path, body_path):
+            with contextlib.suppress(OSError):
+                os.remove(path)
+
+    def prune_disk(self):
+        """删除过期条目和残留的临时文件，总大小超出预算时按最近使用时间淘汰"""
+        now = time.time()
+        files = []
+        total = 0
+        for directory, _, names in os.walk(self.disk_dir):
+            for name in names:
+                path = os.path.join(directory, name)
+                if name.endswith(".tmp"):
+                    with contextlib.suppress(OSError):
+                        os.remove(path)
+                    continue
+                if not name.endswith(".json"):
+                    continue
+                body_path = path[:-len(".json")] + ".bin"
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        expires = json.load(f).get("expires")
+                    size = os.path.getsize(body_path)
+                    used_at = os.path.getmtime(path)
+                except (OSError, ValueError):
+                    self._remove_disk(body_path, path)
+                    continue
+                if expires is not None and expires <= now:
+                    self._remove_disk(body_path, path)
+                    continue
+                files.append((used_at, size, body_path, path))
+                total += size
+        for _, size, body_path, meta_path in sorted(files):
+            if total <= self.disk_bytes:
+                break
+            self._remove_disk(body_path, meta_path)
+            total -= size
+
+    def clear(self):
+        """清空内存层（--watch 下源码改动后开发服务器资源的内容会变，地址不变）"""
+        self.entries.clear()
+        self.used = 0
+
+    def close(self):
+        if self.disk_dir:
+            self.prune_disk()
+
+    def as_dict(self):
+        """汇总为可跨进程传递的统计字典"""
+        return dict(self.stats, peak_bytes=self.peak)
+
+
+def merge_cache_stats(total, summary):
+    for name, value in summary.items():
+        if name == "peak_bytes":
+            total[name] = max(total.get(name, 0), value)
+        else:
+            total[name] = total.get(name, 0) + value
+
+
+def print_cache_stats(summary):
+    if not summary:
+        return
+    hits = summary["memory_hits"] + summary["disk_hits"]
+    requests = hits + summary["misses"]
+    if not requests:
+        return
+    disk = f"，磁盘 {summary['disk_hits']}" if summary["disk_hits"] or summary["spilled"] else ""
+    print(f"📦 共享资源缓存: 命中 {hits}/{requests} ({hits / requests:.1%}，内存 {summary['memory_hits']}{disk})，"
+          f"节省下载 {summary['bytes_saved'] / 1024 / 1024:.1f} MB，实际下载 {summary['bytes_fetched'] / 1024 / 1024:.1f} MB")
+    spilled = f"（写入磁盘 {summary['spilled']} 个）" if summary["spilled"] else ""
+    print(f"   不可缓存 {summary['uncacheable']} 个，内存淘汰 {summary['evicted']} 个{spilled}，"
+          f"内存峰值 {summary['peak_bytes'] / 1024 / 1024:.1f} MB")
@@ -0,0 +1,49 @@
+"""命令行入口：解析参数、输出设备合并信息后交给截图引擎"""
+
+from . import engine
+from .devices import build_devices
+from .options import build_parser
+from .targets import default_targets, parse_url_argument
+
+
+def main(argv=None):
+    parser = build_parser()
+    args, unknown = parser.parse_known_args(argv)
+
+    # 生成目标 URL 列表
+    targets = []
+    if args.url:
+        print(f"🎯 检测到自定义 URL 参数: {args.url}")
+        targets = parse_url_argument(args.url)
+        if not targets:
+            print("⚠️ 提供的 URL 无效，将使用默认列表。")
+    if not targets:
+        targets = default_targets()
+
+    devices, merged_info = build_devices(args.device_type, args.all_devices)
+
+    # 如果有合并的设备，在开始截图前统一输出（工作节点的设备由协调节点分配，不输出）
+    if merged_info and not args.worker:
+        print("\n" + "="*50)
+        print("🔄 设备合并信息（相同宽高的设备已合并）:")
+        for info in merged_info:
+            print(f"   {info['merged']} -> {info['kept']} ({info['size']})")
+        print("="*50 + "\n")
+
+    try:
+        run = engine.configure(args, devices=devices, targets=targets)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.worker:
+        engine.run_worker(run)
+    elif args.benchmark:
+        engine.run_benchmark(run)
+    elif args.report_only:
+        engine.write_report(run)
+    elif args.vitals_only:
+        engine.run_vitals(run)
+    elif args.watch:
+        engine.run_watch(run)
+    else:
+        engine.capture_screenshots(run)
@@ -0,0 +1,198 @@
+"""自适应并发控制和资源采样
+
+ConcurrencyController 按 AIMD 调整同时进行的任务数；process_tree_rss / total_memory_mb / cpu_load
+采样本机资源，也用于基准测试。统计内存优先使用 psutil（可选安装），未安装时在 Linux 上读取 /proc。
+"""
+
+import asyncio
+import math
+import os
+
+try:
+    import psutil
+    HAS_PSUTIL = True
+except ImportError:
+    HAS_PSUTIL = False
+
+from .errors import is_timeout_error
+
+
+def percentile(values, fraction: float) -> float:
+    """最近秩法百分位数"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def process_tree_rss(pid: int):
+    """进程及其所有子进程（浏览器、渲染进程）的常驻内存总和（字节），无法统计时返回 None"""
+    if HAS_PSUTIL:
+        try:
+            root = psutil.Process(pid)
+            total = 0
+            for proc in [root] + root.children(recursive=True):
+                try:
+                    total += proc.memory_info().rss
+                except psutil.Error:
+                    pass
+            return total
+        except psutil.Error:
+            return None
+
+    if not os.path.isdir("/proc"):
+        return None
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                # 进程名可能包含空格，从最后一个右括号之后解析父进程号
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    total = 0
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        stack.extend(children.get(current, []))
+        try:
+            with open(f"/proc/{current}/statm", "r") as f:
+                total += int(f.read().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            pass
+    return total
+
+
+def total_memory_mb():
+    """物理内存总量（MB），无法获取时返回 None"""
+    if HAS_PSUTIL:
+        return psutil.virtual_memory().total // (1024 * 1024)
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def cpu_load():
+    """整机 CPU 负载（0-1 以上，按核数归一化），无法获取时返回 None"""
+    if HAS_PSUTIL:
+        return psutil.cpu_percent(interval=None) / 100
+    if hasattr(os, "getloadavg"):
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    return None
+
+
+class ConcurrencyController:
+    """AIMD 自适应并发控制：根据内存、CPU 负载、导航延迟和超时率调整同时进行的任务数
+
+    每隔 --adapt-interval 秒评估一次：任一压力信号超限时并发数减半（乘性减），
+    所有信号健康且并发已被占满时加 1（加性增），其余情况保持不变。
+    每次调整都会输出原因；减小后冷却两个周期再尝试增加，避免来回震荡。
+    """
+
+    def __init__(self, initial: int, minimum: int, maximum: int, memory_limit_mb, log):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = max(self.minimum, min(initial, self.maximum))
+        self.memory_limit_mb = memory_limit_mb
+        self.log = log
+        self.in_flight = 0
+        self.condition = asyncio.Condition()
+        # 本评估周期内完成的任务 [(导航耗时, 是否超时)]
+        self.window = []
+        self.baseline_latency = None
+        self.cooldown = 0
+        self.changes = 0
+        self.lowest = self.highest = self.limit
+
+    def saturated(self) -> bool:
+        return self.in_flight >= self.limit
+
+    async def acquire(self):
+        async with self.condition:
+            while self.in_flight >= self.limit:
+                await self.condition.wait()
+            self.in_flight += 1
+
+    async def release(self, timer=None):
+        async with self.condition:
+            self.in_flight -= 1
+            self.condition.notify(1)
+        if timer is not None:
+            navigation = timer.stages.get("goto", 0) + timer.stages.get("ready", 0)
+            self.window.append((navigation, is_timeout_error(timer.error)))
+
+    async def set_limit(self, limit: int, reason: str):
+        previous = self.limit
+        async with self.condition:
+            self.limit = limit
+            self.condition.notify_all()
+        self.changes += 1
+        self.lowest = min(self.lowest, limit)
+        self.highest = max(self.highest, limit)
+        arrow = "⬆️ " if limit > previous else "⬇️ "
+        self.log(f"  🎚️ {arrow}并发 {previous} → {limit}（{reason}）")
+
+    async def evaluate(self, rss_mb, load):
+        """根据本周期的观测值调整并发上限"""
+        window, self.window = self.window, []
+        completed = len(window)
+        timeouts = sum(1 for _, timed_out in window if timed_out)
+        latencies = [navigation for navigation, timed_out in window if not timed_out]
+        latency = percentile(latencies, 0.5) if latencies else None
+        baseline = self.baseline_latency
+        if latency is not None:
+            # 基线取各周期导航延迟中位数的最小值，并缓慢上浮以适应页面本身的变化
+            self.baseline_latency = latency if baseline is None else min(latency, baseline * 1.05)
+
+        pressure = []
+        if self.memory_limit_mb and rss_mb is not None and rss_mb > self.memory_limit_mb:
+            pressure.append(f"内存 {rss_mb} MB > {self.memory_limit_mb} MB")
+        if completed and timeouts / completed > 0.1:
+            pressure.append(f"超时 {timeouts}/{completed}")
+        if latency is not None and baseline is not None and len(latencies) >= 2 and latency > baseline * 2:
+            pressure.append(f"导航延迟 p50 {latency:.1f}s > 基线 {baseline:.1f}s × 2")
+        if load is not None and load > 1.5:
+            pressure.append(f"CPU 负载 {load:.0%}")
+
+        if pressure:
+            self.cooldown = 2
+            if self.limit > self.minimum:
+                await self.set_limit(max(self.minimum, self.limit // 2), "，".join(pressure))
+            return
+
+        if self.cooldown:
+            self.cooldown -= 1
+            return
+
+        healthy = (
+            completed > 0 and self.saturated() and self.limit < self.maximum
+            and (rss_mb is None or not self.memory_limit_mb or rss_mb < self.memory_limit_mb * 0.85)
+            and (load is None or load < 0.9)
+            and (latency is None or baseline is None or latency <= baseline * 1.5)
+        )
+        if healthy:
+            details = [f"完成 {completed}"]
+            if rss_mb is not None:
+                details.append(f"内存 {rss_mb} MB")
+            if load is not None:
+                details.append(f"CPU {load:.0%}")
+            if latency is not None:
+                details.append(f"导航 p50 {latency:.1f}s")
+            await self.set_limit(self.limit + 1, "，".join(details))
+
+    async def monitor(self, interval: float):
+        """周期性采样资源占用并评估（在 run_devices 中作为后台任务运行）"""
+        loop = asyncio.get_event_loop()
+        while True:
+            await asyncio.sleep(interval)
+            # 遍历 /proc 可能需要几毫秒，放到线程池中执行，不阻塞事件循环
+            rss = await loop.run_in_executor(None, process_tree_rss, os.getpid())
+            await self.evaluate(rss // (1024 * 1024) if rss is not None else None, cpu_load())
+
+    def summary(self) -> str:
+        return f"🎚️ 自适应并发: 调整 {self.changes} 次，范围 {self.lowest}-{self.highest}，结束时 {self.limit}"
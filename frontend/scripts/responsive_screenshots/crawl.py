@@ -0,0 +1,284 @@
+"""站点爬取（--crawl）和 Next.js 路由模板
+
+从首页或 sitemap 出发广度优先发现站内 URL，按 app 目录中的路由模板分组，
+每个模板抽样少量页面截图。抓取优先使用 aiohttp（可选安装），未安装时在线程池中使用 urllib。
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+import urllib.request
+import xml.etree.ElementTree as ElementTree
+from datetime import datetime
+from html.parser import HTMLParser
+from urllib.parse import urldefrag, urljoin, urlparse
+
+try:
+    import aiohttp
+    HAS_AIOHTTP = True
+except ImportError:
+    HAS_AIOHTTP = False
+
+
+# 不需要截图的链接：静态资源、接口和下载文件
+CRAWL_SKIP_EXTENSIONS = (".pdf", ".zip", ".mp3", ".mp4", ".m4a", ".wav", ".jpg", ".jpeg", ".png", ".gif",
+                         ".webp", ".svg", ".ico", ".css", ".js", ".json", ".xml", ".txt", ".woff", ".woff2")
+CRAWL_SKIP_PREFIXES = ("/api/", "/_next/")
+
+
+class LinkExtractor(HTMLParser):
+    """从 HTML 中提取 <a href> 链接（不执行脚本，只看服务端渲染结果）"""
+
+    def __init__(self):
+        super().__init__()
+        self.links = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            href = dict(attrs).get("href")
+            if href:
+                self.links.append(href)
+
+
+def load_route_templates(app_dir: str):
+    """从 Next.js app 目录读取路由模板，如 ["/", "/course/[slug]", "/course/[slug]/[lesson]"]"""
+    return sorted(route_directories(app_dir))
+
+
+def route_directories(app_dir: str):
+    """路由模板及其所在目录 {模板: 目录}（路由分组中的同名模板保留最先找到的目录）"""
+    templates = {}
+    if not os.path.isdir(app_dir):
+        return templates
+    for root, dirs, files in os.walk(app_dir):
+        dirs[:] = [d for d in dirs if d not in ("api", "components", "hooks", "utils", "constants", "types")
+                   and not d.startswith(("_", "@"))]
+        if not any(name.startswith("page.") for name in files):
+            continue
+        # 路由分组 (group) 不出现在 URL 中
+        segments = [segment for segment in os.path.relpath(root, app_dir).split(os.sep)
+                    if segment != "." and not (segment.startswith("(") and segment.endswith(")"))]
+        templates.setdefault("/" + "/".join(segments), root)
+    return templates
+
+
+def match_route_template(path: str, templates) -> str:
+    """把 URL 路径匹配到路由模板；静态段优先，匹配不到时按段的形态推断"""
+    segments = [segment for segment in path.strip("/").split("/") if segment]
+    best, best_score = None, -1
+    for template in templates:
+        parts = [part for part in template.strip("/").split("/") if part]
+        if parts and parts[-1].startswith(("[...", "[[...")):
+            if len(segments) < len(parts) - (1 if parts[-1].startswith("[[...") else 0):
+                continue
+            fixed = parts[:-1]
+        elif len(parts) != len(segments):
+            continue
+        else:
+            fixed = parts
+        score = 0
+        for part, segment in zip(fixed, segments):
+            if part.startswith("["):
+                continue
+            if part != segment:
+                break
+            score += 1
+        else:
+            if score > best_score:
+                best, best_score = template, score
+    if best is not None:
+        return best
+
+    # 推断：数字、长哈希/UUID 或 "lesson12" 这类带编号的段视为动态参数
+    inferred = []
+    for segment in segments:
+        if re.fullmatch(r"\d+|[0-9a-f]{8,}|[0-9a-f-]{36}", segment):
+            inferred.append("[id]")
+        elif re.fullmatch(r"[a-zA-Z]+-?\d+", segment):
+            inferred.append(f"[{re.match(r'[a-zA-Z]+', segment).group(0)}]")
+        else:
+            inferred.append(segment)
+    return "/" + "/".join(inferred)
+
+
+def normalize_crawl_url(base: str, href: str, origin: str):
+    """把链接转换为站内绝对 URL（去掉片段和查询参数），站外或无需截图的链接返回 None"""
+    if href.startswith(("mailto:", "tel:", "javascript:", "data:")):
+        return None
+    url = urldefrag(urljoin(base, href))[0]
+    parsed = urlparse(url)
+    if f"{parsed.scheme}://{parsed.netloc}" != origin:
+        return None
+    # 去掉末尾斜杠，/course/2 与 /course/2/ 视为同一页面
+    path = parsed.path.rstrip("/") or "/"
+    if path.lower().endswith(CRAWL_SKIP_EXTENSIONS) or path.startswith(CRAWL_SKIP_PREFIXES):
+        return None
+    return f"{origin}{path}"
+
+
+def crawl_page_name(url: str) -> str:
+    """与 -url 参数相同的命名规则：只使用路径，斜杠替换为下划线"""
+    path = urlparse(url).path.strip("/").replace("/", "_")
+    return path or "root"
+
+
+class CrawlFetcher:
+    """有界并发的 HTML 抓取器：aiohttp 可用时使用 aiohttp，否则在线程池中使用 urllib"""
+
+    def __init__(self, concurrency: int, user_agent: str):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.user_agent = user_agent
+        self.session = None
+
+    async def __aenter__(self):
+        if HAS_AIOHTTP:
+            self.session = aiohttp.ClientSession(
+                headers={"User-Agent": self.user_agent},
+                timeout=aiohttp.ClientTimeout(total=20))
+        return self
+
+    async def __aexit__(self, *exc_info):
+        if self.session is not None:
+            await self.session.close()
+
+    def _fetch_sync(self, url: str):
+        request = urllib.request.Request(url, headers={"User-Agent": self.user_agent})
+        with urllib.request.urlopen(request, timeout=20) as response:
+            return response.status, response.headers.get("Content-Type", ""), response.geturl(), response.read()
+
+    async def fetch(self, url: str):
+        """返回 (状态码, Content-Type, 最终 URL, 内容)，请求失败时返回 None"""
+        async with self.semaphore:
+            try:
+                if self.session is not None:
+                    async with self.session.get(url) as response:
+                        return response.status, response.headers.get("Content-Type", ""), str(response.url), await response.read()
+                loop = asyncio.get_event_loop()
+                return await loop.run_in_executor(None, self._fetch_sync, url)
+            except Exception:
+                return None
+
+
+async def read_sitemap(fetcher, url: str, origin: str, depth: int = 0):
+    """读取 sitemap.xml（支持 sitemap 索引），返回站内 URL 列表；不存在时返回空列表"""
+    result = await fetcher.fetch(url)
+    if result is None or result[0] != 200:
+        return []
+    try:
+        root = ElementTree.fromstring(result[3])
+    except ElementTree.ParseError:
+        return []
+    locations = [element.text.strip() for element in root.iter() if element.tag.endswith("loc") and element.text]
+    if root.tag.endswith("sitemapindex"):
+        if depth > 1:
+            return []
+        nested = await asyncio.gather(*[read_sitemap(fetcher, location, origin, depth + 1) for location in locations])
+        return [url for urls in nested for url in urls]
+    return [normalized for normalized in (normalize_crawl_url(url, location, origin) for location in locations) if normalized]
+
+
+async def crawl_site(start_url: str, app_dir: str, per_template: int, max_pages: int, concurrency: int,
+                     user_agent: str):
+    """爬取站点，返回 {路由模板: {"urls": [...], "sampled": [...]}}
+
+    从首页（以及同源的 /sitemap.xml）或指定的 sitemap 出发做广度优先遍历，最多请求 max_pages 个页面。
+    每个模板抽样 per_template 个页面，只抓取有限数量的页面用于发现链接（抽样数的 5 倍，至少 10 个），
+    其余同模板的 URL 只记录不抓取；抽样按 URL 哈希排序选取，内容增加时已选页面保持稳定。
+    """
+    parsed = urlparse(start_url)
+    origin = f"{parsed.scheme}://{parsed.netloc}"
+    templates = load_route_templates(app_dir)
+    fetch_per_template = max(10, per_template * 5)
+
+    discovered = {}  # URL -> 路由模板
+    fetched = {}     # URL -> 是否为可访问的 HTML 页面
+    fetched_per_template = {}
+    frontier = []
+
+    def discover(url):
+        if url and url not in discovered:
+            discovered[url] = match_route_template(urlparse(url).path, templates)
+            frontier.append(url)
+
+    async with CrawlFetcher(concurrency, user_agent) as fetcher:
+        if start_url.endswith(".xml"):
+            seeds = await read_sitemap(fetcher, start_url, origin)
+        else:
+            seeds = [normalize_crawl_url(start_url, start_url, origin)]
+            seeds += await read_sitemap(fetcher, f"{origin}/sitemap.xml", origin)
+        for url in seeds:
+            discover(url)
+
+        async def visit(url):
+            result = await fetcher.fetch(url)
+            ok = result is not None and result[0] == 200 and "html" in result[1]
+            fetched[url] = ok
+            if not ok:
+                return
+            extractor = LinkExtractor()
+            try:
+                extractor.feed(result[3].decode("utf-8", errors="replace"))
+            except Exception:
+                return
+            for href in extractor.links:
+                discover(normalize_crawl_url(result[2], href, origin))
+
+        while frontier and len(fetched) < max_pages:
+            batch = []
+            while frontier and len(fetched) + len(batch) < max_pages:
+                url = frontier.pop(0)
+                template = discovered[url]
+                if fetched_per_template.get(template, 0) >= fetch_per_template:
+                    continue
+                fetched_per_template[template] = fetched_per_template.get(template, 0) + 1
+                batch.append(url)
+            if not batch:
+                break
+            await asyncio.gather(*[visit(url) for url in batch])
+            print(f"  🕸️  已请求 {len(fetched)} 个页面，发现 {len(discovered)} 个 URL", flush=True)
+
+        groups = {}
+        for url, template in discovered.items():
+            groups.setdefault(template, {"urls": [], "sampled": []})["urls"].append(url)
+
+        # 抽样：按 URL 哈希排序依次选取，未抓取过的候选先确认可访问
+        for template, group in groups.items():
+            group["urls"].sort()
+            for url in sorted(group["urls"], key=lambda u: hashlib.sha1(u.encode("utf-8")).hexdigest()):
+                if len(group["sampled"]) >= per_template:
+                    break
+                if url not in fetched:
+                    result = await fetcher.fetch(url)
+                    fetched[url] = result is not None and result[0] == 200 and "html" in result[1]
+                if fetched[url]:
+                    group["sampled"].append(url)
+    return groups
+
+
+def crawl_targets(start_url: str, app_dir: str, output_path: str, per_template: int, max_pages: int,
+                  concurrency: int, user_agent: str):
+    """执行爬取，输出各路由模板的统计，把爬取结果保存到 output_path 并返回页面列表（{"name", "url", "template"}）"""
+    if not start_url.startswith(("http://", "https://")):
+        start_url = ("http://" if "localhost" in start_url or "127.0.0.1" in start_url else "https://") + start_url
+    print(f"🕸️  爬取站点: {start_url}（每个路由模板抽样 {per_template} 个，"
+          f"最多请求 {max_pages} 个页面，并发 {concurrency}）")
+    started_at = time.time()
+    groups = asyncio.run(crawl_site(start_url, app_dir, per_template, max_pages, concurrency, user_agent))
+
+    targets = []
+    for template in sorted(groups):
+        group = groups[template]
+        print(f"   {template:<32} {len(group['urls']):>5} 个 URL，抽样 {len(group['sampled'])}")
+        for url in group["sampled"]:
+            targets.append({"name": crawl_page_name(url), "url": url, "template": template})
+    print(f"🕸️  爬取完成: {len(groups)} 个路由模板，{sum(len(g['urls']) for g in groups.values())} 个 URL，"
+          f"选取 {len(targets)} 个页面，耗时 {time.time() - started_at:.1f}s")
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump({"start_url": start_url, "crawled_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                   "per_template": per_template, "templates": groups}, f, ensure_ascii=False, indent=2)
+    return targets
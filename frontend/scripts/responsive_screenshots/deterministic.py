@@ -0,0 +1,89 @@
+"""确定性模式（--deterministic）
+
+冻结动画、时间、随机数和媒体播放，让同一页面多次截图的结果逐字节一致。
+"""
+
+import json
+
+
+# 导航前注入的脚本，截图前不必再等待动画结束：
+# - 时间：Date 停在固定起点，每个动画帧（requestAnimationFrame）前进固定的 frameMs，同一帧内读到的时间相同；
+#   时间只随帧数推进、与机器快慢无关，依赖时间差的防抖、轮询仍会触发（在单个任务中忙等 Date 变化的代码除外）
+# - 随机数：Math.random 改为固定种子的 mulberry32，每个文档重新开始
+# - 媒体：play() 按自动播放被拦截处理（播放器保留封面），autoplay 开始播放时立即暂停并回到开头
+# - 样式：关闭过渡，CSS 动画（包括无限循环的）只播放一次、时长为 0，并保持最后一帧（animation-fill-mode: forwards，
+#   否则动画结束后会回到动画前的样式），隐藏输入光标；
+#   通过 adoptedStyleSheets 注入，不向文档插入节点，不影响 React 水合
+DETERMINISTIC_INIT_JS = """({ epoch, frameMs, seed, css }) => {
+    const RealDate = Date;
+    let current = epoch;
+    const tick = () => {
+        current += frameMs;
+        requestAnimationFrame(tick);
+    };
+    requestAnimationFrame(tick);
+    const now = () => current;
+    function FixedDate(...params) {
+        if (!new.target) return new RealDate(now()).toString();
+        return params.length ? new RealDate(...params) : new RealDate(now());
+    }
+    FixedDate.prototype = RealDate.prototype;
+    FixedDate.now = now;
+    FixedDate.parse = RealDate.parse;
+    FixedDate.UTC = RealDate.UTC;
+    Object.defineProperty(FixedDate, 'name', { value: 'Date' });
+    window.Date = FixedDate;
+
+    let state = seed >>> 0;
+    Math.random = () => {
+        state = (state + 0x6D2B79F5) >>> 0;
+        let t = state;
+        t = Math.imul(t ^ (t >>> 15), t | 1);
+        t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+        return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+    };
+
+    HTMLMediaElement.prototype.play = function () {
+        return Promise.reject(new DOMException('play() is disabled in deterministic mode', 'NotAllowedError'));
+    };
+    document.addEventListener('play', (event) => {
+        event.target.pause();
+        event.target.currentTime = 0;
+    }, true);
+
+    const sheet = new CSSStyleSheet();
+    sheet.replaceSync(css);
+    document.adoptedStyleSheets = [...document.adoptedStyleSheets, sheet];
+}"""
+
+DETERMINISTIC_CSS = """
+*, *::before, *::after {
+    transition: none !important;
+    animation-duration: 0s !important;
+    animation-delay: 0s !important;
+    animation-iteration-count: 1 !important;
+    animation-fill-mode: forwards !important;
+    caret-color: transparent !important;
+}
+html, body { scroll-behavior: auto !important; }
+"""
+
+# 固定的时间起点（2025-01-01 00:00:00 UTC）、每帧前进的毫秒数（60Hz）和随机数种子
+DETERMINISTIC_EPOCH_MS = 1735689600000
+DETERMINISTIC_FRAME_MS = 16
+DETERMINISTIC_RANDOM_SEED = 20250101
+
+# 确定性模式的上下文选项：减少动态效果（prefers-reduced-motion），固定时区和语言，不随运行机器变化
+DETERMINISTIC_CONTEXT_OPTIONS = {"reduced_motion": "reduce", "timezone_id": "Asia/Shanghai", "locale": "zh-CN"}
+
+
+def deterministic_init_script() -> str:
+    params = {"epoch": DETERMINISTIC_EPOCH_MS, "frameMs": DETERMINISTIC_FRAME_MS, "seed": DETERMINISTIC_RANDOM_SEED, "css": DETERMINISTIC_CSS}
+    return f"({DETERMINISTIC_INIT_JS})({json.dumps(params)});"
+
+
+async def take_screenshot(page, full_page: bool, deterministic: bool = False) -> bytes:
+    """截取原始 PNG 字节；确定性模式下由 Playwright 把剩余的 Web Animations 快进到结束（无限循环的回到初始状态）"""
+    if deterministic:
+        return await page.screenshot(full_page=full_page, animations="disabled")
+    return await page.screenshot(full_page=full_page)
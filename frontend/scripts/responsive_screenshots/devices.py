@@ -0,0 +1,331 @@
+"""设备配置库：PC 分辨率和移动设备（自动生成横竖屏）的测试矩阵"""
+
+# 1. PC / 桌面显示器 (Mac 2010-2025 主流逻辑分辨率 + Windows)
+PC_DEVICES = [
+    # --- Mac Laptops (Legacy & Modern) ---
+    # 1. 11" MacBook Air Legacy (16:9)
+    {"name": "Mac_Air_11_Legacy_1366w", "width": 1366, "height": 768, "year": 2010},
+
+    # 2. 12" MacBook / 13" Old Pro (16:10)
+    {"name": "Mac_Small_1280w", "width": 1280, "height": 800, "year": 2010},
+
+    # 3. 13.3" Air/Pro Retina Default (16:10) - Most Common
+    {"name": "Mac_Std_1440w", "width": 1440, "height": 900, "year": 2012},
+
+    # 4. 14" MacBook Pro M-Series (Notch)
+    {"name": "Mac_Pro_14_1512w", "width": 1512, "height": 982, "year": 2021},
+
+    # 5. 15.4" Pro Legacy Scaled (More Space)
+    {"name": "Mac_Pro_15_Legacy_1680w", "width": 1680, "height": 1050, "year": 2010},
+
+    # 6. 16" MacBook Pro M-Series (Notch)
+    {"name": "Mac_Pro_16_1728w", "width": 1728, "height": 1117, "year": 2021},
+
+    # --- Mac Desktops (iMac & Displays) ---
+    # 7. 21.5" iMac Non-Retina / FHD External
+    {"name": "Mac_Desktop_FHD_1920w", "width": 1920, "height": 1080, "year": 2012},
+
+    # 8. 21.5" iMac 4K Retina Default
+    {"name": "Mac_Desktop_4K_2048w", "width": 2048, "height": 1152, "year": 2015},
+
+    # 9. 24" iMac M-Series 4.5K Default
+    {"name": "Mac_Desktop_24_2240w", "width": 2240, "height": 1260, "year": 2021},
+
+    # 10. 27" iMac 5K / Studio Display Default
+    {"name": "Mac_Desktop_5K_2560w", "width": 2560, "height": 1440, "year": 2014},
+
+    # 11. 32" Pro Display XDR 6K Default
+    {"name": "Mac_Desktop_XDR_3008w", "width": 3008, "height": 1692, "year": 2019},
+
+    # --- Windows Laptops (Samsung, Dell, Lenovo, Microsoft 2010-2025) ---
+    # 12. 13.5" Surface Laptop (3:2 Aspect Ratio) @ 150% Scale
+    # Native: 2256x1504 -> Logical: 1504x1002
+    {"name": "Win_Surface_Laptop_1504w", "width": 1504, "height": 1002, "year": 2017},
+
+    # 13. 12.3"-13" Surface Pro (3:2 Aspect Ratio) @ 200% Scale
+    # Native: 2736x1824 (Pro 7) / 2880x1920 (Pro 8/9/X) -> Logical: ~1368x912 or 1440x960
+    # Using common Pro 7 logical:
+    {"name": "Win_Surface_Pro_1368w", "width": 1368, "height": 912, "year": 2019},
+
+    # 14. 13.4" Dell XPS 13 / Modern 16:10 Ultrabooks (FHD+)
+    # Native: 1920x1200 @ 100% (or 3840x2400 @ 200%)
+    {"name": "Win_XPS_16_10_1920w", "width": 1920, "height": 1200, "year": 2018},
+
+    # 15. 14" Lenovo ThinkPad X1 Carbon / T-Series (16:10)
+    # Native: 2240x1400 @ 150% -> Logical: ~1493x933
+    # Or Standard FHD+ 1920x1200
+    {"name": "Win_ThinkPad_16_10_1920w", "width": 1920, "height": 1200, "year": 2018},
+
+    # 16. Standard 15.6" Laptop (FHD 16:9) @ 125% Scale (Very Common)
+    # Native: 1920x1080 -> Logical: 1536x864
+    {"name": "Win_FHD_Scaled_125_1536w", "width": 1536, "height": 864, "year": 2016},
+
+    # 17. Standard 13.3"/14" Laptop (FHD 16:9) @ 150% Scale
+    # Native: 1920x1080 -> Logical: 1280x720
+    {"name": "Win_FHD_Scaled_150_1280w", "width": 1280, "height": 720, "year": 2016},
+
+    # 18. Legacy Business Laptop (14" 1600x900)
+    # Common in 2010-2015 era (ThinkPad T420/T440)
+    {"name": "Win_Legacy_1600w", "width": 1600, "height": 900, "year": 2010},
+
+    # 19. Legacy Budget Laptop (15.6" 1366x768)
+    # The dominant resolution for 2010-2018 budget laptops
+    {"name": "Win_Legacy_1366w", "width": 1366, "height": 768, "year": 2010},
+
+    # 20. Samsung Galaxy Book / High-End OLED (16:10 3K)
+    # Native: 2880x1800 @ 200% -> Logical: 1440x900 (Same as Mac default)
+    # Native: 2880x1800 @ 175% -> Logical: ~1645x1028
+    {"name": "Win_OLED_3K_Scaled_1440w", "width": 1440, "height": 900, "year": 2021},
+
+    # --- Standard External Monitors (PC/Windows Default) ---
+    # 21. Standard 1080p Monitor (100% Scale)
+    {"name": "PC_Monitor_1080p_1920w", "width": 1920, "height": 1080, "year": 2010},
+
+    # 22. Standard 2K QHD Monitor (100% Scale)
+    {"name": "PC_Monitor_2K_2560w", "width": 2560, "height": 1440, "year": 2012},
+
+    # 23. Standard 4K UHD Monitor (150% Scale - Very Common Windows setting)
+    # Native: 3840x2160 -> Logical: 2560x1440
+    {"name": "PC_Monitor_4K_Scaled_150_2560w", "width": 2560, "height": 1440, "year": 2016},
+
+    # 24. Standard 4K UHD Monitor (200% Scale - "Retina" style)
+    # Native: 3840x2160 -> Logical: 1920x1080
+    {"name": "PC_Monitor_4K_Scaled_200_1920w", "width": 1920, "height": 1080, "year": 2016},
+
+    # 25. Standard 4K UHD Monitor (100% Scale - Massive Workspace)
+    {"name": "PC_Monitor_4K_Native_3840w", "width": 3840, "height": 2160, "year": 2016},
+]
+
+# 2. 移动设备基础数据 (名称, 竖屏逻辑宽, 竖屏逻辑高, 年份)
+# Playwright 使用 CSS 逻辑像素，而非物理像素
+MOBILE_DEVICE_SPECS = [
+    # =========================================================================
+    # 1. Apple iPhone Series (2010-2025)
+    # =========================================================================
+    # 1.1. 3.5"/4.0" Legacy Small (iPhone 4S/5/5S/SE1)
+    {"name": "Apple_iPhone_Small_320w", "width": 320, "height": 568, "year": 2010},
+
+    # 1.2. 4.7" Classic Retina (iPhone 6/7/8/SE2/SE3)
+    {"name": "Apple_iPhone_Classic_375w", "width": 375, "height": 667, "year": 2014},
+
+    # 1.3. 5.5" Classic Plus (iPhone 6/7/8 Plus)
+    {"name": "Apple_iPhone_Plus_414w", "width": 414, "height": 736, "year": 2014},
+
+    # 1.4. 5.8"/5.4" Notch Small (iPhone X/XS/11Pro, iPhone 12/13 Mini)
+    {"name": "Apple_iPhone_Notch_Small_375w_Tall", "width": 375, "height": 812, "year": 2017},
+
+    # 1.5. 6.1" Notch/Dynamic Standard (iPhone 12/13/14/15/16 Pro)
+    # Note: 12/13/14Pro are 390w; 14Pro/15/16 are 393w. Merged as 393w.
+    {"name": "Apple_iPhone_Modern_Std_393w", "width": 393, "height": 852, "year": 2020},
+
+    # 1.6. 6.1"/6.5" Notch Large Legacy (iPhone XR/11/XS Max)
+    {"name": "Apple_iPhone_Notch_Large_414w_Tall", "width": 414, "height": 896, "year": 2018},
+
+    # 1.7. 6.7"/6.9" Modern Max (iPhone 12/13/14 Plus, 13-16 Pro Max)
+    # Note: 12/13/14Plus are 428w; 14-16 Pro Max are 430w. Merged as 430w.
+    {"name": "Apple_iPhone_Modern_Max_430w", "width": 430, "height": 932, "year": 2020},
+
+    # =========================================================================
+    # 2. Huawei & Honor Series (High-End Android)
+    # =========================================================================
+    # 2.1. Huawei Mate 60/50 Pro, P60 Pro (Massive Screen)
+    # Logic Width: 432px (Very common for modern Huawei flagships)
+    {"name": "Huawei_Mate_Pro_432w", "width": 432, "height": 960, "year": 2022},
+
+    # 2.2. Huawei P40/P50 / Honor Magic Standard
+    # Logic Width: 360px (Legacy standard) or 393px (Modern standard)
+    # We use 360px here to represent the "Standard Android" baseline heavily used by Huawei/Honor mid-range
+    {"name": "Huawei_Honor_Std_360w", "width": 360, "height": 780, "year": 2020},
+
+    # 2.3. Huawei Mate X3/X5 Foldable (Inner Screen)
+    # ~2200x2480 physical -> ~420dpi -> ~ 5.3" aspect
+    # Logic: ~970px width unfolded (Approximate)
+    {"name": "Huawei_Mate_X_Inner_970w", "width": 970, "height": 1100, "year": 2023},
+
+    # =========================================================================
+    # 3. Samsung Galaxy Series
+    # =========================================================================
+    # 3.1. Samsung Galaxy S20/S21/S22/S23 Ultra (The "Phablet" King)
+    # Logic Width: 412px (Distinctive Samsung Width)
+    {"name": "Samsung_Ultra_412w", "width": 412, "height": 915, "year": 2020},
+
+    # 3.2. Samsung Galaxy S20/S21/S22/S23 Base & Plus
+    # Logic Width: 360px (Samsung strictly adheres to 360dp for non-Ultra usually, though newer Plus models creep up)
+    # Covered by "Android_Std_360w" generally, but listed for clarity
+    {"name": "Samsung_S_Base_360w", "width": 360, "height": 800, "year": 2020},
+
+    # 3.3. Samsung Galaxy Z Fold 4/5/6 (Outer Screen - Narrow)
+    # 904x2316 physical -> Logic ~344px to 400px depending on model
+    # Fold 4/5 are notoriously narrow: ~344px or 320px in older models
+    {"name": "Samsung_Fold_Outer_344w", "width": 344, "height": 900, "year": 2022},
+
+    # 3.4. Samsung Galaxy Z Fold 4/5/6 (Inner Screen - Boxy)
+    {"name": "Samsung_Fold_Inner_900w", "width": 900, "height": 1080, "year": 2022},
+
+    # =========================================================================
+    # 4. Xiaomi, Oppo, Vivo, Google Pixel
+    # =========================================================================
+    # 4.1. Xiaomi 13/14, Pixel 7/8, Oppo Find X6/X7
+    # Modern Android Flagship Standard: 393px (Matches iPhone Pro width)
+    {"name": "Android_Flagship_Modern_393w", "width": 393, "height": 851, "year": 2022},
+
+    # 4.2. Oppo Find N2/N3 (Foldable Outer - Wide)
+    # Oppo's foldable outer screen is wider/shorter than Samsung's
+    # Logic: ~410px - 430px
+    {"name": "Oppo_Find_N_Outer_412w", "width": 412, "height": 800, "year": 2022},
+
+    # 4.3. Generic Budget/Mid-Range Android (Redmi Note, Galaxy A, Honor X)
+    # The absolute most common viewport on the web for Android
+    {"name": "Android_Universal_360w", "width": 360, "height": 800, "year": 2016},
+
+    # =========================================================================
+    # 5. Tablets (Apple & Android)
+    # =========================================================================
+    # 5.1. iPad Mini 6 / 8.3" (New Aspect)
+    {"name": "iPad_Mini_New_744w", "width": 744, "height": 1133, "year": 2021},
+
+    # 5.2. iPad Standard 10.2" / Legacy 9.7" (4:3)
+    {"name": "iPad_Classic_768w", "width": 768, "height": 1024, "year": 2010},
+
+    # 5.3. iPad Air/Pro 11" (Modern Standard)
+    {"name": "iPad_Air_Pro_820w", "width": 820, "height": 1180, "year": 2018},
+
+    # 5.4. iPad Pro 12.9" (Legacy Large)
+    {"name": "iPad_Pro_Large_1024w", "width": 1024, "height": 1366, "year": 2015},
+
+    # 5.5. iPad Pro 13" M4 (2024 Ultimate)
+    {"name": "iPad_Pro_M4_1032w", "width": 1032, "height": 1376, "year": 2024},
+
+    # 5.6. Android Tablet Standard (11" 16:10) - Huawei MatePad, Samsung Tab S
+    {"name": "Android_Tab_11_800w", "width": 800, "height": 1280, "year": 2020},
+
+    # 5.7. Android Tablet Large (12.4"+) - Samsung Tab S8+/Ultra
+    # Logic often scales to ~900-1000px width
+    {"name": "Android_Tab_Large_960w", "width": 960, "height": 1440, "year": 2022},
+]
+
+# 年份阈值：默认只处理2015年以后的设备
+YEAR_THRESHOLD = 2015
+
+# 判断是否为平板设备（根据设备名称或宽度）
+def is_tablet_device(device_name: str, portrait_width: int) -> bool:
+    """判断设备是否为平板（基于竖屏宽度）"""
+    tablet_keywords = ['iPad', 'Tab', 'Tablet', 'MatePad']
+    # 检查设备名称中是否包含平板关键词
+    if any(keyword in device_name for keyword in tablet_keywords):
+        return True
+    # 根据宽度判断：>= 600px 且 <= 1024px 的移动设备通常是平板
+    # 手机通常 < 500px（竖屏宽度）
+    if 600 <= portrait_width <= 1024:
+        return True
+    return False
+
+# 判断是否为手机设备
+def is_phone_device(device_name: str, portrait_width: int) -> bool:
+    """判断设备是否为手机（基于竖屏宽度）"""
+    # 如果宽度 < 600px，通常是手机
+    if portrait_width < 600:
+        return True
+    # 检查设备名称中是否包含手机关键词
+    phone_keywords = ['iPhone', 'Galaxy_S', 'Huawei_Mate_Pro', 'Huawei_Honor_Std',
+                      'Samsung_Ultra', 'Samsung_S_Base', 'Samsung_Fold_Outer',
+                      'Android_Flagship', 'Oppo_Find_N_Outer', 'Android_Universal']
+    if any(keyword in device_name for keyword in phone_keywords):
+        # 排除平板关键词
+        if not is_tablet_device(device_name, portrait_width):
+            return True
+    return False
+
+
+def build_devices(device_type: str = "all", all_devices: bool = False):
+    """构建测试设备列表，返回 (设备列表, 合并信息)
+
+    device_type 为 mobile / tablet / pc / all；all_devices 为 False 时过滤掉 2015 年以前的设备。
+    相同宽高的设备只保留第一个，合并信息 [{"merged", "kept", "size"}] 由调用方决定是否输出。
+    """
+    devices = []
+
+    # 添加 PC
+    if device_type in ['pc', 'all']:
+        for pc in PC_DEVICES:
+            # 如果未启用 --all-devices，则过滤掉2015年以前的设备
+            if not all_devices and pc.get("year", 2020) < YEAR_THRESHOLD:
+                continue
+
+            devices.append({
+                "name": pc["name"],
+                "width": pc["width"],
+                "height": pc["height"],
+                "is_mobile": False,
+                "has_touch": False,
+                "year": pc.get("year", 2020),
+                "device_type": "pc"
+            })
+
+    # 添加移动设备 (自动生成横竖屏)
+    if device_type in ['mobile', 'tablet', 'all']:
+        for mobile in MOBILE_DEVICE_SPECS:
+            # 如果未启用 --all-devices，则过滤掉2015年以前的设备
+            if not all_devices and mobile.get("year", 2020) < YEAR_THRESHOLD:
+                continue
+
+            name = mobile["name"]
+            w = mobile["width"]  # 竖屏宽度
+            h = mobile["height"]  # 竖屏高度
+            year = mobile.get("year", 2020)
+
+            # 判断设备类型（基于竖屏宽度）
+            is_tablet = is_tablet_device(name, w)
+            is_phone = is_phone_device(name, w)
+            category = "tablet" if is_tablet else ("phone" if is_phone else "mobile")
+
+            # 根据 --device-type 参数过滤
+            if device_type == 'mobile' and not is_phone:
+                continue
+            if device_type == 'tablet' and not is_tablet:
+                continue
+
+            # 竖屏 (Portrait)
+            devices.append({
+                "name": f"{name}_Portrait",
+                "width": w,
+                "height": h,
+                "is_mobile": True,
+                "has_touch": True,
+                "year": year,
+                "device_type": category
+            })
+            # 横屏 (Landscape) - 宽高互换
+            devices.append({
+                "name": f"{name}_Landscape",
+                "width": h,
+                "height": w,
+                "is_mobile": True,
+                "has_touch": True,
+                "year": year,
+                "device_type": category
+            })
+
+    # 去重：合并相同宽高的设备（保留第一个设备名称）
+    seen_devices = {}
+    deduplicated_devices = []
+    merged_info = []  # 记录合并信息，稍后统一输出
+
+    for device in devices:
+        # 使用 (width, height, is_mobile, has_touch) 作为唯一键
+        key = (device["width"], device["height"], device["is_mobile"], device["has_touch"])
+
+        if key in seen_devices:
+            # 如果已存在相同宽高的设备，跳过并记录合并信息
+            existing_device = seen_devices[key]
+            merged_info.append({
+                "merged": device["name"],
+                "kept": existing_device["name"],
+                "size": f"{device['width']}x{device['height']}"
+            })
+        else:
+            # 首次出现，添加到结果列表
+            seen_devices[key] = device
+            deduplicated_devices.append(device)
+
+    return deduplicated_devices, merged_info
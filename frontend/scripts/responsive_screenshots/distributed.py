@@ -0,0 +1,406 @@
+"""分布式截图（--coordinator / --worker）
+
+协调节点持有完整的 (页面, 设备) 任务矩阵、耗时历史、截图清单和任务日志，通过 HTTP 提供：
+  GET  /config       运行选项（工作节点以此为准，只保留本机的并发相关选项）
+  POST /lease        {"worker", "slots"} 领取最多 slots 个任务，同时续租该节点已领取的任务
+  POST /events       {"worker", "events"} 回传结果 / 日志 / 开始事件（与分片模式的事件格式相同）
+  PUT  /files/<页面>/<设备>_<文件名>  上传截图文件（X-Worker-Id 为上传的节点），写入协调节点的截图目录；
+                     只接受该节点当前持有租约的 (页面, 设备) 的截图，其他路径返回 403
+工作节点超过 --lease-timeout 秒没有任何请求时视为已退出，其未完成的任务重新排队。
+
+默认只监听本机回环地址；监听其他地址时必须设置共享令牌（--coordinator-token），
+所有请求都要带 Authorization: Bearer <令牌>，否则返回 401。
+"""
+
+import asyncio
+import contextlib
+import hmac
+import ipaddress
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, unquote
+
+from .errors import error_summary
+from .targets import normalize_url
+
+# 工作节点保留本机取值的选项（其余选项以协调节点为准）
+WORKER_LOCAL_OPTIONS = ("parallel", "min_parallel", "max_parallel", "memory_limit", "no_adaptive", "adapt_interval",
+                        "writer_threads", "writer_queue", "no_tuning", "worker", "worker_id", "lease_timeout",
+                        "asset_cache_mb", "asset_cache_dir", "asset_cache_disk_mb", "coordinator_token")
+
+# 只对协调节点本机有意义的选项，不通过 GET /config 发给工作节点
+COORDINATOR_PRIVATE_OPTIONS = ("output_dir", "har_dir", "compare_to")
+
+# PUT /files/ 接受的截图扩展名
+UPLOAD_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp")
+
+
+def parse_bind_address(value: str):
+    """解析 --coordinator 的 [HOST:]PORT，只写端口时监听本机回环地址"""
+    host, _, port = value.rpartition(":")
+    return host.strip("[]") or "127.0.0.1", int(port)
+
+
+def is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def served_options(options) -> dict:
+    """GET /config 返回的运行选项：去掉工作节点本机取值的选项（包括令牌）和协调节点本机的路径"""
+    return {name: value for name, value in vars(options).items()
+            if name not in WORKER_LOCAL_OPTIONS and name not in COORDINATOR_PRIVATE_OPTIONS}
+
+
+def job_key(job):
+    return job["target"]["name"], job["device"]["name"]
+
+
+class Coordinator:
+    """协调节点的任务租约表（HTTP 处理线程和主线程共享，全部操作在锁内进行）
+
+    结果、日志等事件放入 events 队列，由主线程交给 ProgressReporter 处理
+    （任务日志的 SQLite 连接只能在主线程中使用）。
+    """
+
+    def __init__(self, jobs, lease_timeout: float, events, deadline=None):
+        self.pending = list(jobs)
+        self.leases = {}  # {任务键: {"job", "worker", "expires"}}
+        self.workers = {}  # {工作节点: 最后一次请求的时间}
+        self.done = set()
+        self.lease_timeout = lease_timeout
+        self.events = events
+        # 预算截止时间（--budget）：预计无法在此之前完成的任务不再分发，留在 overrun 中
+        self.deadline = deadline
+        self.overrun = []
+        self.lock = threading.Lock()
+
+    def finished(self) -> bool:
+        return not self.pending and not self.leases
+
+    def touch(self, worker: str):
+        """记录工作节点的一次请求，并续租它持有的全部任务"""
+        now = time.time()
+        if worker not in self.workers:
+            self.events.put((worker, ("joined",)))
+        self.workers[worker] = now
+        for lease in self.leases.values():
+            if lease["worker"] == worker:
+                lease["expires"] = now + self.lease_timeout
+
+    def holds(self, worker: str, page_name: str, device_name: str) -> bool:
+        """工作节点当前是否持有 (页面, 设备) 的租约"""
+        with self.lock:
+            lease = self.leases.get((page_name, device_name))
+            return lease is not None and lease["worker"] == worker
+
+    def lease(self, worker: str, slots: int):
+        with self.lock:
+            self.touch(worker)
+            jobs = []
+            if self.deadline is not None:
+                now = time.time()
+                self.overrun.extend(job for job in self.pending if now + job["expected"] > self.deadline)
+                self.pending = [job for job in self.pending if now + job["expected"] <= self.deadline]
+            while self.pending and len(jobs) < slots:
+                job = self.pending.pop(0)
+                self.leases[job_key(job)] = {"job": job, "worker": worker,
+                                             "expires": time.time() + self.lease_timeout}
+                jobs.append(job)
+            return {"jobs": jobs, "finished": self.finished()}
+
+    def record(self, worker: str, events):
+        """记录工作节点回传的事件
+
+        租约过期后迟到的结果不采用：任务已重新排队或分配给其他节点，以当前持有租约的节点为准。
+        已被判定退出的节点也不因迟到的事件重新登记，它下次领取任务时再重新加入。
+        """
+        with self.lock:
+            if worker in self.workers:
+                self.touch(worker)
+            for event in events:
+                if event[0] == "result":
+                    key = (event[2], event[3])
+                    lease = self.leases.get(key)
+                    if lease is None or lease["worker"] != worker:
+                        continue
+                    if event[1] != "retrying":
+                        del self.leases[key]
+                        # 防御性检查：同一任务只采用一次结果
+                        if key in self.done:
+                            continue
+                        self.done.add(key)
+                self.events.put((worker, tuple(event)))
+
+    def expire(self):
+        """把超时未续租的任务重新放回队首，返回 {工作节点: 重新排队的任务数}"""
+        now = time.time()
+        requeued = {}
+        with self.lock:
+            for key, lease in list(self.leases.items()):
+                if lease["expires"] <= now:
+                    del self.leases[key]
+                    self.pending.insert(0, lease["job"])
+                    requeued[lease["worker"]] = requeued.get(lease["worker"], 0) + 1
+            for worker in requeued:
+                self.workers.pop(worker, None)
+        return requeued
+
+
+class CoordinatorHandler(BaseHTTPRequestHandler):
+    """协调节点的 HTTP 接口（见本节开头的说明）"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def authorized(self) -> bool:
+        """校验共享令牌（未设置令牌时只监听本机回环地址，不校验），失败时返回 401"""
+        token = self.server.token
+        if not token:
+            return True
+        supplied = self.headers.get("Authorization", "")
+        if hmac.compare_digest(supplied.encode("utf-8"), f"Bearer {token}".encode("utf-8")):
+            return True
+        self.send_json({"error": "unauthorized"}, 401)
+        return False
+
+    def send_json(self, payload, status: int = 200):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def do_GET(self):
+        if not self.authorized():
+            return
+        if self.path == "/config":
+            self.send_json({"options": self.server.options})
+        else:
+            self.send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        if not self.authorized():
+            return
+        coordinator = self.server.coordinator
+        try:
+            payload = json.loads(self.read_body() or b"{}")
+            if self.path == "/lease":
+                self.send_json(coordinator.lease(payload["worker"], int(payload.get("slots", 0))))
+            elif self.path == "/events":
+                coordinator.record(payload["worker"], payload.get("events", []))
+                self.send_json({"ok": True})
+            else:
+                self.send_json({"error": "not found"}, 404)
+        except (ValueError, KeyError) as e:
+            self.send_json({"error": f"bad request: {e}"}, 400)
+
+    def do_PUT(self):
+        if not self.authorized():
+            return
+        if not self.path.startswith("/files/"):
+            self.send_json({"error": "not found"}, 404)
+            return
+        page_name, _, filename = unquote(self.path[len("/files/"):]).partition("/")
+        if (not page_name or not filename or "/" in filename or "\\" in filename
+                or page_name.startswith(".") or "\\" in page_name
+                or not filename.lower().endswith(UPLOAD_EXTENSIONS)):
+            self.send_json({"error": "invalid path"}, 400)
+            return
+        # 文件名形如 <设备>_View_<宽>x<高>.<扩展名>，设备名本身可能含下划线
+        worker = self.headers.get("X-Worker-Id", "")
+        device_name = filename.rsplit("_", 2)[0]
+        if not self.server.coordinator.holds(worker, page_name, device_name):
+            self.send_json({"error": "no active lease for this file"}, 403)
+            return
+        data = self.read_body()
+        page_dir = os.path.join(self.server.output_dir, page_name)
+        path = os.path.join(page_dir, filename)
+        os.makedirs(page_dir, exist_ok=True)
+        # 与本地写盘相同：先写临时文件再原子替换
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self.send_json({"ok": True})
+
+
+def serve_coordinator(coordinator, address, options, output_dir: str, token=None):
+    """在后台线程中启动协调节点的 HTTP 服务，返回 server（结束时调用 shutdown / server_close）
+
+    options 为 GET /config 返回的运行选项字典，上传的截图写入 output_dir；
+    token 为共享令牌，未设置时不能监听非回环地址。
+    """
+    if not token and not is_loopback(address[0]):
+        raise ValueError(f"协调节点监听非回环地址 {address[0]} 时必须设置 --coordinator-token")
+    server = ThreadingHTTPServer(address, CoordinatorHandler)
+    server.daemon_threads = True
+    server.coordinator = coordinator
+    server.options = options
+    server.output_dir = output_dir
+    server.token = token
+    threading.Thread(target=server.serve_forever, name="coordinator-http", daemon=True).start()
+    return server
+
+
+class CoordinatorClient:
+    """工作节点访问协调节点的 HTTP 客户端（阻塞调用，在线程中使用）"""
+
+    def __init__(self, base_url: str, worker_id: str, token=None, timeout: float = 30):
+        self.base_url = normalize_url(base_url).rstrip("/")
+        self.worker_id = worker_id
+        self.token = token
+        self.timeout = timeout
+
+    def request(self, method: str, path: str, payload=None, data: bytes = None):
+        if payload is not None:
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        headers = {"X-Worker-Id": self.worker_id}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        request = urllib.request.Request(self.base_url + path, data=data, method=method, headers=headers)
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read() or b"{}")
+
+    def config(self):
+        return self.request("GET", "/config")["options"]
+
+    def lease(self, slots: int):
+        return self.request("POST", "/lease", {"worker": self.worker_id, "slots": slots})
+
+    def send_events(self, events):
+        self.request("POST", "/events", {"worker": self.worker_id, "events": events})
+
+    def upload(self, relative: str, path: str):
+        with open(path, "rb") as f:
+            data = f.read()
+        self.request("PUT", "/files/" + quote(relative.replace(os.sep, "/")), data=data)
+
+
+class Uplink:
+    """工作节点到协调节点的事件通道
+
+    接口与分片模式的事件队列相同（put），ProgressReporter 不需要区分本地和远程；
+    后台线程按顺序发送：先上传截图文件，再发送对应的结果事件，协调节点记录完成时文件一定已经存在。
+    发送失败时每 2 秒重试，直到成功或 close 时放弃；协调节点拒绝的请求（4xx，例如租约已过期）不重试。
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.queue = queue.Queue()
+        self.closing = False
+        self.sent = {"captured": 0, "skipped": 0, "deduped": 0, "linted": 0, "failed": 0, "retrying": 0}
+        self.thread = threading.Thread(target=self._run, name="worker-uplink", daemon=True)
+        self.thread.start()
+
+    def put(self, event):
+        self.queue.put(event)
+
+    def close(self, timeout: float = 60):
+        self.queue.put(None)
+        self.thread.join(timeout)
+
+    def _send(self, action, *params):
+        while True:
+            try:
+                return action(*params)
+            except Exception as e:
+                if isinstance(e, urllib.error.HTTPError) and 400 <= e.code < 500 and e.code != 429:
+                    # 请求本身被拒绝（例如租约已过期后上传的截图），重试不会成功
+                    print(f"⚠️ 协调节点拒绝了请求: {error_summary(e)}", flush=True)
+                    return None
+                if self.closing:
+                    print(f"❌ 无法连接协调节点，放弃未发送的事件: {error_summary(e)}", flush=True)
+                    return None
+                time.sleep(2)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = [self.queue.get()]
+            while len(batch) < 200:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            events = []
+            for event in batch:
+                if event is None:
+                    stopping = self.closing = True
+                elif event[0] == "file":
+                    if events:
+                        self._send(self.client.send_events, events)
+                        events = []
+                    _, relative, path = event
+                    self._send(self.client.upload, relative, path)
+                    with contextlib.suppress(OSError):
+                        os.remove(path)
+                else:
+                    if event[0] == "result":
+                        self.sent[event[1]] += 1
+                    events.append(list(event))
+            if events:
+                self._send(self.client.send_events, events)
+
+
+async def feed_remote_jobs(job_queue, client, controller, log, lease_timeout: float):
+    """后台补充任务：本地已领取的任务少于当前并发数时向协调节点领取，每次请求同时为已领取的任务续租
+
+    协调节点超过 lease_timeout 秒不可达时清空本地任务并结束。
+    """
+    loop = asyncio.get_event_loop()
+    unreachable_since = None
+    while not job_queue.finished:
+        slots = max(0, controller.limit - len(job_queue.pending))
+        try:
+            response = await loop.run_in_executor(None, client.lease, slots)
+        except Exception as e:
+            now = time.time()
+            if unreachable_since is None:
+                unreachable_since = now
+                log(f"⚠️ 无法连接协调节点: {error_summary(e)}")
+            elif now - unreachable_since > lease_timeout:
+                # 协调节点已退出或不可达，已领取的任务也已被重新分配，停止领取
+                log("❌ 协调节点长时间无响应，工作节点退出")
+                job_queue.pending = []
+                job_queue.finished = True
+                return
+            await asyncio.sleep(1)
+            continue
+        unreachable_since = None
+        job_queue.pending.extend(response["jobs"])
+        if response["finished"] and not job_queue.pending:
+            job_queue.finished = True
+            return
+        await asyncio.sleep(0.2 if response["jobs"] else 1.0)
+
+
+def wait_for_coordinator(client, timeout: float):
+    """启动时等待协调节点可用（最多 timeout 秒），返回协调节点的运行选项"""
+    deadline = time.time() + timeout
+    while True:
+        try:
+            return client.config()
+        except Exception as e:
+            if isinstance(e, urllib.error.HTTPError) and e.code == 401:
+                print(f"❌ 协调节点 {client.base_url} 拒绝访问：--coordinator-token 与协调节点不一致")
+                sys.exit(1)
+            if time.time() > deadline:
+                print(f"❌ 无法连接协调节点 {client.base_url}: {error_summary(e)}")
+                sys.exit(1)
+            time.sleep(2)
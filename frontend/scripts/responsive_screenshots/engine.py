@@ -0,0 +1,3301 @@
+"""响应式截图引擎
+
+包含截图任务调度、浏览器上下文池、页面就绪检测、HAR 录制回放、请求拦截、
+视觉对比、性能指标测量和基准测试。任务日志、自适应并发、站点爬取、预算规划、
+分布式协调和确定性模式在各自的模块中，通过参数接收所需的配置。
+运行配置和运行状态保存在 configure() 返回的 RunContext 中，显式传给各个函数；
+导入本模块不会解析命令行参数、构建设备列表或输出任何内容。
+"""
+
+import asyncio
+import os
+import sys
+import subprocess
+import base64
+import contextlib
+import csv
+import functools
+import hashlib
+import heapq
+import io
+import json
+import time
+import queue
+import random
+import multiprocessing
+import re
+import shutil
+import socket
+import tempfile
+import threading
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urldefrag, urlparse
+
+# 检查并尝试导入 Playwright
+try:
+    from playwright.async_api import async_playwright
+    HAS_PLAYWRIGHT = True
+except ImportError:
+    HAS_PLAYWRIGHT = False
+
+# 视觉回归对比（--compare-to）依赖 NumPy 和 Pillow，JPEG/WebP 输出依赖 Pillow，均为可选安装
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+try:
+    from PIL import Image
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
+
+from .asset_cache import CACHEABLE_RESOURCE_TYPES, AssetCache, merge_cache_stats, print_cache_stats
+from .controller import HAS_PSUTIL, ConcurrencyController, percentile, process_tree_rss, total_memory_mb
+from .crawl import crawl_targets, match_route_template, route_directories
+from .deterministic import DETERMINISTIC_CONTEXT_OPTIONS, deterministic_init_script, take_screenshot
+from .devices import build_devices
+from .distributed import (
+    WORKER_LOCAL_OPTIONS, Coordinator, CoordinatorClient, Uplink, feed_remote_jobs, is_loopback, parse_bind_address,
+    serve_coordinator, served_options, wait_for_coordinator,
+)
+from .errors import RETRYABLE_ERRORS, classify_error, error_summary
+from .journal import JobJournal
+from .planner import changed_pages, plan_budget, print_budget_plan
+from .report import build_report
+from .stitch import TileStitcher
+from .options import default_options
+from .targets import default_targets
+from .watch import LAYOUT_ENTRY_NAMES, SOURCE_EXTENSIONS, ImportGraph, route_entry_files, scan_sources
+
+# -----------------------------------------------------------------------------
+# 运行配置（configure() 返回的 RunContext）
+# -----------------------------------------------------------------------------
+
+# scripts/ 目录及命令行入口（基准测试以子进程方式运行命令行入口）
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLI_SCRIPT = os.path.join(SCRIPTS_DIR, "test_responsive_screenshots.py")
+
+# 基准测试生成的推荐配置（按机器保存，不随 --output-dir 改变）
+TUNING_PATH = os.path.join(SCRIPTS_DIR, "screenshots", ".tuning.json")
+
+# 基准测试夹具站点：课程、问答、参考资料三类页面的静态 HTML
+BENCHMARK_FIXTURE_DIR = os.path.join(SCRIPTS_DIR, "benchmark_fixtures")
+BENCHMARK_PAGES = ["course", "qa", "reference"]
+
+# Next.js app 目录，用于把 URL 匹配到真实的路由模板
+APP_DIR = os.path.join(SCRIPTS_DIR, "..", "app")
+
+# 移动端统一使用的 User-Agent（服务端根据 UA 返回不同的 HTML，因此存档也按 UA 区分）
+MOBILE_USER_AGENT = "Mozilla/5.0 (iPhone; CPU iPhone OS 14_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.0 Mobile/15E148 Safari/604.1"
+
+# 指纹探测时桌面端使用的 User-Agent（浏览器上下文中桌面端使用 Chromium 默认 UA）
+DESKTOP_PROBE_USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+
+def load_tuning(path: str):
+    """读取基准测试推荐配置，CPU 核数与当前机器不一致时视为失效"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            tuning = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if tuning.get("cpu_count") != os.cpu_count():
+        return None
+    return tuning
+
+
+class RunContext:
+    """一次运行的选项、设备、页面、输出路径和运行状态
+
+    由 configure() 创建，显式传给各个截图函数；同一进程中的多次运行（例如并发的 capture() 调用）
+    各自持有一个实例，互不影响。
+    """
+
+    def __init__(self, options, devices, targets, tuning=None):
+        # 运行选项（argparse.Namespace，见 options.build_parser）
+        self.args = options
+        # 本次运行的测试设备和页面
+        self.devices = list(devices)
+        self.targets = list(targets)
+        # 本次运行使用的推荐配置（--parallel / --workers 未指定时）
+        self.tuning = tuning
+
+        # 截图输出目录及其中的各类记录
+        self.output_dir = options.output_dir or os.path.join(SCRIPTS_DIR, "screenshots")
+        # 历史耗时记录，用于按"最长任务优先"调度 (设备, 页面) 任务
+        self.timings_path = os.path.join(self.output_dir, ".timings.json")
+        # 截图清单：记录每张截图对应的页面指纹，用于增量截图
+        self.manifest_path = os.path.join(self.output_dir, ".manifest.json")
+        # 任务日志：每个 (URL, 设备, View/Full) 任务的状态，用于崩溃后 --resume 续跑
+        self.journal_path = os.path.join(self.output_dir, ".journal.sqlite3")
+        # 运行追踪：每个任务各阶段耗时的 JSON Lines 记录，以及最慢任务的 Playwright trace
+        self.trace_dir = os.path.join(self.output_dir, ".trace")
+        # 站点爬取结果：发现的全部 URL 按路由模板分组，以及抽样结果
+        self.crawl_path = os.path.join(self.output_dir, ".crawl.json")
+        # 视觉回归对比输出：差异热力图目录和机器可读报告
+        self.diff_dir = os.path.join(self.output_dir, ".diff")
+        self.diff_report_path = os.path.join(self.output_dir, "diff_report.json")
+        # --lint 检查报告
+        self.lint_report_path = os.path.join(self.output_dir, "lint_report.json")
+        # 预算规划结果（--budget）：选中和未执行的任务
+        self.budget_plan_path = os.path.join(self.output_dir, "budget_plan.json")
+        # 性能指标测量结果（--vitals）：逐设备结果和汇总的 JSON 报告，以及逐设备表格
+        self.vitals_report_path = os.path.join(self.output_dir, "vitals_report.json")
+        self.vitals_csv_path = os.path.join(self.output_dir, "vitals.csv")
+        # HAR 网络存档目录（--record / --replay）
+        self.har_dir = options.har_dir or os.path.join(self.output_dir, ".har")
+
+        # 启用的拦截配置及编译后的匹配规则（--block）
+        self.blocked_profiles = [name.strip() for name in options.block.split(",") if name.strip()]
+        self.compiled_block_profiles = [
+            (name, [re.compile(pattern, re.IGNORECASE) for pattern in BLOCK_PROFILES[name]["patterns"]],
+             set(BLOCK_PROFILES[name]["resource_types"]), BLOCK_PROFILES[name]["action"])
+            for name in self.blocked_profiles
+        ]
+        # 最慢任务的 Playwright trace（--trace-slowest）
+        self.slow_traces = (SlowTraceKeeper(options.trace_slowest, os.path.join(self.trace_dir, "playwright"))
+                            if options.trace_slowest > 0 else None)
+
+        # 截图清单实例，运行开始时加载
+        self.manifest = None
+        # 探测到的页面指纹 {(页面名, UA 变体): 指纹}，由主进程探测后传给分片子进程
+        self.page_fingerprints = {}
+        # --resume 时任务日志中已完成的任务 {(页面名, 设备名, View/Full): 状态}，由主进程读取后传给分片子进程
+        self.resumed_done = {}
+        # 已截图的布局签名 {(页面名, is_mobile, 缩放, 签名): 代表设备名}
+        self.layout_claims = {}
+        # 存档替身索引：{变体: {不含查询参数的 URL: HAR entry}}，首次未命中时才加载
+        self.stand_in_indexes = {}
+        # 拦截统计
+        self.block_stats = BlockStats(self)
+        # 共享响应缓存，由 run_devices 创建（--asset-cache-mb 0 时为 None）
+        self.asset_cache = None
+        # 本次运行的计划：选中的 {(页面名, 设备名)}（未使用 --budget 时为 None），以及开始新任务的截止时间
+        self.planned_jobs = None
+        self.budget_deadline = None
+
+
+def configure(options, devices=None, targets=None):
+    """校验运行选项并创建 RunContext：计算输出路径、推荐并发、拦截规则，设置设备和页面列表
+
+    CLI、库接口 capture() 和分片子进程都通过它初始化。devices / targets 为 None 时
+    按选项构建（设备按 device_type / all_devices 过滤，页面使用内置默认列表）。
+    选项无效时抛出 ValueError。
+    """
+    if options.crawl and options.url:
+        raise ValueError("--crawl 与 -url 不能同时使用")
+    if options.coordinator and options.worker:
+        raise ValueError("--coordinator 与 --worker 不能同时使用")
+    if options.plan_only and not options.budget:
+        raise ValueError("--plan-only 需要与 --budget 一起使用")
+    if options.budget is not None and options.budget <= 0:
+        raise ValueError("--budget 必须大于 0")
+    if options.watch and (options.coordinator or options.worker or options.record or options.replay):
+        raise ValueError("--watch 不支持 --coordinator / --worker / --record / --replay（需要直接访问本机开发服务器）")
+    if options.watch and options.watch_interval <= 0:
+        raise ValueError("--watch-interval 必须大于 0")
+    if options.vitals_runs < 1 or options.vitals_parallel < 1:
+        raise ValueError("--vitals-runs 和 --vitals-parallel 至少为 1")
+    if options.coordinator and (options.record or options.replay):
+        raise ValueError("--coordinator 不支持 --record / --replay（HAR 存档只在本机可用）")
+    if options.dedupe_layout and options.coordinator:
+        raise ValueError("--dedupe-layout 不支持 --coordinator（布局签名的认领只在单个进程内有效）")
+    if options.dedupe_layout and options.workers is not None and options.workers > 1:
+        raise ValueError("--dedupe-layout 不支持 --workers 大于 1（布局签名的认领只在单个进程内有效）")
+    if not options.coordinator_token:
+        options.coordinator_token = os.environ.get("SCREENSHOT_COORDINATOR_TOKEN") or None
+    if options.coordinator:
+        host, _ = parse_bind_address(options.coordinator)
+        if not is_loopback(host) and not options.coordinator_token:
+            raise ValueError(f"--coordinator 监听非回环地址 {host} 时必须设置 --coordinator-token"
+                             "（或环境变量 SCREENSHOT_COORDINATOR_TOKEN），工作节点使用相同的令牌")
+    blocked = [name.strip() for name in options.block.split(",") if name.strip()]
+    unknown_profiles = [name for name in blocked if name not in BLOCK_PROFILES]
+    if unknown_profiles:
+        raise ValueError(f"未知的拦截配置: {', '.join(unknown_profiles)}（可选: {', '.join(BLOCK_PROFILES)}）")
+
+    # lint 模式每次都重新检查，监听模式只截图源码改动影响到的页面，都不因截图已存在而跳过
+    if options.lint or options.watch:
+        options.skip_existing = False
+
+    # --parallel / --workers 未显式指定时，使用推荐配置或内置默认值
+    tuning = None if (options.no_tuning or options.benchmark) else load_tuning(TUNING_PATH)
+    if options.parallel is None:
+        options.parallel = (tuning or {}).get("parallel") or 8
+    if options.workers is None:
+        # 布局去重在单个进程内认领签名，不使用推荐配置的分片数
+        options.workers = 1 if options.dedupe_layout else (tuning or {}).get("workers") or 1
+
+    if devices is None:
+        devices = build_devices(options.device_type, options.all_devices)[0]
+    if targets is None:
+        targets = default_targets()
+    return RunContext(options, devices, targets, tuning)
+
+
+async def prepare_library_run(run):
+    """库接口 capture() 的运行准备（configure() 之后调用），返回截图清单（return_bytes 不写盘时为 None）
+
+    加载截图清单；跳过已有截图且启用指纹时，在线程池中探测页面指纹（阻塞的 HTTP 请求）。
+    """
+    if run.args.return_bytes:
+        return None
+    run.manifest = CaptureManifest(run.manifest_path)
+    if run.args.skip_existing and run.args.fingerprint:
+        loop = asyncio.get_event_loop()
+        fingerprints = await loop.run_in_executor(
+            None, probe_fingerprints, run, run.devices, run.targets, lambda message: None)
+        run.page_fingerprints.update(fingerprints)
+    return run.manifest
+
+
+# -----------------------------------------------------------------------------
+# 功能实现
+# -----------------------------------------------------------------------------
+
+def install_playwright():
+    """自动安装 Playwright"""
+    print("⚠️ 未检测到 Playwright，正在尝试自动安装...")
+    try:
+        subprocess.check_call([sys.executable, "-m", "pip", "install", "playwright"])
+        subprocess.check_call(["playwright", "install", "chromium"])
+        print("✅ Playwright 安装成功！")
+    except Exception as e:
+        print("❌ 自动安装 Playwright 失败，请手动执行：")
+        print("   pip install playwright")
+        print("   playwright install chromium")
+        print(f"   详细错误: {e}")
+        sys.exit(1)
+
+async def try_fill_search_input(page, text: str):
+    """尝试在页面中找到搜索框并填入指定文字，返回匹配信息或 None"""
+    selectors = [
+        'input[type="search"]',
+        'input[placeholder*="搜索"]',
+        'input[aria-label*="搜索"]',
+        'input[title*="搜索"]',
+        'input[placeholder*="Search" i]',
+        'input[aria-label*="Search" i]',
+        'input[name*="search" i]',
+        'input[id*="search" i]',
+        'input[class*="search" i]',
+        'header input[type="text"]',
+        'header input',
+        'nav input',
+    ]
+
+    for sel in selectors:
+        locator = page.locator(sel).first
+        try:
+            if await locator.count() <= 0:
+                continue
+            if not await locator.is_visible():
+                continue
+            await locator.scroll_into_view_if_needed(timeout=3000)
+            await locator.click(timeout=3000)
+            await locator.fill(text, timeout=3000)
+            value = await locator.input_value()
+            if value != text:
+                await locator.click(timeout=3000)
+                await locator.press("ControlOrMeta+A")
+                await locator.type(text, delay=30)
+                value = await locator.input_value()
+
+            if value != text:
+                continue
+
+            metrics = await locator.evaluate(
+                """(el) => {
+                    const cs = window.getComputedStyle(el);
+                    const r = el.getBoundingClientRect();
+                    return {
+                        fontSize: cs.fontSize,
+                        lineHeight: cs.lineHeight,
+                        padding: cs.padding,
+                        width: Math.round(r.width),
+                        height: Math.round(r.height),
+                    };
+                }"""
+            )
+            return {"selector": sel, "value": value, "metrics": metrics}
+        except Exception:
+            continue
+
+    return None
+
+class TimingHistory:
+    """记录每个 (页面, 设备) 任务的历史耗时，用于调度时估算任务时长
+
+    数据保存在截图目录下的 .timings.json，使用指数滑动平均平滑单次波动。
+    """
+
+    DEFAULT_SECONDS = 10.0
+    SMOOTHING = 0.3
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    @staticmethod
+    def key(page_name: str, device_name: str) -> str:
+        return f"{page_name}|{device_name}"
+
+    def expected(self, page_name: str, device_name: str) -> float:
+        """估算任务耗时：优先使用该任务的历史记录，其次使用同页面其他设备的平均值"""
+        exact = self.entries.get(self.key(page_name, device_name))
+        if exact is not None:
+            return exact
+        same_page = [v for k, v in self.entries.items() if k.split("|", 1)[0] == page_name]
+        if same_page:
+            return sum(same_page) / len(same_page)
+        return self.DEFAULT_SECONDS
+
+    def record(self, page_name: str, device_name: str, seconds: float):
+        key = self.key(page_name, device_name)
+        previous = self.entries.get(key)
+        if previous is None:
+            self.entries[key] = round(seconds, 3)
+        else:
+            self.entries[key] = round(previous + self.SMOOTHING * (seconds - previous), 3)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+class CaptureManifest:
+    """截图清单：记录每张截图拍摄时的页面指纹
+
+    键为 URL、设备尺寸、device_scale_factor 和截图类型（View/Full），
+    页面指纹变化时对应截图视为过期，需要重新截图。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    @staticmethod
+    def key(url: str, device_conf, kind: str) -> str:
+        scale = device_scale_factor(device_conf)
+        return f"{url}|{device_conf['width']}x{device_conf['height']}@{scale}x|{kind}"
+
+    def fingerprint(self, url: str, device_conf, kind: str):
+        entry = self.entries.get(self.key(url, device_conf, kind))
+        return entry["fingerprint"] if entry else None
+
+    def record(self, url: str, device_conf, kind: str, fingerprint, filepath: str):
+        self.entries[self.key(url, device_conf, kind)] = {
+            "fingerprint": fingerprint,
+            "file": os.path.relpath(filepath, os.path.dirname(self.path)),
+            "captured_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        }
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def device_scale_factor(device_conf) -> int:
+    """移动端使用 2 倍像素密度提升截图清晰度"""
+    return 2 if device_conf["is_mobile"] else 1
+
+
+def page_fingerprint(run, device_conf, target):
+    """本次运行探测到的页面指纹，探测失败或未启用时返回 None"""
+    return run.page_fingerprints.get((target["name"], archive_variant(device_conf)))
+
+
+def record_capture(run, manifest, page_name: str, device_name: str):
+    """截图成功后把该任务的截图写入清单（只在主进程调用）"""
+    device_conf = next((d for d in run.devices if d["name"] == device_name), None)
+    target = next((t for t in run.targets if t["name"] == page_name), None)
+    if device_conf is None or target is None:
+        return
+    fingerprint = page_fingerprint(run, device_conf, target)
+    viewport_filepath, full_filepath = screenshot_paths(run, device_conf, page_name)
+    manifest.record(target["url"], device_conf, "View", fingerprint, viewport_filepath)
+    if run.args.full_page:
+        manifest.record(target["url"], device_conf, "Full", fingerprint, full_filepath)
+
+
+class JobTimer:
+    """记录单个任务各阶段的耗时（秒）"""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.stages = {}
+        # 任务失败时的异常（自适应并发据此统计超时率）
+        self.error = None
+        self.trace_info = None
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.stages[name] = round(self.stages.get(name, 0) + time.time() - start, 4)
+
+    def total(self) -> float:
+        return time.time() - self.started_at
+
+
+class RunTrace:
+    """运行追踪：把每个任务的阶段耗时追加写入 JSON Lines 文件，并在结束时输出统计
+
+    统计维度：每个阶段、每个页面（任务总耗时）、每种设备类型（任务总耗时），
+    各给出 p50 / p95 / max。
+    """
+
+    def __init__(self, trace_dir: str):
+        os.makedirs(trace_dir, exist_ok=True)
+        self.path = os.path.join(trace_dir, f"run-{datetime.now().strftime('%Y%m%d-%H%M%S')}.jsonl")
+        self.file = open(self.path, "a", encoding="utf-8")
+        self.by_stage = {}
+        self.by_page = {}
+        self.by_device_type = {}
+
+    def write(self, status: str, page_name: str, device_name: str, extra):
+        record = {
+            "ts": datetime.now().isoformat(timespec="milliseconds"),
+            "status": status,
+            "page": page_name,
+            "device": device_name,
+        }
+        record.update(extra)
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.file.flush()
+
+        for stage, seconds in extra.get("stages", {}).items():
+            self.by_stage.setdefault(stage, []).append(seconds)
+        if "total" in extra:
+            self.by_page.setdefault(page_name, []).append(extra["total"])
+            self.by_device_type.setdefault(extra.get("device_type", "unknown"), []).append(extra["total"])
+
+    def close(self):
+        self.file.close()
+
+    @staticmethod
+    def _print_table(title: str, groups, limit=None):
+        if not groups:
+            return
+        print(f"   {title}:")
+        rows = sorted(groups.items(), key=lambda item: percentile(item[1], 0.95), reverse=True)
+        for name, values in rows[:limit]:
+            print(f"     {name:<28} n={len(values):<4} p50={percentile(values, 0.5):6.2f}s "
+                  f"p95={percentile(values, 0.95):6.2f}s max={max(values):6.2f}s")
+
+    def print_summary(self):
+        print(f"⏱️  阶段耗时统计（完整记录: {self.path}）")
+        self._print_table("按阶段", self.by_stage)
+        self._print_table("按页面（前 10）", self.by_page, limit=10)
+        self._print_table("按设备类型", self.by_device_type)
+
+
+class SlowTraceKeeper:
+    """只保留最慢 N 个任务的 Playwright trace
+
+    每个上下文开启 tracing，每个任务单独一个 chunk；任务结束时若耗时进入前 N，
+    保存该 chunk 并删除被挤出的旧文件，否则直接丢弃。分片模式下每个进程各自保留 N 个。
+    """
+
+    def __init__(self, limit: int, trace_dir: str):
+        self.limit = limit
+        self.trace_dir = trace_dir
+        self.kept = []  # 小顶堆 [(耗时, 路径)]
+
+    def qualifies(self, seconds: float) -> bool:
+        return len(self.kept) < self.limit or seconds > self.kept[0][0]
+
+    async def finish(self, context, seconds: float, page_name: str, device_name: str):
+        try:
+            if not self.qualifies(seconds):
+                await context.tracing.stop_chunk()
+                return
+            os.makedirs(self.trace_dir, exist_ok=True)
+            path = os.path.join(self.trace_dir, f"{seconds:07.2f}s_{page_name}_{device_name}_{os.getpid()}.zip")
+            await context.tracing.stop_chunk(path=path)
+            heapq.heappush(self.kept, (seconds, path))
+            if len(self.kept) > self.limit:
+                _, evicted = heapq.heappop(self.kept)
+                if os.path.exists(evicted):
+                    os.remove(evicted)
+        except Exception:
+            pass
+
+
+class ProgressReporter:
+    """汇总截图进度与结果统计
+
+    单进程模式下直接输出；分片模式下子进程只把事件放入队列，
+    由主进程的 ProgressReporter 统一输出进度和汇总信息。verbose 为 False 时不输出（库接口）。
+    """
+
+    def __init__(self, run, total: int, event_queue=None, timings=None, manifest=None, trace=None, journal=None,
+                 verbose=True):
+        self.run = run
+        self.total = total
+        self.verbose = verbose
+        self.event_queue = event_queue
+        self.timings = timings
+        self.manifest = manifest
+        self.trace = trace
+        self.journal = journal
+        self.counts = {"captured": 0, "skipped": 0, "deduped": 0, "linted": 0, "failed": 0}
+        self.retries = 0
+        # --lint 检查结果 [{"page", "device", "url", "device_type", "violations"}]
+        self.lint_results = []
+        # 布局去重分组 {页面名: {代表设备: {"signature": 签名, "stands_for": [设备...]}}}
+        self.layout_groups = {}
+        self.started_at = time.time()
+
+    @property
+    def finished(self) -> int:
+        return sum(self.counts.values())
+
+    def started(self, page_name: str, device_name: str):
+        """任务开始执行（写入任务日志，便于中断后识别执行到一半的任务）"""
+        if self.event_queue is not None:
+            self.event_queue.put(("started", page_name, device_name))
+            return
+        if self.journal is not None:
+            self.journal.mark(page_name, device_name, "running")
+
+    def report(self, status: str, page_name: str, device_name: str, detail: str = "", elapsed=None, extra=None,
+               outputs=None):
+        """记录一次 (页面, 设备) 的处理结果，status 为 captured / skipped / deduped / linted / failed / retrying
+
+        linted 表示 lint 检查通过、没有截图。
+        outputs 为截图结果 {"View" / "Full": 文件路径或图片字节}，只在本进程内使用，不经过分片事件队列。
+        """
+        if self.event_queue is not None:
+            self.event_queue.put(("result", status, page_name, device_name, detail, elapsed, extra))
+            return
+
+        if self.trace is not None and extra and "stages" in extra:
+            self.trace.write(status, page_name, device_name, extra)
+        if self.journal is not None:
+            extra = extra or {}
+            # 截图成功时按类型记录：本次写入的为 done，未过期而跳过的为 skipped
+            kinds = extra.get("kinds") if status == "captured" else None
+            for kind, state in (kinds or {None: JobJournal.STATES[status]}).items():
+                self.journal.mark(page_name, device_name, state, kind=kind,
+                                  error_class=extra.get("error_class"), error=extra.get("error"),
+                                  next_attempt_at=extra.get("retry_at"),
+                                  failed_attempt=status in ("failed", "retrying"))
+        if status == "retrying":
+            self.retries += 1
+            if self.verbose:
+                print(f"  🔁 {device_name} -> {page_name} {detail}", flush=True)
+            return
+        if status == "deduped":
+            group = self.layout_groups.setdefault(page_name, {}).setdefault(
+                extra["representative"], {"signature": extra["signature"], "stands_for": []})
+            group["stands_for"].append(device_name)
+
+        self.counts[status] += 1
+        if extra and "lint" in extra:
+            self.lint_results.append({"page": page_name, "device": device_name, "url": extra.get("url"),
+                                      "device_type": extra.get("device_type"), "violations": extra["lint"],
+                                      "counts": extra.get("lint_counts", {})})
+        if status == "captured" and elapsed is not None and self.timings is not None:
+            self.timings.record(page_name, device_name, elapsed)
+        if status == "captured" and self.manifest is not None:
+            record_capture(self.run, self.manifest, page_name, device_name)
+        icon = {"captured": "✅", "skipped": "⏭️ ", "deduped": "🔗", "linted": "🧹", "failed": "❌"}[status]
+        timing = f" ({elapsed:.1f}s)" if elapsed is not None else ""
+        if self.verbose:
+            print(f"  {icon} [{self.finished}/{self.total}] {device_name} -> {page_name} {detail}{timing}".rstrip(), flush=True)
+
+    def log(self, message: str):
+        """输出一行运行日志（分片模式下交给主进程输出）"""
+        if self.event_queue is not None:
+            self.event_queue.put(("log", message))
+            return
+        if self.verbose:
+            print(message, flush=True)
+
+    def print_summary(self):
+        elapsed = time.time() - self.started_at
+        rate = self.counts["captured"] / elapsed * 60 if elapsed > 0 else 0
+        linted = f"lint 通过 {self.counts['linted']}，" if self.counts["linted"] else ""
+        print("\n" + "="*50)
+        print(f"📊 结果汇总: 成功 {self.counts['captured']}，跳过 {self.counts['skipped']}，"
+              f"布局去重 {self.counts['deduped']}，{linted}失败 {self.counts['failed']}（共 {self.total} 项）"
+              f"{f'，重试 {self.retries} 次' if self.retries else ''}")
+        print(f"⏱️  总耗时: {elapsed:.1f}s，截图速度: {rate:.1f} 张/分钟")
+
+    def save_layout_groups(self):
+        """把布局去重分组写入每个页面目录下的 layout_groups.json"""
+        for page_name, groups in self.layout_groups.items():
+            path = os.path.join(self.run.output_dir, page_name, "layout_groups.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(groups, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+
+def screenshot_paths(run, device_conf, page_name):
+    """返回 (View 截图路径, Full Page 截图路径)"""
+    page_dir = os.path.join(run.output_dir, page_name)
+    size = f"{device_conf['width']}x{device_conf['height']}"
+    extension = "jpg" if run.args.format == "jpeg" else run.args.format
+    return (
+        os.path.join(page_dir, f"{device_conf['name']}_View_{size}.{extension}"),
+        os.path.join(page_dir, f"{device_conf['name']}_Full_{size}.{extension}"),
+    )
+
+
+def encode_image(data: bytes, image_format: str, quality: int, compress_level) -> bytes:
+    """把浏览器返回的 PNG 字节按输出格式编码"""
+    if image_format != "png" or compress_level is not None:
+        image = Image.open(io.BytesIO(data))
+        output = io.BytesIO()
+        if image_format == "png":
+            image.save(output, format="PNG", compress_level=compress_level)
+        elif image_format == "jpeg":
+            image.convert("RGB").save(output, format="JPEG", quality=quality, optimize=True)
+        else:
+            image.save(output, format="WEBP", quality=quality, method=4)
+        data = output.getvalue()
+    return data
+
+
+def encode_and_write(data: bytes, path: str, image_format: str, quality: int, compress_level, keep_bytes=False):
+    """编码截图并写入文件（在写盘线程池中执行），返回文件路径；keep_bytes 时不写盘，返回编码后的字节
+
+    先写临时文件再原子替换，中断时不会留下被断点续传误认为已完成的半截文件。
+    """
+    data = encode_image(data, image_format, quality, compress_level)
+    if keep_bytes:
+        return data
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return path
+
+
+class ImageWriter:
+    """截图编码写盘流水线
+
+    截图协程拿到原始 PNG 字节后交给线程池编码、写盘，立即开始下一次导航，
+    浏览器截图与磁盘 I/O 重叠进行；排队的截图达到 --writer-queue 上限时
+    submit 会等待，避免大尺寸 Full Page 截图堆积占满内存。
+    keep_bytes 为 True 时（库接口 return_bytes）只编码不写盘，Future 的结果为图片字节。
+    """
+
+    def __init__(self, threads: int, max_pending: int, options, keep_bytes: bool = False):
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="screenshot-writer")
+        self.slots = asyncio.Semaphore(max_pending)
+        self.tasks = set()
+        self.options = options
+        self.keep_bytes = keep_bytes
+
+    async def submit(self, data: bytes, path: str):
+        """提交一张截图，返回写盘完成的 Future（结果为文件路径或图片字节）"""
+        await self.slots.acquire()
+        loop = asyncio.get_event_loop()
+        options = self.options
+        future = loop.run_in_executor(self.executor, encode_and_write, data, path,
+                                      options.format, options.quality, options.compress_level, self.keep_bytes)
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+    def track(self, coro):
+        """跟踪等待写盘结果的收尾任务，drain 时统一等待"""
+        task = asyncio.ensure_future(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def drain(self):
+        while self.tasks:
+            await asyncio.gather(*list(self.tasks), return_exceptions=True)
+        self.executor.shutdown(wait=True)
+
+
+class JobQueue:
+    """(设备, 页面) 任务的全局调度队列
+
+    - 按历史耗时从长到短排序（最长任务优先），避免慢页面拖到最后才开始
+    - 每个工作协程优先领取当前设备的任务，其次是同一上下文池（只需调整视口）的任务
+    - 都没有时领取全局最长的任务，即可以帮忙处理其他设备的任务
+    - 有预算计划（--budget）时只包含计划中的任务 planned_jobs，预计无法在截止时间 deadline 前完成的任务不再开始
+    """
+
+    def __init__(self, devices, targets, timings, planned_jobs=None, deadline=None):
+        self.pending = []
+        self.overrun = []
+        self.deadline = deadline
+        for device_conf in devices:
+            for target in targets:
+                if planned_jobs is not None and (target["name"], device_conf["name"]) not in planned_jobs:
+                    continue
+                expected = timings.expected(target["name"], device_conf["name"])
+                self.pending.append({"device": device_conf, "target": target, "expected": expected})
+        self.pending.sort(key=lambda job: job["expected"], reverse=True)
+
+    def __len__(self):
+        return len(self.pending)
+
+    def next_job(self, current_device=None):
+        """领取下一个任务，没有可执行的任务（全部在等待重试或已领完）时返回 None"""
+        now = time.time()
+        if self.deadline is not None:
+            late = [job for job in self.pending if now + job["expected"] > self.deadline]
+            if late:
+                self.overrun.extend(late)
+                self.pending = [job for job in self.pending if now + job["expected"] <= self.deadline]
+        ready = [index for index, job in enumerate(self.pending) if job.get("not_before", 0) <= now]
+        if not ready:
+            return None
+        if current_device is not None:
+            for index in ready:
+                if self.pending[index]["device"]["name"] == current_device["name"]:
+                    return self.pending.pop(index)
+            current_key = context_pool_key(current_device)
+            for index in ready:
+                if context_pool_key(self.pending[index]["device"]) == current_key:
+                    return self.pending.pop(index)
+        return self.pending.pop(ready[0])
+
+    def retry(self, job, delay: float):
+        """失败的任务在 delay 秒后重新可领取"""
+        job["not_before"] = time.time() + delay
+        self.pending.append(job)
+
+    def retry_wait(self):
+        """距离最早一个等待重试的任务可领取还有多少秒，没有剩余任务时返回 None"""
+        if not self.pending:
+            return None
+        return max(0.0, min(job.get("not_before", 0) for job in self.pending) - time.time())
+
+
+def archive_variant(device_conf) -> str:
+    """存档按 UA 区分：移动端和桌面端服务端返回的 HTML 不同"""
+    return "mobile" if device_conf["is_mobile"] else "desktop"
+
+
+def har_path(run, page_name: str, variant: str) -> str:
+    return os.path.join(run.har_dir, f"{page_name}.{variant}.har")
+
+
+def required_archives(devices, targets):
+    """返回本次运行需要的 (页面, 变体, 代表设备) 列表，每个页面每种 UA 只录制一次"""
+    representatives = {}
+    for device_conf in devices:
+        representatives.setdefault(archive_variant(device_conf), device_conf)
+    return [
+        (target, variant, device_conf)
+        for target in targets
+        for variant, device_conf in representatives.items()
+    ]
+
+
+async def record_archive(run, browser, target, variant, device_conf, semaphore):
+    """打开页面并把所有网络响应录制到该页面的 HAR 存档"""
+    async with semaphore:
+        path = har_path(run, target["name"], variant)
+        context = await browser.new_context(
+            viewport={"width": device_conf["width"], "height": device_conf["height"]},
+            is_mobile=device_conf["is_mobile"],
+            has_touch=device_conf["has_touch"],
+            device_scale_factor=device_scale_factor(device_conf),
+            user_agent=MOBILE_USER_AGENT if device_conf["is_mobile"] else None
+        )
+        try:
+            # update=True：请求走真实网络，同时把响应写入 HAR（关闭 context 时落盘）
+            await context.route_from_har(path, update=True, update_content="embed", update_mode="full")
+            page = await context.new_page()
+            await page.goto(target["url"], wait_until="networkidle", timeout=60000)
+            await page.wait_for_timeout(800)
+            print(f"  💾 已录制: {target['name']} ({variant}) -> {os.path.relpath(path, run.output_dir)}")
+        except Exception as e:
+            print(f"  ❌ 录制失败: {target['name']} ({variant}): {e}")
+        finally:
+            await context.close()
+
+
+async def record_archives(run, devices, targets):
+    """录制模式：为每个 (页面, UA 变体) 录制一份 HAR 存档"""
+    os.makedirs(run.har_dir, exist_ok=True)
+    archives = required_archives(devices, targets)
+    print(f"🎙️  开始录制 HAR 存档: {len(archives)} 份 -> {run.har_dir}")
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        semaphore = asyncio.Semaphore(run.args.parallel)
+        await asyncio.gather(*[
+            record_archive(run, browser, target, variant, device_conf, semaphore)
+            for target, variant, device_conf in archives
+        ])
+        await browser.close()
+
+
+def check_archives(run, devices, targets) -> bool:
+    """回放模式：检查所需存档是否齐全"""
+    missing = [
+        har_path(run, target["name"], variant)
+        for target, variant, _ in required_archives(devices, targets)
+        if not os.path.exists(har_path(run, target["name"], variant))
+    ]
+    if missing:
+        print("❌ 回放模式缺少以下 HAR 存档，请先使用 --record 录制:")
+        for path in missing:
+            print(f"   {path}")
+        return False
+    return True
+
+
+def load_stand_in_index(run, variant: str):
+    """把同一 UA 变体的所有 HAR 存档按"去掉查询参数的 URL"建立索引"""
+    if variant in run.stand_in_indexes:
+        return run.stand_in_indexes[variant]
+
+    index = {}
+    for target in run.targets:
+        path = har_path(run, target["name"], variant)
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            har = json.load(f)
+        for entry in har.get("log", {}).get("entries", []):
+            if entry["request"]["method"] != "GET":
+                continue
+            index.setdefault(entry["request"]["url"].split("?", 1)[0], entry)
+    run.stand_in_indexes[variant] = index
+    return index
+
+
+async def route_from_archives(run, context, device_conf):
+    """离线回放：请求全部由存档响应，存档中不存在的请求由本地替身处理，永远不会访问网络
+
+    Playwright 按注册顺序的倒序匹配路由，因此先注册本地替身（兜底），
+    再注册各页面的 HAR 存档（not_found="fallback" 时未命中会落到替身）。
+    """
+    variant = archive_variant(device_conf)
+
+    async def serve_stand_in(route):
+        # 存档里没有完全相同的请求（例如不同视口宽度请求了不同尺寸的 _next/image），
+        # 使用同一路径的已存档响应代替；仍然找不到则返回 404，不发出真实请求
+        entry = None
+        if route.request.method == "GET":
+            entry = load_stand_in_index(run, variant).get(route.request.url.split("?", 1)[0])
+        if entry is None:
+            await route.fulfill(status=404, body="")
+            return
+
+        content = entry["response"].get("content", {})
+        body = content.get("text", "")
+        body = base64.b64decode(body) if content.get("encoding") == "base64" else body.encode("utf-8")
+        headers = {h["name"]: h["value"] for h in entry["response"].get("headers", [])
+                   if h["name"].lower() not in ("content-length", "content-encoding", "transfer-encoding")}
+        await route.fulfill(status=entry["response"]["status"], headers=headers, body=body)
+
+    await context.route("**/*", serve_stand_in)
+    for target in run.targets:
+        path = har_path(run, target["name"], variant)
+        if os.path.exists(path):
+            await context.route_from_har(path, not_found="fallback")
+
+
+def fingerprint_document(body: bytes, etag=None) -> str:
+    """根据 HTML 文档计算页面指纹
+
+    由 Next.js 构建 ID（_next/static/<buildId>/ 路径）和文档内容组成：
+    有 ETag 时直接使用 ETag，否则使用去掉 nonce 等易变属性后的文档哈希。
+    """
+    text = body.decode("utf-8", errors="replace")
+    build_match = (re.search(r'/_next/static/([\w-]{6,})/_(?:buildManifest|ssgManifest)', text)
+                   or re.search(r'"buildId"\s*:\s*"([\w-]+)"', text))
+    build_id = build_match.group(1) if build_match else "-"
+    if etag:
+        content = f"etag:{etag}"
+    else:
+        content = hashlib.sha1(re.sub(r'\snonce="[^"]*"', "", text).encode("utf-8")).hexdigest()
+    return hashlib.sha1(f"{build_id}|{content}".encode("utf-8")).hexdigest()[:16]
+
+
+def probe_fingerprint(run, url: str, variant: str):
+    """不启动浏览器，直接请求 HTML 文档计算指纹；失败时返回 None"""
+    if run.args.replay or run.args.record:
+        # 离线模式：指纹来自存档中的文档，存档重新录制后才会变化
+        for target in run.targets:
+            if target["url"] != url:
+                continue
+            path = har_path(run, target["name"], variant)
+            if not os.path.exists(path):
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                entries = json.load(f).get("log", {}).get("entries", [])
+            for entry in entries:
+                if entry["request"]["url"] == url:
+                    content = entry["response"].get("content", {})
+                    text = content.get("text", "")
+                    body = base64.b64decode(text) if content.get("encoding") == "base64" else text.encode("utf-8")
+                    return fingerprint_document(body)
+        return None
+
+    user_agent = MOBILE_USER_AGENT if variant == "mobile" else DESKTOP_PROBE_USER_AGENT
+    request = urllib.request.Request(url, headers={"User-Agent": user_agent})
+    try:
+        with urllib.request.urlopen(request, timeout=15) as response:
+            return fingerprint_document(response.read(), response.headers.get("ETag"))
+    except Exception:
+        return None
+
+
+def probe_fingerprints(run, devices, targets, log=print):
+    """并发探测所有 (页面, UA 变体) 的指纹"""
+    variants = sorted({archive_variant(device_conf) for device_conf in devices})
+    probes = [(target, variant) for target in targets for variant in variants]
+    log(f"🔍 探测页面指纹: {len(probes)} 个请求")
+    with ThreadPoolExecutor(max_workers=max(1, min(16, len(probes)))) as executor:
+        results = executor.map(lambda probe: probe_fingerprint(run, probe[0]["url"], probe[1]), probes)
+        fingerprints = {}
+        for (target, variant), fingerprint in zip(probes, results):
+            if fingerprint is None:
+                log(f"  ⚠️  指纹探测失败，退回文件存在检查: {target['name']} ({variant})")
+            fingerprints[(target["name"], variant)] = fingerprint
+    return fingerprints
+
+
+def discover_targets(run):
+    """按 --crawl 爬取站点（见 crawl.py），返回要截图的页面列表"""
+    return crawl_targets(run.args.crawl, APP_DIR, run.crawl_path, per_template=run.args.crawl_per_template,
+                         max_pages=run.args.crawl_max_pages, concurrency=run.args.crawl_concurrency,
+                         user_agent=DESKTOP_PROBE_USER_AGENT)
+
+
+# 请求拦截配置：这些请求不会出现在截图中，却会拖慢页面就绪
+# action: stub 返回空响应（脚本返回空 JS，避免页面报错），abort 直接中止请求
+_VIDEO_PATTERN = r"\.(mp4|webm|mov|flv|m3u8|mpd|m4s)(\?|$)"
+_AUDIO_PATTERN = r"\.(mp3|m4a|aac|ogg|oga|wav|flac)(\?|$)"
+BLOCK_PROFILES = {
+    "analytics": {
+        "patterns": [r"(^|\.)clarity\.ms/", r"/_vercel/(insights|speed-insights)/", r"vercel-insights\.com/",
+                     r"google-analytics\.com/", r"googletagmanager\.com/", r"hm\.baidu\.com/"],
+        "resource_types": [],
+        "action": "stub",
+    },
+    "video": {"patterns": [_VIDEO_PATTERN], "resource_types": [], "action": "abort"},
+    "audio": {"patterns": [_AUDIO_PATTERN], "resource_types": [], "action": "abort"},
+    "media": {"patterns": [_VIDEO_PATTERN, _AUDIO_PATTERN], "resource_types": ["media"], "action": "abort"},
+    # 注意：iconfont 会影响图标渲染，只在不关心图标时使用
+    "iconfont": {"patterns": [r"/fonts/iconfont\.(js|woff2?|ttf)", r"at\.alicdn\.com/t/"],
+                 "resource_types": [], "action": "stub"},
+}
+
+
+def match_block_profile(run, url: str, resource_type: str):
+    """返回命中的 (配置名, 处理方式)，未命中返回 None"""
+    for name, patterns, resource_types, action in run.compiled_block_profiles:
+        if resource_type in resource_types or any(p.search(url) for p in patterns):
+            return name, action
+    return None
+
+
+class BlockStats:
+    """统计各拦截配置避免的请求数和字节数
+
+    被拦截的请求没有响应体，字节数按磁盘上 HAR 存档（--record 录制）中记录的响应大小估算，
+    不会为统计访问被拦截的统计脚本和音视频地址。只有指定 --block-size-probe 时，存档中没有的
+    URL 才对每个唯一 URL 发送一次 HEAD 请求（在线程池中进行，不阻塞截图）；无法获知大小的请求单独计数。
+    """
+
+    def __init__(self, run):
+        self.run = run
+        self.profiles = {}
+        self.sizes = {}
+        self._lookups = []
+
+    def record(self, profile: str, url: str, variant: str):
+        stats = self.profiles.setdefault(profile, {"requests": 0, "urls": {}})
+        stats["requests"] += 1
+        stats["urls"][url] = stats["urls"].get(url, 0) + 1
+        if url in self.sizes:
+            return
+        self.sizes[url] = None
+        entry = load_stand_in_index(self.run, variant).get(url.split("?", 1)[0])
+        if entry is not None:
+            self.sizes[url] = entry["response"].get("content", {}).get("size")
+            return
+        if not self.run.args.block_size_probe or self.run.args.replay or self.run.args.record:
+            return
+        loop = asyncio.get_event_loop()
+        self._lookups.append(loop.run_in_executor(None, self._head_content_length, url))
+
+    def _head_content_length(self, url: str):
+        try:
+            request = urllib.request.Request(url, method="HEAD")
+            with urllib.request.urlopen(request, timeout=10) as response:
+                length = response.headers.get("Content-Length")
+                self.sizes[url] = int(length) if length else None
+        except Exception:
+            pass
+
+    async def wait_for_sizes(self, timeout: float = 10):
+        if self._lookups:
+            await asyncio.wait(self._lookups, timeout=timeout)
+            self._lookups = []
+
+    def as_dict(self):
+        """汇总为可跨进程传递的字典 {配置名: {"requests": n, "bytes": n, "unknown": n}}"""
+        summary = {}
+        for profile, stats in self.profiles.items():
+            known = unknown = 0
+            for url, count in stats["urls"].items():
+                size = self.sizes.get(url)
+                if size is None:
+                    unknown += count
+                else:
+                    known += size * count
+            summary[profile] = {"requests": stats["requests"], "bytes": known, "unknown": unknown}
+        return summary
+
+
+def merge_block_stats(total, summary):
+    for profile, stats in summary.items():
+        merged = total.setdefault(profile, {"requests": 0, "bytes": 0, "unknown": 0})
+        for key in merged:
+            merged[key] += stats[key]
+
+
+def print_block_stats(summary):
+    if not summary:
+        return
+    print("🚫 请求拦截统计:")
+    for profile, stats in sorted(summary.items()):
+        unknown = f"，{stats['unknown']} 个大小未知" if stats["unknown"] else ""
+        print(f"   {profile}: {stats['requests']} 个请求，约 {stats['bytes'] / 1024 / 1024:.1f} MB{unknown}")
+    if any(stats["unknown"] for stats in summary.values()):
+        print("   （大小按 HAR 存档估算，存档中没有的请求计为大小未知；可先 --record 录制存档，或使用 --block-size-probe 发送 HEAD 请求获取）")
+
+
+async def install_block_profiles(run, context, device_conf):
+    """注册统一的拦截路由（最后注册，优先级最高），未命中的请求交给后续路由处理"""
+    variant = archive_variant(device_conf)
+
+    async def block_request(route):
+        request = route.request
+        matched = match_block_profile(run, request.url, request.resource_type)
+        if matched is None:
+            await route.fallback()
+            return
+        profile, action = matched
+        run.block_stats.record(profile, request.url, variant)
+        if action == "abort":
+            await route.abort("blockedbyclient")
+        elif request.resource_type == "script":
+            await route.fulfill(status=200, content_type="application/javascript", body="")
+        else:
+            await route.fulfill(status=204, body="")
+
+    await context.route("**/*", block_request)
+
+
+# 上下文在同一池内切换设备时只调整视口，screen 尺寸需要跟随视口变化（增强横屏模拟效果）
+SCREEN_FOLLOWS_VIEWPORT_JS = """
+(() => {
+    for (const [prop, source] of [['width', 'innerWidth'], ['height', 'innerHeight'],
+                                   ['availWidth', 'innerWidth'], ['availHeight', 'innerHeight']]) {
+        Object.defineProperty(window.screen, prop, { get: () => window[source], configurable: true });
+    }
+})();
+"""
+
+
+def context_pool_key(device_conf):
+    """上下文池的键：这些属性只能在创建上下文时指定，视口尺寸则可以原地调整"""
+    return (
+        device_conf["is_mobile"],
+        device_conf["has_touch"],
+        device_scale_factor(device_conf),
+        MOBILE_USER_AGENT if device_conf["is_mobile"] else None,
+    )
+
+
+async def open_device_context(run, browser, device_conf):
+    """为设备创建浏览器上下文和页面，返回 (context, page)"""
+    # 创建上下文，配置视口
+    # 显式设置 screen 尺寸，增强横屏模拟效果
+    context = await browser.new_context(
+        viewport={"width": device_conf["width"], "height": device_conf["height"]},
+        screen={"width": device_conf["width"], "height": device_conf["height"]},
+        is_mobile=device_conf["is_mobile"],
+        has_touch=device_conf["has_touch"],
+        device_scale_factor=device_scale_factor(device_conf), # 提升移动端截图清晰度
+        user_agent=MOBILE_USER_AGENT if device_conf["is_mobile"] else None,
+        **(DETERMINISTIC_CONTEXT_OPTIONS if run.args.deterministic else {})
+    )
+    await context.add_init_script(SCREEN_FOLLOWS_VIEWPORT_JS)
+    if run.args.deterministic:
+        await context.add_init_script(deterministic_init_script())
+    if run.slow_traces is not None:
+        # 每个任务单独一个 trace chunk，只保存最慢的 N 个
+        await context.tracing.start(screenshots=True, snapshots=True)
+
+    if run.args.record or run.args.replay:
+        # 离线回放：所有请求由 HAR 存档响应，缓存策略不再需要
+        await route_from_archives(run, context, device_conf)
+        if run.blocked_profiles:
+            await install_block_profiles(run, context, device_conf)
+        page = await context.new_page()
+        return context, page
+
+    # 共享响应缓存（先注册，优先级低于拦截配置）：路由会关闭上下文自身的 HTTP 缓存，
+    # 脚本、样式、图片、字体和 HTML 文档改由所有上下文共用的缓存响应
+    if run.asset_cache is not None:
+        await install_asset_cache(run, context, device_conf)
+
+    if run.blocked_profiles:
+        await install_block_profiles(run, context, device_conf)
+
+    page = await context.new_page()
+    return context, page
+
+
+def open_asset_cache(run):
+    """按选项创建共享响应缓存，已禁用时返回 None"""
+    if run.args.asset_cache_mb <= 0:
+        return None
+    return AssetCache(run.args.asset_cache_mb * 1024 * 1024, disk_dir=run.args.asset_cache_dir,
+                      disk_bytes=run.args.asset_cache_disk_mb * 1024 * 1024)
+
+
+def cache_stats_summary(run):
+    """本进程共享响应缓存的统计，未启用时为空"""
+    return run.asset_cache.as_dict() if run.asset_cache is not None else {}
+
+
+async def install_asset_cache(run, context, device_conf):
+    """注册共享响应缓存路由：命中时直接响应，未命中时下载、按缓存策略保存后响应"""
+    cache = run.asset_cache
+    variant = archive_variant(device_conf)
+
+    async def serve_cached(route):
+        request = route.request
+        resource_type = request.resource_type
+        if (request.method != "GET" or resource_type not in CACHEABLE_RESOURCE_TYPES
+                or "range" in request.headers):
+            await route.fallback()
+            return
+        url = urldefrag(request.url)[0]
+        entry = await cache.lookup(url, variant, resource_type)
+        if entry is not None:
+            await route.fulfill(status=entry.status, headers=entry.headers, body=entry.body)
+            return
+        with cache.fetching(url, variant, resource_type):
+            try:
+                response = await route.fetch()
+                body = await response.body()
+            except Exception:
+                # 请求失败或页面已关闭：按网络错误结束请求，由页面就绪检测和重试处理
+                with contextlib.suppress(Exception):
+                    await route.abort("failed")
+                return
+            headers = cache.store(url, variant, resource_type, response.status, response.headers, body,
+                                  run.args.cache_max_age)
+        await route.fulfill(status=response.status, headers=headers, body=body)
+
+    await context.route("**/*", serve_cached)
+
+
+async def close_device_context(context, page):
+    """关闭页面和上下文，忽略关闭过程中的异常"""
+    # 清理路由拦截，避免关闭 context 时超时
+    try:
+        await context.unroute("**/*")
+    except Exception:
+        pass
+
+    # 关闭页面和上下文
+    try:
+        if page:
+            await page.close()
+    except Exception:
+        pass
+
+    try:
+        await context.close()
+    except Exception:
+        pass
+
+
+# 页面就绪检测脚本：依次等待以下信号，全部满足即返回，不再固定等待
+# 1. hydrated: DeviceProvider 完成客户端设备检测（<html data-hydrated> / device-hydrated 事件）；
+#    没有该标记的站点（旧版本部署或第三方页面）以 header 渲染完成或页面 load 作为替代信号
+# 2. fonts:    document.fonts.ready（public/fonts/subsets 中的子集字体加载完成）
+# 3. images:   首屏可见图片解码完成
+# 4. stable:   连续若干帧布局（页面高度、header/main 位置）不再变化
+# 返回最后满足的信号（即结束等待的条件）；超时则返回仍未满足的信号
+PAGE_READY_JS = """async ({ timeout, stableFrames, until }) => {
+    const start = performance.now();
+    const doneAt = {};
+    const frame = () => new Promise((resolve) => requestAnimationFrame(() => resolve()));
+    const mark = (name) => (value) => { doneAt[name] = Math.round(performance.now() - start); return value; };
+
+    const hydrated = async () => {
+        const root = document.documentElement;
+        if (root.dataset.hydrated === 'true') return;
+        const event = new Promise((resolve) => window.addEventListener('device-hydrated', resolve, { once: true }));
+        const fallback = (async () => {
+            while (!document.querySelector('header, [role="banner"], .MuiAppBar-root')) {
+                if (document.readyState === 'complete' && !window.next && !document.getElementById('__next')) return;
+                await frame();
+            }
+        })();
+        await Promise.race([event, fallback]);
+    };
+    const inViewport = (img) => {
+        const r = img.getBoundingClientRect();
+        return r.width > 0 && r.height > 0 && r.top < window.innerHeight && r.bottom > 0;
+    };
+    const images = () => Promise.all(
+        Array.from(document.images).filter(inViewport).map((img) => img.decode().catch(() => null)));
+    const stable = async () => {
+        const snapshot = () => {
+            const parts = [document.documentElement.scrollHeight];
+            for (const el of document.querySelectorAll('header, main, footer')) {
+                const r = el.getBoundingClientRect();
+                parts.push(Math.round(r.top), Math.round(r.height));
+            }
+            return parts.join(',');
+        };
+        let last = null;
+        let count = 0;
+        while (count < stableFrames) {
+            await frame();
+            const current = snapshot();
+            count = current === last ? count + 1 : 0;
+            last = current;
+        }
+    };
+
+    const allSteps = [['hydrated', hydrated], ['fonts', () => document.fonts.ready], ['images', images], ['stable', stable]];
+    const last = until ? allSteps.findIndex(([name]) => name === until) : -1;
+    const steps = last >= 0 ? allSteps.slice(0, last + 1) : allSteps;
+    const run = (async () => {
+        for (const [name, step] of steps) await step().then(mark(name));
+        return null;
+    })();
+    const timer = new Promise((resolve) => setTimeout(() => resolve('timeout'), timeout));
+    const outcome = await Promise.race([run, timer]);
+    const pending = steps.map(([name]) => name).filter((name) => !(name in doneAt));
+    return {
+        ended_by: outcome === 'timeout' ? 'timeout' : 'stable',
+        last_signal: steps.map(([name]) => name).filter((name) => name in doneAt).pop() || null,
+        pending,
+        elapsed: Math.round(performance.now() - start),
+        signals: doneAt,
+    };
+}"""
+
+
+async def navigate(run, page, url: str, timer):
+    """导航到页面：networkidle 模式等待网络空闲，信号模式在 DOM 就绪后返回"""
+    with timer.stage("goto"):
+        if run.args.readiness == "networkidle":
+            # 旧方式：延长超时时间到 60秒，避免高清大图加载超时
+            await page.goto(url, wait_until="networkidle", timeout=60000)
+        else:
+            # 信号模式：DOM 就绪后即开始检测，不等待分析脚本、媒体等与截图无关的请求
+            await page.goto(url, wait_until="domcontentloaded", timeout=60000)
+
+
+async def wait_hydrated(run, page):
+    """只等待客户端水合完成（布局去重的探测阶段），超时后照常继续"""
+    await page.evaluate(PAGE_READY_JS, {"timeout": run.args.ready_timeout, "stableFrames": 0, "until": "hydrated"})
+
+
+async def wait_page_ready(run, page, timer) -> str:
+    """导航之后等待页面就绪，返回结束等待的条件描述（用于进度输出）"""
+    if run.args.readiness == "networkidle":
+        # 等待客户端设备检测完成（DeviceProvider 的 useEffect 执行）
+        # 这是必要的，因为设备检测逻辑在客户端执行：
+        # 1. 服务端返回初始 HTML（基于 headers 检测）
+        # 2. 客户端 JavaScript 执行，DeviceProvider 的 useEffect 运行
+        # 3. 客户端检测设备类型，如果与服务端不一致会更新状态
+        # 4. ResponsiveLayout 根据更新后的状态重新渲染对应的 header
+        # 类似于 Chrome DevTools 切换设备后需要刷新才能看到正确内容的情况
+        # 这里我们等待足够的时间让客户端检测和渲染完成
+        with timer.stage("ready"):
+            await page.wait_for_timeout(800)
+
+            # 可选：等待 header 元素可见，确保渲染完成
+            # 如果页面有 header，等待它出现；如果没有或找不到，继续执行
+            try:
+                await page.wait_for_selector('header, [role="banner"], .MuiAppBar-root',
+                                              state='visible', timeout=2000)
+            except Exception:
+                pass  # header 可能不存在或结构不同，不影响截图
+        return "networkidle"
+
+    with timer.stage("ready"):
+        result = await page.evaluate(PAGE_READY_JS, {"timeout": run.args.ready_timeout, "stableFrames": 3, "until": None})
+    if result["ended_by"] == "timeout":
+        return f"timeout {result['elapsed']}ms, pending: {','.join(result['pending'])}"
+    return f"{result['last_signal']} {result['elapsed']}ms"
+
+
+# 布局签名采集脚本：记录主要元素在视口中的相对位置和宽度（按 2.5% 量化），
+# 忽略高度（文本换行造成的细微差异），因此同一断点下宽度相近的设备签名相同
+LAYOUT_SIGNATURE_JS = """() => {
+    const vw = window.innerWidth;
+    const q = (value) => Math.round(value / vw * 40);
+    const selector = 'header, nav, main, footer, aside, h1, h2, h3, img, button, '
+        + '[class*="MuiGrid"], [class*="MuiCard-root"], [class*="MuiContainer-root"], [class*="MuiTabs-root"]';
+    const items = [];
+    for (const el of document.querySelectorAll(selector)) {
+        const r = el.getBoundingClientRect();
+        if (r.width === 0 || r.height === 0) continue;
+        const style = window.getComputedStyle(el);
+        if (style.visibility === 'hidden' || style.display === 'none') continue;
+        items.push([el.tagName, q(r.left), q(r.width), style.display, style.flexDirection]);
+        if (items.length >= 200) break;
+    }
+    return {
+        overflow: document.documentElement.scrollWidth > vw,
+        landscape: window.innerWidth > window.innerHeight,
+        items,
+    };
+}"""
+
+
+async def compute_layout_signature(page) -> str:
+    """计算当前页面的紧凑布局签名（主要元素位置的哈希）"""
+    layout = await page.evaluate(LAYOUT_SIGNATURE_JS)
+    return hashlib.sha1(json.dumps(layout, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+# 响应式 lint 检查脚本：一次 evaluate 完成全部规则，返回 [{rule, selector, detail, rect}]
+# - overflow:        页面横向溢出，报告最外层的溢出元素（fixed 元素和被祖先裁剪的元素不计）
+# - clipped-text:    MUI 卡片中文字被裁剪（有意的 ellipsis / line-clamp 截断除外）
+# - header-overlap:  header / AppBar 中的可见元素互相重叠
+# - tap-target:      移动设备上点击区域小于 tapSize（段落中的行内链接除外）
+# 命中的元素加上 data-responsive-lint 属性，截图前用于高亮
+LINT_JS = """({ isMobile, tapSize, limit }) => {
+    const vw = document.documentElement.clientWidth;
+    const violations = [];
+    const counts = {};
+
+    const cssPath = (el) => {
+        const parts = [];
+        for (let node = el; node && node.nodeType === 1 && parts.length < 5; node = node.parentElement) {
+            if (node.id) {
+                parts.unshift('#' + CSS.escape(node.id));
+                break;
+            }
+            let part = node.tagName.toLowerCase();
+            // 跳过 emotion 生成的 css-xxxx 类名，它们随构建变化
+            const classes = Array.from(node.classList).filter((c) => !c.startsWith('css-')).slice(0, 2);
+            if (classes.length) part += '.' + classes.map((c) => CSS.escape(c)).join('.');
+            const parent = node.parentElement;
+            if (parent) {
+                const siblings = Array.from(parent.children).filter((c) => c.tagName === node.tagName);
+                if (siblings.length > 1) part += `:nth-of-type(${siblings.indexOf(node) + 1})`;
+            }
+            parts.unshift(part);
+            if (node === document.body) break;
+        }
+        return parts.join(' > ');
+    };
+    const add = (rule, el, detail) => {
+        counts[rule] = (counts[rule] || 0) + 1;
+        if (counts[rule] > limit) return;
+        const r = el.getBoundingClientRect();
+        el.setAttribute('data-responsive-lint', rule);
+        violations.push({
+            rule, selector: cssPath(el), detail,
+            rect: { x: Math.round(r.left), y: Math.round(r.top + window.scrollY), width: Math.round(r.width), height: Math.round(r.height) },
+        });
+    };
+    const hidden = (style) => style.visibility === 'hidden' || style.opacity === '0';
+
+    // 1. 横向溢出
+    const docWidth = document.documentElement.scrollWidth;
+    if (docWidth > vw + 1) {
+        const outside = (r) => r.right > vw + 1 || r.left < -1;
+        const exempt = (el) => {
+            for (let node = el; node && node !== document.body; node = node.parentElement) {
+                const style = window.getComputedStyle(node);
+                if (style.position === 'fixed') return true;
+                if (node !== el && style.overflowX !== 'visible') return true;
+            }
+            return false;
+        };
+        let found = 0;
+        for (const el of document.body.querySelectorAll('*')) {
+            const r = el.getBoundingClientRect();
+            if (r.width === 0 || r.height === 0 || !outside(r)) continue;
+            const parent = el.parentElement;
+            if (parent && parent !== document.body && outside(parent.getBoundingClientRect())) continue;
+            if (exempt(el)) continue;
+            add('overflow', el, `超出视口 ${Math.round(Math.max(r.right - vw, -r.left))}px（页面宽 ${docWidth}px，视口 ${vw}px）`);
+            found++;
+        }
+        if (!found) add('overflow', document.documentElement, `页面宽 ${docWidth}px 超出视口 ${vw}px`);
+    }
+
+    // 2. MUI 卡片中被裁剪的文字
+    const textSelector = 'h1, h2, h3, h4, h5, h6, p, span, a, button, [class*="MuiTypography"]';
+    for (const card of document.querySelectorAll('[class*="MuiCard-root"]')) {
+        const cardRect = card.getBoundingClientRect();
+        if (cardRect.width === 0 || cardRect.height === 0) continue;
+        const cardClips = window.getComputedStyle(card).overflow !== 'visible';
+        const flagged = [];
+        for (const el of card.querySelectorAll(textSelector)) {
+            if (!el.textContent.trim() || flagged.some((f) => f.contains(el))) continue;
+            const style = window.getComputedStyle(el);
+            if (hidden(style) || style.textOverflow === 'ellipsis') continue;
+            if (style.webkitLineClamp && style.webkitLineClamp !== 'none') continue;
+            const r = el.getBoundingClientRect();
+            if (r.width === 0 || r.height === 0) continue;
+            const clippedX = el.clientWidth > 0 && el.scrollWidth > el.clientWidth + 1 && style.overflowX !== 'visible';
+            const clippedY = el.clientHeight > 0 && el.scrollHeight > el.clientHeight + 1 && style.overflowY !== 'visible';
+            const escapes = cardClips && (r.right > cardRect.right + 1 || r.bottom > cardRect.bottom + 1 || r.left < cardRect.left - 1);
+            if (clippedX || clippedY || escapes) {
+                flagged.push(el);
+                add('clipped-text', el, `文字被裁剪: "${el.textContent.trim().slice(0, 40)}"`
+                    + (escapes ? '（超出卡片）' : `（内容 ${el.scrollWidth}×${el.scrollHeight}px，可见 ${el.clientWidth}×${el.clientHeight}px）`));
+            }
+        }
+    }
+
+    // 3. 头部元素重叠
+    const headers = Array.from(document.querySelectorAll('header, [class*="MuiAppBar-root"]'));
+    const itemSelector = 'a, button, img, svg, input, h1, h2, h3, h4, h5, h6, [class*="MuiTypography"], '
+        + '[class*="MuiChip-root"], [class*="MuiAvatar-root"]';
+    for (const header of headers) {
+        if (headers.some((other) => other !== header && other.contains(header))) continue;
+        const items = [];
+        for (const el of header.querySelectorAll(itemSelector)) {
+            if (items.some((item) => item.el.contains(el))) continue;
+            const r = el.getBoundingClientRect();
+            if (r.width < 1 || r.height < 1 || hidden(window.getComputedStyle(el))) continue;
+            items.push({ el, r });
+            if (items.length >= 80) break;
+        }
+        for (let i = 0; i < items.length; i++) {
+            for (let j = i + 1; j < items.length; j++) {
+                const a = items[i].r, b = items[j].r;
+                const w = Math.min(a.right, b.right) - Math.max(a.left, b.left);
+                const h = Math.min(a.bottom, b.bottom) - Math.max(a.top, b.top);
+                if (w > 2 && h > 2 && !items[i].el.contains(items[j].el) && !items[j].el.contains(items[i].el)) {
+                    add('header-overlap', items[j].el, `与 ${cssPath(items[i].el)} 重叠 ${Math.round(w)}×${Math.round(h)}px`);
+                }
+            }
+        }
+    }
+
+    // 4. 移动设备上过小的点击区域
+    if (isMobile) {
+        const tapSelector = 'a[href], button, input:not([type="hidden"]), select, textarea, [role="button"], [role="tab"], [role="link"]';
+        for (const el of document.querySelectorAll(tapSelector)) {
+            if (el.disabled || (el.parentElement && el.parentElement.closest(tapSelector))) continue;
+            const r = el.getBoundingClientRect();
+            if (r.width === 0 || r.height === 0) continue;
+            const style = window.getComputedStyle(el);
+            if (hidden(style) || style.pointerEvents === 'none') continue;
+            // 段落中的行内链接不受点击区域尺寸要求约束
+            if (style.display === 'inline' && el.parentElement && el.parentElement.textContent.trim() !== el.textContent.trim()) continue;
+            if (r.width < tapSize || r.height < tapSize) {
+                add('tap-target', el, `点击区域 ${Math.round(r.width)}×${Math.round(r.height)}px，小于 ${tapSize}px`);
+            }
+        }
+    }
+
+    return { violations, counts };
+}"""
+
+LINT_HIGHLIGHT_CSS = "[data-responsive-lint] { outline: 2px solid #ff1744 !important; outline-offset: -1px !important; }"
+
+# 每条规则在每个 (页面, 设备) 上最多报告的元素数
+LINT_LIMIT_PER_RULE = 20
+
+
+async def run_lint(run, page, device_conf):
+    """运行全部 lint 规则，返回 (违规列表, 各规则命中数)"""
+    result = await page.evaluate(LINT_JS, {"isMobile": device_conf["is_mobile"], "tapSize": run.args.lint_tap_size,
+                                           "limit": LINT_LIMIT_PER_RULE})
+    return result["violations"], result["counts"]
+
+
+def write_lint_report(run, reporter) -> bool:
+    """写出 lint_report.json 并输出按规则汇总的结果，没有违规时返回 True"""
+    results = sorted(reporter.lint_results, key=lambda r: (r["page"], r["device"]))
+    by_rule = {}
+    for result in results:
+        for rule, count in result["counts"].items():
+            by_rule[rule] = by_rule.get(rule, 0) + count
+    failed = [result for result in results if result["violations"]]
+    report = {
+        "generated_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "tap_size": run.args.lint_tap_size,
+        "passed": not failed,
+        "summary": {"checked": len(results), "with_violations": len(failed), "by_rule": by_rule},
+        "results": failed,
+    }
+    os.makedirs(run.output_dir, exist_ok=True)
+    with open(run.lint_report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print("\n" + "="*50)
+    print(f"🧹 lint 检查: {len(results)} 项，有违规 {len(failed)} 项（已截图并高亮违规元素）")
+    for rule, count in sorted(by_rule.items(), key=lambda item: -item[1]):
+        print(f"   {rule:<16} {count} 处")
+    for result in failed[:10]:
+        first = result["violations"][0]
+        print(f"   - {result['page']} / {result['device']}: [{first['rule']}] {first['selector']} {first['detail']}")
+    if len(failed) > 10:
+        print(f"   ... 另有 {len(failed) - 10} 项")
+    print(f"📝 lint 报告: {run.lint_report_path}")
+    return not failed
+
+
+# 分块全长截图：滚动到指定位置后处理吸顶和固定定位元素，返回实际滚动位置和当前页面高度
+# - sticky 元素改为 relative（不偏移），固定在文档中的原始位置，不会在每一块中重复出现；
+#   sticky 元素在文档流中占位，改为 relative 不影响布局
+# - fixed 元素（顶栏、悬浮按钮等）只在第一块中显示，之后隐藏（visibility 不影响布局）
+# 每块都重新扫描，滚动后才出现的吸顶 / 固定元素同样处理
+TILE_PREPARE_JS = """async ({ y, first }) => {
+    if (!document.getElementById('__screenshot_tile_style')) {
+        const style = document.createElement('style');
+        style.id = '__screenshot_tile_style';
+        style.textContent = '[data-screenshot-unstick] { position: relative !important; top: auto !important; bottom: auto !important; }'
+            + '[data-screenshot-hide] { visibility: hidden !important; }'
+            + 'html, body { scroll-behavior: auto !important; }';
+        document.head.appendChild(style);
+    }
+    window.scrollTo(0, y);
+    const frame = () => new Promise((resolve) => requestAnimationFrame(() => resolve()));
+    await frame();
+    await frame();
+    for (const el of document.querySelectorAll('body *')) {
+        const position = window.getComputedStyle(el).position;
+        if (position === 'sticky') el.setAttribute('data-screenshot-unstick', '');
+        else if (position === 'fixed' && !first) el.setAttribute('data-screenshot-hide', '');
+    }
+    await frame();
+    return {
+        scrollY: window.scrollY,
+        viewport: window.innerHeight,
+        height: Math.max(document.documentElement.scrollHeight, document.body ? document.body.scrollHeight : 0),
+    };
+}"""
+
+TILE_RESTORE_JS = """() => {
+    const style = document.getElementById('__screenshot_tile_style');
+    if (style) style.remove();
+    for (const el of document.querySelectorAll('[data-screenshot-unstick], [data-screenshot-hide]')) {
+        el.removeAttribute('data-screenshot-unstick');
+        el.removeAttribute('data-screenshot-hide');
+    }
+    window.scrollTo(0, 0);
+}"""
+
+PAGE_HEIGHT_JS = "() => Math.max(document.documentElement.scrollHeight, document.body ? document.body.scrollHeight : 0)"
+
+# 分块截图的最大页面高度（CSS 像素），防止无限滚动页面一直加载下去
+TILED_MAX_HEIGHT = 50000
+
+
+async def use_tiled_full_page(run, page, device_conf) -> bool:
+    """按 --full-page-mode 决定本次 Full Page 是否分块截取"""
+    if run.args.full_page_mode != "auto":
+        return run.args.full_page_mode == "tiled"
+    if not HAS_PIL:
+        return False
+    height = await page.evaluate(PAGE_HEIGHT_JS)
+    return height * device_scale_factor(device_conf) > run.args.tile_threshold
+
+
+async def capture_tiled_full_page(run, page, device_conf, path: str, writer):
+    """按视口高度滚动分块截图，在写盘线程池中逐块拼接，返回拼接完成的 Future（结果为文件路径或图片字节）
+
+    同一时刻最多一块在拼接、一块在截取，峰值内存与页面长度无关。
+    整个分块截图只占用 ImageWriter 的一个排队名额。
+    """
+    loop = asyncio.get_event_loop()
+    scale = device_scale_factor(device_conf)
+    stitcher = TileStitcher(path, run.args.format, run.args.quality, run.args.compress_level, keep_bytes=writer.keep_bytes)
+    await writer.slots.acquire()
+    pending = None
+    try:
+        y = 0
+        while True:
+            info = await page.evaluate(TILE_PREPARE_JS, {"y": y, "first": y == 0})
+            total = min(info["height"], TILED_MAX_HEIGHT)
+            data = await take_screenshot(page, full_page=False, deterministic=run.args.deterministic)
+            # 最后一块滚动位置被浏览器限制在底部时，跳过与上一块重叠的部分
+            skip = max(0, y - info["scrollY"])
+            take = min(info["viewport"] - skip, total - y)
+            if pending is not None:
+                await pending
+            pending = loop.run_in_executor(writer.executor, stitcher.add_tile, data,
+                                           round(skip * scale), round(take * scale))
+            y += take
+            if take <= 0 or y >= total:
+                break
+        await pending
+        pending = None
+    except BaseException:
+        if pending is not None:
+            await asyncio.gather(pending, return_exceptions=True)
+        stitcher.abort()
+        writer.slots.release()
+        raise
+    finally:
+        with contextlib.suppress(Exception):
+            await page.evaluate(TILE_RESTORE_JS)
+
+    future = loop.run_in_executor(writer.executor, stitcher.finish)
+    future.add_done_callback(lambda _: writer.slots.release())
+    return future
+
+
+async def process_job(run, page, device_conf, target, reporter, writer, timer):
+    """在已打开的设备页面上处理单个 (设备, 页面) 截图任务"""
+    url = target["url"]
+    page_name = target["name"]
+
+    # 创建页面专属文件夹
+    page_dir = os.path.join(run.output_dir, page_name)
+    if not os.path.exists(page_dir):
+        os.makedirs(page_dir, exist_ok=True)
+
+    # 检查需要截图的文件
+    viewport_filepath, full_filepath = screenshot_paths(run, device_conf, page_name)
+    viewport_filename = os.path.basename(viewport_filepath)
+
+    # 断点续传 / 增量截图：任务日志中已完成，或文件已存在且页面指纹未变化时跳过
+    skip_viewport = is_kind_done(run, device_conf, target, "View", viewport_filepath)
+    skip_full = run.args.full_page and is_kind_done(run, device_conf, target, "Full", full_filepath)
+
+    # 构建跳过提示信息
+    skip_info = []
+    if skip_viewport:
+        skip_info.append("View")
+    if skip_full:
+        skip_info.append("Full")
+    skip_msg = f" [跳过: {', '.join(skip_info)}]" if skip_info else ""
+
+    if run.slow_traces is not None:
+        try:
+            await page.context.tracing.start_chunk(title=f"{page_name} @ {device_conf['name']}")
+        except Exception:
+            pass
+
+    trace_info = {"url": url, "device_type": device_conf.get("device_type", "unknown")}
+    claim_key = None
+    try:
+        await navigate(run, page, url, timer)
+
+        # 布局去重：水合完成后先算布局签名，由其他设备代表的不必等待字体、图片和布局稳定；
+        # lint 模式每个设备都要检查，页面完全就绪、检查之后再去重
+        if run.args.dedupe_layout and not run.args.lint:
+            with timer.stage("layout"):
+                await wait_hydrated(run, page)
+            claim_key = await claim_layout(run, page, device_conf, page_name, reporter, timer, trace_info)
+            if claim_key is None:
+                return
+
+        ready = await wait_page_ready(run, page, timer)
+        trace_info["ready"] = ready
+
+        # lint 模式：先做 DOM 检查，没有违规就不截图
+        lint_msg = ""
+        if run.args.lint:
+            with timer.stage("lint"):
+                violations, counts = await run_lint(run, page, device_conf)
+            trace_info.update(lint=violations, lint_counts=counts)
+            if not violations:
+                trace_info.update(stages=timer.stages, total=round(timer.total(), 4))
+                reporter.report("linted", page_name, device_conf["name"], "(lint 通过)",
+                                elapsed=timer.total(), extra=trace_info)
+                return
+            await page.add_style_tag(content=LINT_HIGHLIGHT_CSS)
+            lint_msg = f" [lint: {', '.join(f'{rule}×{count}' for rule, count in sorted(counts.items()))}]"
+
+        if run.args.dedupe_layout and run.args.lint:
+            claim_key = await claim_layout(run, page, device_conf, page_name, reporter, timer, trace_info)
+            if claim_key is None:
+                return
+
+        # 截图只取原始 PNG 字节，编码和写盘交给 ImageWriter，不阻塞下一次导航
+        writes = {}
+
+        # 1. 截取首屏 (Viewport) - 能直观看到横竖屏区别
+        if not skip_viewport:
+            with timer.stage("screenshot_view"):
+                data = await take_screenshot(page, full_page=False, deterministic=run.args.deterministic)
+            writes["View"] = await writer.submit(data, viewport_filepath)
+
+        # 2. 截取全长图 (Full Page) - 仅在启用 --full-page 时执行
+        # 超长页面分块截取并流式拼接，避免整页位图超出 Chromium 纹理尺寸限制或占满内存
+        if run.args.full_page and not skip_full:
+            with timer.stage("screenshot_full"):
+                if await use_tiled_full_page(run, page, device_conf):
+                    trace_info["full_page_mode"] = "tiled"
+                    writes["Full"] = await capture_tiled_full_page(run, page, device_conf, full_filepath, writer)
+                    data = None
+                else:
+                    data = await take_screenshot(page, full_page=True, deterministic=run.args.deterministic)
+            if data is not None:
+                writes["Full"] = await writer.submit(data, full_filepath)
+
+        trace_info["kinds"] = {kind: "done" if kind in writes else "skipped"
+                               for kind in (["View", "Full"] if run.args.full_page else ["View"])}
+
+        # 获取实际视口宽度用于验证
+        actual_width = await page.evaluate("window.innerWidth")
+        writer.track(finish_capture(
+            run, writes, reporter, page_name, device_conf["name"],
+            f"[w:{actual_width}px] [ready: {ready}] -> {page_name}/{viewport_filename}{skip_msg}{lint_msg}",
+            timer, trace_info, claim_key))
+
+    except Exception as e:
+        # 失败由 job_worker 分类后决定重试还是记为失败，不中断整个流程
+        timer.error = e
+        timer.trace_info = trace_info
+        release_layout_claim(run, claim_key, device_conf["name"])
+    finally:
+        if run.slow_traces is not None:
+            await run.slow_traces.finish(page.context, timer.total(), page_name, device_conf["name"])
+
+
+async def claim_layout(run, page, device_conf, page_name: str, reporter, timer, trace_info):
+    """计算布局签名并认领：返回认领键（本设备负责截图）；同一页面上已有签名相同的设备时报告去重并返回 None"""
+    with timer.stage("layout"):
+        signature = await compute_layout_signature(page)
+    claim_key = (page_name, device_conf["is_mobile"], device_scale_factor(device_conf), signature)
+    representative = run.layout_claims.setdefault(claim_key, device_conf["name"])
+    if representative == device_conf["name"]:
+        return claim_key
+    trace_info.update(stages=timer.stages, total=round(timer.total(), 4))
+    reporter.report("deduped", page_name, device_conf["name"], f"(布局同 {representative})",
+                    extra=dict(trace_info, representative=representative, signature=signature))
+    return None
+
+
+def release_layout_claim(run, claim_key, device_name: str):
+    """代表设备截图失败时释放签名，让同组的下一个设备自己截图"""
+    if claim_key is not None and run.layout_claims.get(claim_key) == device_name:
+        del run.layout_claims[claim_key]
+
+
+async def finish_capture(run, writes, reporter, page_name: str, device_name: str, detail: str, timer, trace_info,
+                         claim_key):
+    """等待截图写盘完成后再报告结果，写盘失败视为截图失败
+
+    writes 为 {"View" / "Full": 写盘 Future}，结果（文件路径或图片字节）随报告一起交给 reporter。
+    """
+    # 浏览器侧耗时（用于调度估算）不包含后台写盘时间
+    elapsed = timer.total()
+    try:
+        with timer.stage("write"):
+            outputs = dict(zip(writes, await asyncio.gather(*writes.values())))
+    except Exception as e:
+        release_layout_claim(run, claim_key, device_name)
+        trace_info.update(stages=timer.stages, total=round(timer.total(), 4),
+                          error=error_summary(e), error_class="write")
+        reporter.report("failed", page_name, device_name, f"写入失败: {e}", extra=trace_info)
+        return
+    trace_info.update(stages=timer.stages, total=round(elapsed, 4))
+    reporter.report("captured", page_name, device_name, detail, elapsed=elapsed, extra=trace_info, outputs=outputs)
+
+
+def is_capture_fresh(run, device_conf, target, kind: str, filepath: str) -> bool:
+    """截图是否可以跳过：文件存在，且（启用指纹时）清单中的指纹与本次探测结果一致
+
+    探测失败（指纹为 None）时退回到只检查文件是否存在。
+    """
+    if not run.args.skip_existing or not os.path.exists(filepath):
+        return False
+    fingerprint = page_fingerprint(run, device_conf, target)
+    if not run.args.fingerprint or fingerprint is None or run.manifest is None:
+        return True
+    return run.manifest.fingerprint(target["url"], device_conf, kind) == fingerprint
+
+
+def is_kind_done(run, device_conf, target, kind: str, filepath: str) -> bool:
+    """View / Full 截图是否不需要重新截取：任务日志中已完成且文件还在（布局去重的没有自己的截图），或未过期"""
+    resumed = run.resumed_done.get((target["name"], device_conf["name"], kind))
+    if resumed == "deduped" or (resumed is not None and os.path.exists(filepath)):
+        return True
+    return is_capture_fresh(run, device_conf, target, kind, filepath)
+
+
+def is_job_done(run, device_conf, target) -> bool:
+    """该任务需要的截图是否都已完成或未过期"""
+    viewport_filepath, full_filepath = screenshot_paths(run, device_conf, target["name"])
+    if not is_kind_done(run, device_conf, target, "View", viewport_filepath):
+        return False
+    return not run.args.full_page or is_kind_done(run, device_conf, target, "Full", full_filepath)
+
+
+class ContextPool:
+    """按 (is_mobile, has_touch, device_scale_factor, user_agent) 复用浏览器上下文
+
+    同一池内的设备只需 page.set_viewport_size 调整尺寸：之后的 goto 会让
+    DeviceProvider 按新的 innerWidth 重新检测设备类型，ResponsiveLayout 随之渲染
+    对应的 Header；JS/CSS 等静态资源已在上下文中加载过，不必为每个设备从冷启动开始。
+
+    浏览器崩溃（连接断开）后，下一次借出时重新启动浏览器，丢弃旧的空闲上下文。
+    """
+
+    def __init__(self, run, browser, launch=None, log=print):
+        self.run = run
+        self.browser = browser
+        self.launch = launch
+        self.log = log
+        self.idle = {}
+        self.created = 0
+        self.restarts = 0
+        self.restart_lock = asyncio.Lock()
+
+    async def ensure_browser(self):
+        if self.browser.is_connected() or self.launch is None:
+            return
+        async with self.restart_lock:
+            if self.browser.is_connected():
+                return
+            self.idle = {}
+            self.browser = await self.launch()
+            self.restarts += 1
+            self.log(f"  💥 浏览器已断开，重新启动（第 {self.restarts} 次）")
+
+    async def acquire(self, device_conf):
+        """借出一个适合该设备的 (context, page)，并把视口调整为设备尺寸"""
+        await self.ensure_browser()
+        idle = self.idle.get(context_pool_key(device_conf))
+        if idle:
+            context, page = idle.pop()
+            await page.set_viewport_size({"width": device_conf["width"], "height": device_conf["height"]})
+        else:
+            context, page = await open_device_context(self.run, self.browser, device_conf)
+            self.created += 1
+        return context, page
+
+    def release(self, device_conf, context, page):
+        """归还上下文；页面已关闭（例如渲染进程崩溃）的上下文直接丢弃"""
+        if page.is_closed():
+            asyncio.ensure_future(close_device_context(context, page))
+            return
+        self.idle.setdefault(context_pool_key(device_conf), []).append((context, page))
+
+    def discard(self, context, page):
+        """关闭上下文而不归还（并发调低后释放页面占用的内存）"""
+        asyncio.ensure_future(close_device_context(context, page))
+
+    async def close(self):
+        for leases in self.idle.values():
+            for context, page in leases:
+                await close_device_context(context, page)
+        self.idle = {}
+
+
+def handle_job_failure(run, job, timer, job_queue, reporter):
+    """按失败分类决定重试：可重试的错误按指数退避重新入队，超过 --retries 次才记为失败"""
+    error = timer.error
+    error_class = classify_error(error)
+    job["attempts"] = job.get("attempts", 0) + 1
+    page_name, device_name = job["target"]["name"], job["device"]["name"]
+    extra = dict(timer.trace_info or {"url": job["target"]["url"]})
+    extra.update(stages=timer.stages, total=round(timer.total(), 4), error=error_summary(error),
+                 error_class=error_class, attempt=job["attempts"])
+
+    if error_class in RETRYABLE_ERRORS and job["attempts"] <= run.args.retries:
+        delay = run.args.retry_backoff * 2 ** (job["attempts"] - 1) * random.uniform(0.8, 1.2)
+        job_queue.retry(job, delay)
+        extra["retry_at"] = datetime.fromtimestamp(time.time() + delay).strftime('%Y-%m-%d %H:%M:%S')
+        reporter.report("retrying", page_name, device_name,
+                        f"[{error_class}] {delay:.1f}s 后第 {job['attempts']} 次重试: {extra['error']}", extra=extra)
+    else:
+        reporter.report("failed", page_name, device_name, f"失败 [{error_class}]: {extra['error']}", extra=extra)
+
+
+async def job_worker(run, pool, job_queue, reporter, writer, controller):
+    """工作协程：不断从全局队列领取任务，从上下文池借用对应的上下文
+
+    工作协程数量等于并发上限，实际同时进行的任务数由 controller 控制。
+    """
+    context = page = None
+    current_device = None
+    try:
+        while True:
+            if controller.saturated() and context is not None:
+                # 并发被调低，等待期间关闭本协程的上下文，释放页面占用的内存
+                pool.discard(context, page)
+                context = page = current_device = None
+            await controller.acquire()
+            job = job_queue.next_job(current_device)
+            if job is None:
+                await controller.release()
+                wait = job_queue.retry_wait()
+                if wait is None:
+                    break
+                # 剩余任务都在等待重试退避
+                await asyncio.sleep(min(wait, 1.0))
+                continue
+            device_conf, target = job["device"], job["target"]
+            timer = JobTimer()
+            reporter.started(target["name"], device_conf["name"])
+
+            try:
+                with timer.stage("context"):
+                    if context is not None and page.is_closed():
+                        # 上一个任务中页面或浏览器崩溃，丢弃该上下文
+                        pool.release(current_device, context, page)
+                        context = page = current_device = None
+                    if current_device is None or context_pool_key(device_conf) != context_pool_key(current_device):
+                        if context is not None:
+                            pool.release(current_device, context, page)
+                            context = page = None
+                        context, page = await pool.acquire(device_conf)
+                    elif device_conf["name"] != current_device["name"]:
+                        # 同一池内切换设备：原地调整视口
+                        await page.set_viewport_size({"width": device_conf["width"], "height": device_conf["height"]})
+                current_device = device_conf
+
+                await process_job(run, page, device_conf, target, reporter, writer, timer)
+            except Exception as e:
+                # 获取上下文失败（通常是浏览器崩溃）
+                timer.error = e
+                if context is not None:
+                    pool.release(current_device, context, page)
+                context = page = current_device = None
+            finally:
+                await controller.release(timer)
+            if timer.error is not None:
+                handle_job_failure(run, job, timer, job_queue, reporter)
+    finally:
+        if context is not None:
+            pool.release(current_device, context, page)
+
+
+def process_memory_limit_mb(run):
+    """自适应并发的内存上限（MB）：分片模式下每个进程只分到总上限的一部分"""
+    limit = run.args.memory_limit
+    if limit is None:
+        memory_mb = total_memory_mb()
+        limit = int(memory_mb * 0.75) if memory_mb else None
+    if limit is not None and run.args.workers > 1:
+        limit //= run.args.workers
+    return limit
+
+
+def drop_done_jobs(run, job_queue, reporter):
+    """已完成的任务（断点续传）直接报告为跳过，不占用工作协程"""
+    remaining = []
+    for job in job_queue.pending:
+        device_conf, target = job["device"], job["target"]
+        if is_job_done(run, device_conf, target):
+            viewport_filename = os.path.basename(screenshot_paths(run, device_conf, target["name"])[0])
+            reporter.report("skipped", target["name"], device_conf["name"], f"(未变化 {viewport_filename})")
+        else:
+            remaining.append(job)
+    job_queue.pending = remaining
+
+
+async def run_devices(run, devices, reporter, timings, job_queue=None, feed=None):
+    """启动一个浏览器，按 (设备, 页面) 任务粒度并发处理给定的设备列表
+
+    工作节点（--worker）传入远程任务队列 job_queue，以及在后台向协调节点领取任务的 feed(controller)。
+    """
+    remote = job_queue is not None
+    if not remote:
+        job_queue = JobQueue(devices, run.targets, timings, run.planned_jobs, run.budget_deadline)
+        drop_done_jobs(run, job_queue, reporter)
+        if not job_queue:
+            return
+
+    if run.asset_cache is None and not (run.args.record or run.args.replay):
+        run.asset_cache = open_asset_cache(run)
+
+    async with async_playwright() as p:
+        async def launch():
+            return await p.chromium.launch(headless=True)
+
+        browser = await launch()
+
+        # 每个工作协程同一时刻只借用一个上下文；协程数量为并发上限，实际并发由控制器调整
+        if run.args.no_adaptive:
+            controller = ConcurrencyController(run.args.parallel, run.args.parallel, run.args.parallel, None, reporter.log)
+        else:
+            controller = ConcurrencyController(run.args.parallel, run.args.min_parallel,
+                                               run.args.max_parallel or run.args.parallel * 2,
+                                               process_memory_limit_mb(run), reporter.log)
+        pool = ContextPool(run, browser, launch, reporter.log)
+        writer = ImageWriter(run.args.writer_threads, run.args.writer_queue, run.args, keep_bytes=run.args.return_bytes)
+        workers = [
+            job_worker(run, pool, job_queue, reporter, writer, controller)
+            for _ in range(controller.maximum if remote else min(controller.maximum, len(job_queue)))
+        ]
+        monitor = None if run.args.no_adaptive else asyncio.ensure_future(controller.monitor(run.args.adapt_interval))
+        feeder = None if feed is None else asyncio.ensure_future(feed(controller))
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            if monitor is not None:
+                monitor.cancel()
+            if feeder is not None:
+                feeder.cancel()
+            await writer.drain()
+            await pool.close()
+            await run.block_stats.wait_for_sizes()
+            if run.asset_cache is not None:
+                run.asset_cache.close()
+        if not run.args.no_adaptive:
+            reporter.log(controller.summary())
+        if reporter.event_queue is None:
+            reporter.log(f"♻️  上下文池: {len(devices)} 个设备共创建 {pool.created} 个浏览器上下文")
+
+        await pool.browser.close()
+
+
+def shard_devices(run, devices, workers: int, timings):
+    """按历史耗时把设备切分成 workers 份（最长处理时间优先分配给当前负载最小的分片）"""
+    costs = {
+        device["name"]: sum(timings.expected(target["name"], device["name"]) for target in run.targets
+                            if run.planned_jobs is None or (target["name"], device["name"]) in run.planned_jobs)
+        for device in devices
+    }
+    if run.planned_jobs is not None:
+        # 没有计划任务的设备不分配给分片
+        devices = [device for device in devices if costs[device["name"]] > 0]
+    shards = [[] for _ in range(workers)]
+    loads = [0.0] * workers
+    for device in sorted(devices, key=lambda d: costs[d["name"]], reverse=True):
+        index = loads.index(min(loads))
+        shards[index].append(device)
+        loads[index] += costs[device["name"]]
+    return [shard for shard in shards if shard]
+
+
+def _shard_worker_main(shard_index, options, devices, targets, event_queue, fingerprints, resumed_done, plan):
+    """分片子进程入口：独立的 Playwright 驱动和浏览器，结果通过队列回传主进程"""
+    # 选项和页面列表以主进程为准（--crawl 时由主进程爬取生成）
+    run = configure(options, devices=devices, targets=targets)
+    # 清单和任务日志由主进程统一写入，子进程只读
+    run.manifest = CaptureManifest(run.manifest_path)
+    run.page_fingerprints.update(fingerprints)
+    run.resumed_done.update(resumed_done)
+    run.planned_jobs, run.budget_deadline = plan
+    reporter = ProgressReporter(run, len(devices) * len(run.targets), event_queue=event_queue)
+    try:
+        asyncio.run(run_devices(run, devices, reporter, TimingHistory(run.timings_path)))
+    finally:
+        event_queue.put(("done", shard_index, run.block_stats.as_dict(), cache_stats_summary(run)))
+
+
+def run_sharded(run, reporter, timings):
+    """把设备分给多个子进程并行截图，主进程汇总所有子进程的进度，返回合并后的 (拦截统计, 缓存统计)"""
+    shards = shard_devices(run, run.devices, run.args.workers, timings)
+    # 使用 spawn 启动子进程，避免 fork 继承 Playwright 驱动线程等状态
+    mp_context = multiprocessing.get_context("spawn")
+    event_queue = mp_context.Queue()
+
+    processes = []
+    for shard_index, shard in enumerate(shards):
+        process = mp_context.Process(target=_shard_worker_main,
+                                     args=(shard_index, run.args, shard, list(run.targets), event_queue,
+                                           dict(run.page_fingerprints), dict(run.resumed_done),
+                                           (run.planned_jobs, run.budget_deadline)),
+                                     name=f"screenshot-shard-{shard_index}")
+        process.start()
+        processes.append(process)
+        print(f"🧩 分片 {shard_index + 1}/{len(shards)}: {len(shard)} 个设备 (pid {process.pid})")
+
+    block_summary = {}
+    cache_summary = {}
+    pending = set(range(len(shards)))
+    while pending:
+        try:
+            event = event_queue.get(timeout=1)
+        except queue.Empty:
+            # 子进程异常退出（例如浏览器崩溃导致进程被杀）时不会发送 done 事件
+            for shard_index in list(pending):
+                process = processes[shard_index]
+                if not process.is_alive() and process.exitcode not in (0, None):
+                    print(f"❌ 分片 {shard_index + 1} 异常退出 (exit code {process.exitcode})")
+                    pending.discard(shard_index)
+            continue
+
+        if event[0] == "done":
+            pending.discard(event[1])
+            merge_block_stats(block_summary, event[2])
+            merge_cache_stats(cache_summary, event[3])
+        elif event[0] == "log":
+            print(event[1], flush=True)
+        elif event[0] == "started":
+            reporter.started(event[1], event[2])
+        else:
+            _, status, page_name, device_name, detail, elapsed, extra = event
+            reporter.report(status, page_name, device_name, detail, elapsed=elapsed, extra=extra)
+
+    for process in processes:
+        process.join()
+    return block_summary, cache_summary
+
+
+# -----------------------------------------------------------------------------
+# 监听模式（--watch）
+# -----------------------------------------------------------------------------
+#
+# 与 next dev 一起长期运行：浏览器、上下文池、并发控制器和共享响应缓存在两批截图之间一直保留。
+# 每隔 --watch-interval 秒检查 app 目录下源码的修改时间，改动稳定一个检查周期后（编辑器保存、
+# 格式化可能连续写入多个文件），按导入关系图找出受影响的路由模板，只重新截图匹配这些模板的页面。
+# 开发服务器的 JS / CSS 地址不随内容变化，每批截图前清空共享响应缓存，缓存只在同一批的设备之间共享。
+
+# tsconfig.json 中 "@/*" 别名指向的目录（frontend/）
+WATCH_ALIAS_ROOT = os.path.normpath(os.path.join(SCRIPTS_DIR, ".."))
+
+
+async def wait_for_source_changes(run, app_dir: str, sources):
+    """轮询源码修改时间，直到有改动且保持稳定，返回 (改动的文件, 最新的修改时间表)
+
+    扫描目录树在线程池中进行，大项目中不会阻塞事件循环上正在进行的截图。
+    """
+    loop = asyncio.get_event_loop()
+    while True:
+        await asyncio.sleep(run.args.watch_interval)
+        current = await loop.run_in_executor(None, scan_sources, app_dir)
+        if current == sources:
+            continue
+        while True:
+            await asyncio.sleep(run.args.watch_interval)
+            latest = await loop.run_in_executor(None, scan_sources, app_dir)
+            if latest == current:
+                break
+            current = latest
+        changed = {path for path in set(sources) | set(current) if sources.get(path) != current.get(path)}
+        return changed, current
+
+
+def affected_targets(run, graphs, changed_paths, app_dir: str, route_dirs):
+    """按导入关系图找出受改动影响的页面，返回 (页面列表, 路由模板列表)
+
+    graphs 为改动前后的导入关系图（文件被删除或导入关系变化时两者都需要查找）。
+    匹配不到路由模板的页面只在根布局受影响时重新截图。
+    """
+    affected = set()
+    for graph in graphs:
+        affected.update(graph.affected(changed_paths))
+    templates = sorted(template for template, route_dir in route_dirs.items()
+                       if any(entry in affected for entry in route_entry_files(route_dir, app_dir)))
+    root_layouts = [os.path.join(app_dir, name + ext) for name in LAYOUT_ENTRY_NAMES for ext in SOURCE_EXTENSIONS]
+    root_affected = any(entry in affected for entry in root_layouts)
+
+    known = list(route_dirs)
+    targets = []
+    for target in run.targets:
+        template = match_route_template(urlparse(target["url"]).path, known)
+        if template in templates or (template not in route_dirs and root_affected):
+            targets.append(target)
+    return targets, templates
+
+
+async def warm_context_pool(run, pool):
+    """为每种上下文配置预先创建一个浏览器上下文，第一次改动时不必冷启动"""
+    warmed = {}
+    for device_conf in run.devices:
+        key = context_pool_key(device_conf)
+        if key not in warmed:
+            warmed[key] = (device_conf,) + await pool.acquire(device_conf)
+    for device_conf, context, page in warmed.values():
+        pool.release(device_conf, context, page)
+    return len(warmed)
+
+
+async def run_watch_batch(run, pool, controller, timings, targets):
+    """用常驻的上下文池重新截图受影响页面的全部设备，返回本批的 ProgressReporter"""
+    if run.asset_cache is not None:
+        run.asset_cache.clear()
+    run.layout_claims.clear()
+    job_queue = JobQueue(run.devices, targets, timings, run.planned_jobs, run.budget_deadline)
+    reporter = ProgressReporter(run, len(job_queue), timings=timings)
+    # 写盘线程池在 drain 时关闭，每批使用新的流水线
+    writer = ImageWriter(run.args.writer_threads, run.args.writer_queue, run.args)
+    workers = [
+        job_worker(run, pool, job_queue, reporter, writer, controller)
+        for _ in range(min(controller.maximum, len(job_queue)))
+    ]
+    try:
+        await asyncio.gather(*workers)
+    finally:
+        await writer.drain()
+        timings.save()
+    return reporter
+
+
+def short_source_path(path: str, app_dir: str) -> str:
+    return os.path.relpath(path, app_dir).replace(os.sep, "/")
+
+
+async def watch_loop(run):
+    app_dir = os.path.normpath(APP_DIR)
+    sources = scan_sources(app_dir)
+    graph = ImportGraph(app_dir, WATCH_ALIAS_ROOT, sources)
+    route_dirs = route_directories(app_dir)
+    timings = TimingHistory(run.timings_path)
+    # 只用内存层：开发服务器的资源地址不带内容哈希，不能跨运行保留
+    run.asset_cache = AssetCache(run.args.asset_cache_mb * 1024 * 1024) if run.args.asset_cache_mb > 0 else None
+
+    async with async_playwright() as p:
+        async def launch():
+            return await p.chromium.launch(headless=True)
+
+        pool = ContextPool(run, await launch(), launch)
+        if run.args.no_adaptive:
+            controller = ConcurrencyController(run.args.parallel, run.args.parallel, run.args.parallel, None, print)
+        else:
+            controller = ConcurrencyController(run.args.parallel, run.args.min_parallel,
+                                               run.args.max_parallel or run.args.parallel * 2,
+                                               process_memory_limit_mb(run), print)
+        monitor = None if run.args.no_adaptive else asyncio.ensure_future(controller.monitor(run.args.adapt_interval))
+        try:
+            warmed = await warm_context_pool(run, pool)
+            print(f"🔥 已预热 {warmed} 个浏览器上下文")
+            print(f"👀 监听 {app_dir}（{len(sources)} 个源码文件，{len(route_dirs)} 个路由模板），"
+                  f"每 {run.args.watch_interval:g}s 检查一次，Ctrl-C 退出")
+            while True:
+                changed, sources = await wait_for_source_changes(run, app_dir, sources)
+                # 从最后一次保存开始计时（文件时间在未来时，例如网络文件系统时钟偏差，从发现改动开始）
+                saved_at = min(max((sources[path] for path in changed if path in sources), default=time.time()), time.time())
+                previous_graph, graph = graph, ImportGraph(app_dir, WATCH_ALIAS_ROOT, sources)
+                route_dirs = route_directories(app_dir)
+                targets, templates = affected_targets(run, (previous_graph, graph), changed, app_dir, route_dirs)
+
+                names = sorted(short_source_path(path, app_dir) for path in changed)
+                more = f" 等 {len(names)} 个文件" if len(names) > 3 else ""
+                print(f"\n✏️  {datetime.now().strftime('%H:%M:%S')} 改动: {', '.join(names[:3])}{more}")
+                if not targets:
+                    print("   没有页面用到这些文件，无需重新截图")
+                    continue
+                print(f"🧭 受影响的路由: {', '.join(templates) or '/'}"
+                      f"（{len(targets)} 个页面 × {len(run.devices)} 个设备）")
+                reporter = await run_watch_batch(run, pool, controller, timings, targets)
+                counts = reporter.counts
+                failed = f"，失败 {counts['failed']}" if counts["failed"] else ""
+                print(f"⚡ 已更新 {counts['captured']} 张截图{failed}，保存后 {time.time() - saved_at:.1f}s"
+                      f"（截图用时 {time.time() - reporter.started_at:.1f}s）")
+        finally:
+            if monitor is not None:
+                monitor.cancel()
+            await pool.close()
+            await pool.browser.close()
+            timings.save()
+
+
+def run_watch(run):
+    """监听模式入口：常驻浏览器，源码改动后只重新截图受影响的页面"""
+    ensure_playwright(run)
+    if not os.path.isdir(APP_DIR):
+        print(f"❌ 找不到 Next.js app 目录: {os.path.normpath(APP_DIR)}")
+        sys.exit(1)
+    if run.args.crawl:
+        run.targets[:] = discover_targets(run)
+        if not run.targets:
+            print("❌ 爬取没有发现可截图的页面")
+            sys.exit(1)
+    print_run_header(run)
+    try:
+        asyncio.run(watch_loop(run))
+    except KeyboardInterrupt:
+        print("\n👋 已退出监听模式")
+
+
+# -----------------------------------------------------------------------------
+# 分布式截图（--coordinator / --worker，HTTP 接口和任务租约表见 distributed.py）
+# -----------------------------------------------------------------------------
+
+def run_coordinator(run, reporter, timings):
+    """协调节点：分发任务、汇总工作节点的结果，所有任务完成后返回合并后的 (拦截统计, 缓存统计)"""
+    job_queue = JobQueue(run.devices, run.targets, timings, run.planned_jobs, run.budget_deadline)
+    drop_done_jobs(run, job_queue, reporter)
+
+    events = queue.Queue()
+    # 有预算时，预计无法在截止时间前完成的任务不再分发（与本机执行时的 JobQueue 相同）
+    coordinator = Coordinator(job_queue.pending, run.args.lease_timeout, events, deadline=run.budget_deadline)
+    host, port = parse_bind_address(run.args.coordinator)
+    server = serve_coordinator(coordinator, (host, port), served_options(run.args), run.output_dir,
+                               token=run.args.coordinator_token)
+    print(f"🛰️  协调节点: http://{host}:{port}，{len(coordinator.pending)} 个任务等待工作节点领取")
+    address = host if is_loopback(host) else "<本机地址>"
+    token_hint = "（设置相同的 --coordinator-token 或 SCREENSHOT_COORDINATOR_TOKEN）" if run.args.coordinator_token else ""
+    print(f"   启动工作节点: python scripts/test_responsive_screenshots.py --worker http://{address}:{port}{token_hint}")
+
+    block_summary = {}
+    cache_summary = {}
+    try:
+        while True:
+            try:
+                worker, event = events.get(timeout=1)
+            except queue.Empty:
+                for worker, count in coordinator.expire().items():
+                    print(f"♻️  工作节点 {worker} 超过 {run.args.lease_timeout:g}s 无响应，{count} 个任务重新排队", flush=True)
+                with coordinator.lock:
+                    if coordinator.finished() and events.empty():
+                        break
+                continue
+
+            if event[0] == "done":
+                merge_block_stats(block_summary, event[2])
+                merge_cache_stats(cache_summary, event[3])
+                print(f"👋 工作节点退出: {worker}", flush=True)
+            elif event[0] == "joined":
+                print(f"🔌 工作节点加入: {worker}", flush=True)
+            elif event[0] == "log":
+                print(f"  [{worker}] {event[1]}", flush=True)
+            elif event[0] == "started":
+                reporter.started(event[1], event[2])
+            else:
+                _, status, page_name, device_name, detail, elapsed, extra = event
+                reporter.report(status, page_name, device_name, f"{detail} @{worker}".strip(),
+                                elapsed=elapsed, extra=extra)
+        # 留出时间让空闲的工作节点领取到“全部完成”后自行退出
+        time.sleep(3)
+    finally:
+        server.shutdown()
+        server.server_close()
+    return block_summary, cache_summary
+
+
+class RemoteReporter(ProgressReporter):
+    """工作节点的进度汇报：截图文件随结果一起上传到协调节点"""
+
+    def report(self, status, page_name, device_name, detail="", elapsed=None, extra=None, outputs=None):
+        for path in (outputs or {}).values():
+            self.event_queue.put(("file", os.path.relpath(path, self.run.output_dir), path))
+        super().report(status, page_name, device_name, detail, elapsed=elapsed, extra=extra)
+
+
+class RemoteJobQueue(JobQueue):
+    """工作节点的任务队列：本地只保存已领取（及等待重试）的任务，由 feed_remote_jobs 从协调节点补充"""
+
+    def __init__(self):
+        self.pending = []
+        self.overrun = []
+        # 预算截止时间由协调节点检查
+        self.deadline = None
+        self.finished = False
+
+    def retry_wait(self):
+        if self.pending:
+            return super().retry_wait()
+        # 协调节点还有未完成的任务（可能是其他节点超时后重新排队的），继续等待
+        return None if self.finished else 0.5
+
+
+def run_worker(run):
+    """工作节点：从协调节点领取任务截图，截图上传到协调节点后删除本地文件"""
+    worker_id = run.args.worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    client = CoordinatorClient(run.args.worker, worker_id, token=run.args.coordinator_token)
+    remote_options = wait_for_coordinator(client, run.args.lease_timeout)
+
+    options = default_options()
+    for name, value in remote_options.items():
+        if hasattr(options, name) and name not in WORKER_LOCAL_OPTIONS:
+            setattr(options, name, value)
+    for name in WORKER_LOCAL_OPTIONS:
+        setattr(options, name, getattr(run.args, name))
+    # 任务由协调节点筛选，截图写入临时目录，上传后删除；trace 和 HAR 只在协调节点本机有意义
+    work_dir = tempfile.mkdtemp(prefix="screenshot-worker-")
+    options.output_dir = work_dir
+    options.coordinator = None
+    options.skip_existing = False
+    options.workers = 1
+    options.trace_slowest = 0
+    options.return_bytes = False
+    run = configure(options, devices=[], targets=[])
+    ensure_playwright(run)
+
+    print(f"🛠️  工作节点 {worker_id} -> {client.base_url}（并发 {run.args.parallel}）", flush=True)
+    uplink = Uplink(client)
+    reporter = RemoteReporter(run, 0, event_queue=uplink)
+    job_queue = RemoteJobQueue()
+    try:
+        asyncio.run(run_devices(run, [], reporter, TimingHistory(run.timings_path), job_queue=job_queue,
+                                feed=lambda controller: feed_remote_jobs(job_queue, client, controller, print,
+                                                                          run.args.lease_timeout)))
+    finally:
+        uplink.put(("done", worker_id, run.block_stats.as_dict(), cache_stats_summary(run)))
+        uplink.close()
+        shutil.rmtree(work_dir, ignore_errors=True)
+    counts = uplink.sent
+    retries = f"，重试 {counts['retrying']} 次" if counts["retrying"] else ""
+    print(f"📊 工作节点完成: 成功 {counts['captured']}，布局去重 {counts['deduped']}，lint 通过 {counts['linted']}，"
+          f"失败 {counts['failed']}{retries}")
+
+
+def load_rgb_array(path: str):
+    """解码图片为 (H, W, 3) 的 uint8 数组"""
+    with Image.open(path) as image:
+        return np.asarray(image.convert("RGB"))
+
+
+def to_tiles(array, tile: int):
+    """把 (H, W, 3) 数组补齐到分块边长的整数倍，并重排为 (行块数, 列块数, tile, tile, 3)"""
+    height, width = array.shape[:2]
+    pad_h, pad_w = -height % tile, -width % tile
+    if pad_h or pad_w:
+        array = np.pad(array, ((0, pad_h), (0, pad_w), (0, 0)))
+    rows, cols = array.shape[0] // tile, array.shape[1] // tile
+    return array.reshape(rows, tile, cols, tile, 3).swapaxes(1, 2)
+
+
+def yiq_delta(a, b):
+    """感知色差（参考 pixelmatch 的 YIQ 加权距离），返回 0-1 的归一化值"""
+    a = a.astype(np.float32)
+    b = b.astype(np.float32)
+    diff = a - b
+    y = diff @ np.array([0.29889531, 0.58662247, 0.11448223], dtype=np.float32)
+    i = diff @ np.array([0.59597799, -0.27417610, -0.32180189], dtype=np.float32)
+    q = diff @ np.array([0.21147017, -0.52261711, 0.31114694], dtype=np.float32)
+    # 35215 为 YIQ 距离的最大值（纯黑与纯白之间）
+    return np.sqrt((0.5053 * y * y + 0.299 * i * i + 0.1957 * q * q) / 35215.0)
+
+
+def compare_image_pair(new_path, baseline_path, heatmap_path, tile, pixel_threshold, diff_threshold):
+    """对比一张新截图和基准截图（在进程池中执行），返回结果字典"""
+    result = {"file": new_path, "baseline": baseline_path, "heatmap": None}
+    current = load_rgb_array(new_path)
+    baseline = load_rgb_array(baseline_path)
+
+    if current.shape != baseline.shape:
+        result.update(status="fail", reason="size_mismatch",
+                      size=list(current.shape[1::-1]), baseline_size=list(baseline.shape[1::-1]))
+        return result
+
+    height, width = current.shape[:2]
+    total_pixels = height * width
+
+    # 快速路径：整张图完全相同
+    if np.array_equal(current, baseline):
+        result.update(status="pass", changed_pixels=0, changed_ratio=0.0, changed_tiles=0)
+        return result
+
+    # 分块对比：先找出存在任何字节差异的分块，只对这些分块计算感知色差
+    current_tiles = to_tiles(current, tile)
+    baseline_tiles = to_tiles(baseline, tile)
+    dirty = (current_tiles != baseline_tiles).any(axis=(2, 3, 4))
+    dirty_index = np.nonzero(dirty)
+    delta = yiq_delta(current_tiles[dirty_index], baseline_tiles[dirty_index])
+    changed = delta > pixel_threshold
+    changed_pixels = int(changed.sum())
+    changed_ratio = changed_pixels / total_pixels
+
+    result.update(
+        status="fail" if changed_ratio > diff_threshold else "pass",
+        changed_pixels=changed_pixels,
+        changed_ratio=round(changed_ratio, 6),
+        changed_tiles=int((changed.reshape(changed.shape[0], -1).any(axis=1)).sum()),
+        total_tiles=int(dirty.size),
+        max_delta=round(float(delta.max()), 4),
+    )
+
+    if changed_pixels:
+        # 热力图：淡化的灰度原图，差异像素按色差强度着色为红色
+        gray = current.astype(np.float32) @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+        heat_tiles = to_tiles(np.repeat((gray * 0.25 + 180).astype(np.uint8)[..., None], 3, axis=2), tile).copy()
+        region = heat_tiles[dirty_index]
+        intensity = np.clip(delta / max(float(delta.max()), 1e-6), 0, 1)
+        region[changed] = np.stack([
+            np.full(changed_pixels, 255, dtype=np.uint8),
+            (80 * (1 - intensity[changed])).astype(np.uint8),
+            (80 * (1 - intensity[changed])).astype(np.uint8),
+        ], axis=-1)
+        heat_tiles[dirty_index] = region
+        rows, cols = heat_tiles.shape[:2]
+        heatmap = heat_tiles.swapaxes(1, 2).reshape(rows * tile, cols * tile, 3)[:height, :width]
+        os.makedirs(os.path.dirname(heatmap_path), exist_ok=True)
+        Image.fromarray(heatmap).save(heatmap_path, compress_level=1)
+        result["heatmap"] = heatmap_path
+
+    return result
+
+
+def collect_diff_pairs(run, baseline_dir: str):
+    """按本次运行的 (页面, 设备, 类型) 列出待对比的截图，返回 (对比任务, 基准缺失列表)"""
+    pairs, missing = [], []
+    for target in run.targets:
+        for device_conf in run.devices:
+            paths = screenshot_paths(run, device_conf, target["name"])
+            for path in (paths if run.args.full_page else paths[:1]):
+                if not os.path.exists(path):
+                    continue
+                relative = os.path.relpath(path, run.output_dir)
+                baseline_path = os.path.join(baseline_dir, relative)
+                if not os.path.exists(baseline_path):
+                    missing.append(relative)
+                    continue
+                heatmap_path = os.path.join(run.diff_dir, os.path.splitext(relative)[0] + "_diff.png")
+                pairs.append((path, baseline_path, heatmap_path))
+    return pairs, missing
+
+
+def run_visual_diff(run, baseline_dir: str) -> bool:
+    """与基准截图目录对比，写出差异热力图和 diff_report.json，全部通过时返回 True"""
+    if not (HAS_NUMPY and HAS_PIL):
+        print("❌ 视觉回归对比需要 NumPy 和 Pillow，请执行: pip install numpy pillow")
+        return False
+
+    pairs, missing = collect_diff_pairs(run, baseline_dir)
+    print("\n" + "="*50)
+    print(f"🔍 视觉回归对比: {len(pairs)} 张截图 vs {baseline_dir}")
+
+    started_at = time.time()
+    results = []
+    with ProcessPoolExecutor(max_workers=run.args.diff_workers) as executor:
+        futures = [
+            executor.submit(compare_image_pair, new_path, baseline_path, heatmap_path,
+                            run.args.diff_tile, run.args.pixel_threshold, run.args.diff_threshold)
+            for new_path, baseline_path, heatmap_path in pairs
+        ]
+        for future in futures:
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"file": None, "status": "fail", "reason": f"error: {e}"}
+            results.append(result)
+            if result["status"] == "fail":
+                reason = result.get("reason") or f"{result['changed_ratio'] * 100:.3f}% 像素变化"
+                print(f"  ❌ {os.path.relpath(result['file'], run.output_dir) if result['file'] else ''} ({reason})")
+
+    # 报告中的截图和热力图路径相对于截图目录，基准路径保持原样
+    for result in results:
+        for key in ("file", "heatmap"):
+            if result.get(key):
+                result[key] = os.path.relpath(result[key], run.output_dir)
+
+    failed = [r for r in results if r["status"] == "fail"]
+    report = {
+        "baseline_dir": os.path.abspath(baseline_dir),
+        "generated_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "pixel_threshold": run.args.pixel_threshold,
+        "diff_threshold": run.args.diff_threshold,
+        "passed": not failed,
+        "summary": {"compared": len(results), "failed": len(failed), "missing_baseline": len(missing)},
+        "results": results,
+        "missing_baseline": missing,
+    }
+    with open(run.diff_report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"📊 对比完成: {len(results)} 张，失败 {len(failed)}，基准缺失 {len(missing)}，"
+          f"耗时 {time.time() - started_at:.1f}s")
+    print(f"📝 对比报告: {run.diff_report_path}")
+    return not failed
+
+
+def write_report(run):
+    """根据截图目录生成审阅报告（--report / --report-only）"""
+    if not HAS_PIL:
+        print("❌ 审阅报告需要 Pillow，请执行: pip install pillow")
+        return None
+    if not os.path.isdir(run.output_dir):
+        print(f"❌ 截图目录不存在: {run.output_dir}")
+        return None
+    # 截图目录中可能有以前用其他过滤条件截的设备，按全部机型确定设备类型
+    devices = build_devices("all", all_devices=True)[0]
+    return build_report(run.output_dir, devices, page_order=[target["name"] for target in run.targets],
+                        thumb_size=run.args.thumb_size, workers=run.args.diff_workers)
+
+
+# -----------------------------------------------------------------------------
+# Core Web Vitals（--vitals）
+# -----------------------------------------------------------------------------
+#
+# 截图完成后单独进行一轮性能测量：每个 (页面, 设备) 在全新的浏览器上下文中冷启动加载，
+# 通过 CDP 按设备类别施加 CPU 和网络节流，采集 LCP、FCP、CLS、TBT、TTFB 和传输字节数。
+# 测量上下文不注册任何路由（共享响应缓存、请求拦截的响应不经过网络节流），并关闭 HTTP 缓存。
+
+# 节流配置：网络参数为 DevTools 式逐请求节流（延迟 ms，吞吐 kbps），与 Lighthouse 的
+# devtools 节流预设一致（mobile 为 Slow 4G + 4 倍 CPU 降速，desktop 为有线网络不降速）
+VITALS_PROFILES = {
+    "desktop": {"label": "桌面", "cpu": 1, "latency": 40, "download_kbps": 10240, "upload_kbps": 10240},
+    "tablet": {"label": "平板", "cpu": 2, "latency": 150, "download_kbps": 9000, "upload_kbps": 1500},
+    "mobile": {"label": "手机", "cpu": 4, "latency": 562.5, "download_kbps": 1474.56, "upload_kbps": 675},
+    "low_end_mobile": {"label": "低端手机", "cpu": 6, "latency": 562.5, "download_kbps": 1474.56, "upload_kbps": 675},
+}
+
+# 早于该年份的手机和移动设备使用 low_end_mobile 配置
+LOW_END_MOBILE_YEAR = 2019
+
+# 评级阈值 (good, poor)：LCP / CLS / TTFB 来自 web.dev，TBT 来自 Lighthouse
+VITALS_THRESHOLDS = {"lcp": (2500, 4000), "cls": (0.1, 0.25), "tbt": (200, 600), "ttfb": (800, 1800)}
+
+# 与上次报告对比时视为回退的最小增量（同时要求超过上次取值的 10%）
+VITALS_REGRESSION_TOLERANCE = {"lcp": 250, "cls": 0.02, "tbt": 100, "ttfb": 200, "bytes": 50 * 1024}
+
+VITALS_METRICS = ("lcp", "fcp", "cls", "tbt", "ttfb", "bytes", "requests")
+
+# 页面加载后等待主线程空闲（没有长任务）的时间，TBT 统计到此为止
+VITALS_QUIET_MS = 3000
+
+# 在导航前注入：记录 LCP、FCP、布局偏移（按会话窗口计算 CLS）和长任务
+VITALS_INIT_JS = """
+(() => {
+    if (window.top !== window || window.__responsiveVitals) return;
+    const state = window.__responsiveVitals = { lcp: null, lcpElement: null, fcp: null, cls: 0, longTasks: [] };
+    const observe = (type, callback) => {
+        try {
+            new PerformanceObserver((list) => list.getEntries().forEach(callback)).observe({ type, buffered: true });
+        } catch (e) {
+            // 浏览器不支持该条目类型
+        }
+    };
+    observe('largest-contentful-paint', (entry) => {
+        state.lcp = entry.startTime;
+        const el = entry.element;
+        state.lcpElement = el ? el.tagName.toLowerCase() + (el.id ? '#' + el.id : '') : null;
+    });
+    observe('paint', (entry) => {
+        if (entry.name === 'first-contentful-paint') state.fcp = entry.startTime;
+    });
+    // CLS：相邻偏移间隔不超过 1s、窗口总长不超过 5s 的会话窗口中，取偏移总和最大的一个
+    let sessionValue = 0, sessionStart = 0, sessionLast = 0;
+    observe('layout-shift', (entry) => {
+        if (entry.hadRecentInput) return;
+        if (sessionValue && entry.startTime - sessionLast < 1000 && entry.startTime - sessionStart < 5000) {
+            sessionValue += entry.value;
+        } else {
+            sessionValue = entry.value;
+            sessionStart = entry.startTime;
+        }
+        sessionLast = entry.startTime;
+        state.cls = Math.max(state.cls, sessionValue);
+    });
+    observe('longtask', (entry) => state.longTasks.push([entry.startTime, entry.duration]));
+})();
+"""
+
+# 等待主线程连续 quiet 毫秒没有长任务（最多 timeout 毫秒），然后汇总指标
+# TBT：FCP 之后每个长任务超过 50ms 的部分之和（跨越 FCP 的任务只计 FCP 之后的部分）
+VITALS_COLLECT_JS = """async ({ quiet, timeout }) => {
+    const state = window.__responsiveVitals;
+    if (!state) return null;
+    const start = performance.now();
+    const lastTaskEnd = () => state.longTasks.reduce((end, [s, d]) => Math.max(end, s + d), 0);
+    while (performance.now() - start < timeout && performance.now() - Math.max(lastTaskEnd(), start) < quiet) {
+        await new Promise((resolve) => setTimeout(resolve, 250));
+    }
+    const nav = performance.getEntriesByType('navigation')[0];
+    const ms = (value) => (value === null ? null : Math.round(value));
+    const fcp = state.fcp;
+    const tbt = fcp === null ? null : state.longTasks.reduce((sum, [s, d]) => sum + Math.max(0, s + d - Math.max(s, fcp) - 50), 0);
+    return {
+        lcp: ms(state.lcp),
+        lcp_element: state.lcpElement,
+        fcp: ms(fcp),
+        cls: Math.round(state.cls * 10000) / 10000,
+        tbt: ms(tbt),
+        ttfb: nav ? ms(nav.responseStart - (nav.activationStart || 0)) : null,
+        long_tasks: state.longTasks.length,
+    };
+}"""
+
+
+def vitals_profile_name(run, device_conf) -> str:
+    """按设备类别选择节流配置（--vitals-profile 指定时所有设备使用同一配置）"""
+    if run.args.vitals_profile != "auto":
+        return run.args.vitals_profile
+    device_type = device_conf.get("device_type")
+    if device_type == "pc":
+        return "desktop"
+    if device_type == "tablet":
+        return "tablet"
+    return "low_end_mobile" if device_conf.get("year", 2020) < LOW_END_MOBILE_YEAR else "mobile"
+
+
+async def measure_vitals(run, browser, target, device_conf, profile):
+    """在全新的上下文中冷启动加载页面一次，返回指标字典"""
+    context = await browser.new_context(
+        viewport={"width": device_conf["width"], "height": device_conf["height"]},
+        screen={"width": device_conf["width"], "height": device_conf["height"]},
+        is_mobile=device_conf["is_mobile"],
+        has_touch=device_conf["has_touch"],
+        device_scale_factor=device_scale_factor(device_conf),
+        user_agent=MOBILE_USER_AGENT if device_conf["is_mobile"] else None
+    )
+    try:
+        await context.add_init_script(VITALS_INIT_JS)
+        page = await context.new_page()
+        session = await context.new_cdp_session(page)
+        transfer = {"bytes": 0, "requests": 0}
+
+        def loading_finished(event):
+            transfer["bytes"] += event.get("encodedDataLength", 0)
+            transfer["requests"] += 1
+
+        session.on("Network.loadingFinished", loading_finished)
+        await session.send("Network.enable")
+        await session.send("Network.setCacheDisabled", {"cacheDisabled": True})
+        await session.send("Network.emulateNetworkConditions", {
+            "offline": False,
+            "latency": profile["latency"],
+            "downloadThroughput": profile["download_kbps"] * 1024 / 8,
+            "uploadThroughput": profile["upload_kbps"] * 1024 / 8,
+        })
+        await session.send("Emulation.setCPUThrottlingRate", {"rate": profile["cpu"]})
+
+        await page.goto(target["url"], wait_until="load", timeout=run.args.vitals_timeout * 1000)
+        metrics = await page.evaluate(VITALS_COLLECT_JS,
+                                      {"quiet": VITALS_QUIET_MS, "timeout": run.args.vitals_timeout * 1000})
+        if metrics is None:
+            raise RuntimeError("页面中没有采集到指标（初始化脚本未执行）")
+        metrics.update(transfer)
+        return metrics
+    finally:
+        await context.close()
+
+
+def vitals_rating(metric: str, value) -> str:
+    if value is None or metric not in VITALS_THRESHOLDS:
+        return ""
+    good, poor = VITALS_THRESHOLDS[metric]
+    return "good" if value <= good else ("poor" if value > poor else "needs-improvement")
+
+
+async def measure_device_vitals(run, browser, target, device_conf, semaphore, results, log):
+    """测量一个 (页面, 设备)：重复 --vitals-runs 次，各指标取中位数"""
+    profile_name = vitals_profile_name(run, device_conf)
+    profile = VITALS_PROFILES[profile_name]
+    async with semaphore:
+        samples = []
+        error = None
+        for _ in range(run.args.vitals_runs):
+            try:
+                samples.append(await measure_vitals(run, browser, target, device_conf, profile))
+            except Exception as e:
+                error = error_summary(e)
+    row = {
+        "page": target["name"], "url": target["url"], "device": device_conf["name"],
+        "device_type": device_conf.get("device_type", "unknown"), "year": device_conf.get("year"),
+        "width": device_conf["width"], "height": device_conf["height"], "profile": profile_name,
+        "runs": len(samples),
+    }
+    for metric in VITALS_METRICS:
+        values = [sample[metric] for sample in samples if sample.get(metric) is not None]
+        row[metric] = percentile(values, 0.5) if values else None
+    row["lcp_element"] = samples[-1]["lcp_element"] if samples else None
+    if error and not samples:
+        row["error"] = error
+        log(f"  ❌ 指标采集失败: {target['name']} / {device_conf['name']}: {error}")
+    else:
+        ratings = [vitals_rating(metric, row[metric]) for metric in VITALS_THRESHOLDS]
+        icon = "🔴" if "poor" in ratings else ("🟡" if "needs-improvement" in ratings else "🟢")
+        log(f"  {icon} {target['name']} / {device_conf['name']} [{profile_name}] "
+            f"LCP {format_vitals_value('lcp', row['lcp'])} CLS {format_vitals_value('cls', row['cls'])} "
+            f"TBT {format_vitals_value('tbt', row['tbt'])} TTFB {format_vitals_value('ttfb', row['ttfb'])} "
+            f"{format_vitals_value('bytes', row['bytes'])}")
+    results.append(row)
+
+
+def format_vitals_value(metric: str, value) -> str:
+    if value is None:
+        return "-"
+    if metric == "cls":
+        return f"{value:.3f}"
+    if metric == "bytes":
+        return f"{value / 1024:.0f}KB"
+    if metric == "requests":
+        return str(value)
+    return f"{value:.0f}ms"
+
+
+def summarize_vitals(results):
+    """按 (页面, 节流配置) 汇总各指标在设备间的 p75（与 CrUX 一致）"""
+    groups = {}
+    for row in results:
+        groups.setdefault((row["page"], row["profile"]), []).append(row)
+    summary = []
+    for (page_name, profile_name), rows in sorted(groups.items()):
+        entry = {"page": page_name, "profile": profile_name, "devices": len(rows)}
+        for metric in VITALS_METRICS:
+            values = [row[metric] for row in rows if row.get(metric) is not None]
+            entry[metric] = percentile(values, 0.75) if values else None
+            if metric in VITALS_THRESHOLDS:
+                entry[f"{metric}_rating"] = vitals_rating(metric, entry[metric])
+        summary.append(entry)
+    return summary
+
+
+def find_vitals_regressions(summary, previous_summary):
+    """与上次报告的汇总对比，返回 [(页面, 配置, 指标, 上次, 本次)]"""
+    previous = {(entry["page"], entry["profile"]): entry for entry in previous_summary}
+    regressions = []
+    for entry in summary:
+        before = previous.get((entry["page"], entry["profile"]))
+        if before is None:
+            continue
+        for metric, tolerance in VITALS_REGRESSION_TOLERANCE.items():
+            old, new = before.get(metric), entry.get(metric)
+            if old is not None and new is not None and new - old > max(tolerance, old * 0.1):
+                regressions.append((entry["page"], entry["profile"], metric, old, new))
+    return regressions
+
+
+def write_vitals_report(run, results):
+    """写出 vitals_report.json（逐设备结果、汇总、与上次相比的回退）和 vitals.csv，并输出汇总表"""
+    previous_summary = []
+    if os.path.exists(run.vitals_report_path):
+        try:
+            with open(run.vitals_report_path, "r", encoding="utf-8") as f:
+                previous_summary = json.load(f).get("summary", [])
+        except (OSError, ValueError):
+            pass
+
+    results = sorted(results, key=lambda row: (row["page"], row["device"]))
+    summary = summarize_vitals(results)
+    regressions = find_vitals_regressions(summary, previous_summary)
+    report = {
+        "generated_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "profiles": VITALS_PROFILES,
+        "runs": run.args.vitals_runs,
+        "summary": summary,
+        "regressions": [
+            {"page": page_name, "profile": profile_name, "metric": metric, "previous": old, "current": new}
+            for page_name, profile_name, metric, old, new in regressions
+        ],
+        "results": results,
+    }
+    os.makedirs(run.output_dir, exist_ok=True)
+    with open(run.vitals_report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    columns = ["page", "url", "device", "device_type", "year", "width", "height", "profile", "runs",
+               *VITALS_METRICS, "lcp_element", "error"]
+    with open(run.vitals_csv_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(results)
+
+    print("\n" + "="*50)
+    print("📈 Core Web Vitals（各配置内设备间 p75）:")
+    # 表头中的汉字占两列宽度
+    print(f"   {'页面':<18} {'配置':<14} {'设备':>2} {'LCP':>8} {'CLS':>8} {'TBT':>8} {'TTFB':>8} {'传输':>6}")
+    marks = {"good": " ", "needs-improvement": "⚠", "poor": "✗", "": " "}
+    for entry in summary:
+        cells = []
+        for metric in ("lcp", "cls", "tbt", "ttfb"):
+            cells.append(f"{format_vitals_value(metric, entry[metric]):>7}{marks[entry[metric + '_rating']]}")
+        print(f"   {entry['page']:<20} {entry['profile']:<16} {entry['devices']:>4} {' '.join(cells)} "
+              f"{format_vitals_value('bytes', entry['bytes']):>8}")
+    if regressions:
+        print(f"⚠️  与上次测量相比回退 {len(regressions)} 项:")
+        for page_name, profile_name, metric, old, new in regressions:
+            print(f"   - {page_name} [{profile_name}] {metric}: "
+                  f"{format_vitals_value(metric, old)} -> {format_vitals_value(metric, new)}")
+    failed = [row for row in results if row.get("error")]
+    if failed:
+        print(f"❌ 采集失败 {len(failed)} 项（见报告中的 error 字段）")
+    print(f"📝 指标报告: {run.vitals_report_path}，表格: {run.vitals_csv_path}")
+    return report
+
+
+async def measure_all_vitals(run, devices, targets):
+    results = []
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        semaphore = asyncio.Semaphore(run.args.vitals_parallel)
+        try:
+            await asyncio.gather(*[
+                measure_device_vitals(run, browser, target, device_conf, semaphore, results, print)
+                for target in targets
+                for device_conf in devices
+            ])
+        finally:
+            await browser.close()
+    return results
+
+
+def run_vitals(run):
+    """性能指标测量（--vitals 在截图后进行，--vitals-only 不截图）"""
+    ensure_playwright(run)
+    if run.args.vitals_only and run.args.crawl:
+        run.targets[:] = discover_targets(run)
+    profiles = sorted({vitals_profile_name(run, device) for device in run.devices}, key=list(VITALS_PROFILES).index)
+    print("\n" + "="*50)
+    print(f"📈 开始测量 Core Web Vitals: {len(run.targets)} 个页面 × {len(run.devices)} 个设备，"
+          f"每项 {run.args.vitals_runs} 次，并发 {run.args.vitals_parallel}")
+    for name in profiles:
+        profile = VITALS_PROFILES[name]
+        print(f"   {name}: CPU {profile['cpu']}x 降速，延迟 {profile['latency']:g}ms，"
+              f"下行 {profile['download_kbps'] / 1024:.1f} Mbps，上行 {profile['upload_kbps'] / 1024:.1f} Mbps")
+    started_at = time.time()
+    results = asyncio.run(measure_all_vitals(run, run.devices, run.targets))
+    print(f"⏱️  测量耗时 {time.time() - started_at:.1f}s")
+    return write_vitals_report(run, results)
+
+
+# -----------------------------------------------------------------------------
+# 离线基准测试（--benchmark）
+# -----------------------------------------------------------------------------
+
+class QuietFixtureHandler(SimpleHTTPRequestHandler):
+    """夹具站点请求处理器，不输出访问日志"""
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fixture_server():
+    """在后台线程中启动夹具站点，监听随机端口"""
+    handler = functools.partial(QuietFixtureHandler, directory=BENCHMARK_FIXTURE_DIR)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def parse_int_list(value: str):
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+def count_screenshots(directory: str) -> int:
+    count = 0
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        count += sum(1 for name in files if name.endswith((".png", ".jpg", ".webp")))
+    return count
+
+
+def run_benchmark_case(run, urls, parallel: int, workers: int, expected: int, log_dir: str):
+    """以子进程运行一次完整截图，记录耗时、吞吐量、进程树峰值内存和 CPU 时间"""
+    output_dir = tempfile.mkdtemp(prefix="screenshot-bench-")
+    cmd = [sys.executable, CLI_SCRIPT, "-url", ";".join(urls),
+           "--no-skip-existing", "--no-tuning", "--no-adaptive", "--output-dir", output_dir,
+           "--parallel", str(parallel), "--workers", str(workers),
+           "--DT", run.args.device_type, "--format", run.args.format, "--readiness", run.args.readiness]
+    if run.args.all_devices:
+        cmd.append("--all-devices")
+    if run.args.full_page:
+        cmd.append("--full-page")
+
+    log_path = os.path.join(log_dir, f"parallel-{parallel}_workers-{workers}.log")
+    peak_rss = None
+    times_before = os.times()
+    started_at = time.time()
+    try:
+        with open(log_path, "w", encoding="utf-8") as log:
+            proc = subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT)
+            while proc.poll() is None:
+                rss = process_tree_rss(proc.pid)
+                if rss is not None:
+                    peak_rss = max(peak_rss or 0, rss)
+                time.sleep(0.5)
+        elapsed = time.time() - started_at
+        times_after = os.times()
+        shots = count_screenshots(output_dir)
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    # 子进程退出后其 CPU 时间（含已回收的浏览器进程）计入 children_user / children_system
+    cpu_seconds = ((times_after.children_user - times_before.children_user)
+                   + (times_after.children_system - times_before.children_system))
+    return {
+        "parallel": parallel,
+        "workers": workers,
+        "ok": proc.returncode == 0 and shots >= expected,
+        "shots": shots,
+        "expected": expected,
+        "seconds": round(elapsed, 2),
+        "shots_per_min": round(shots / elapsed * 60, 1) if elapsed > 0 else 0,
+        "peak_rss_mb": round(peak_rss / (1024 * 1024)) if peak_rss is not None else None,
+        "cpu_seconds": round(cpu_seconds, 1),
+        "cpu_percent": round(cpu_seconds / elapsed / (os.cpu_count() or 1) * 100, 1) if elapsed > 0 else 0,
+        "log": log_path,
+    }
+
+
+def recommend_config(results, memory_limit_mb):
+    """在内存限制内选择吞吐量最高的配置；吞吐量相差 5% 以内时选并发更低、占用更少的配置"""
+    candidates = [r for r in results
+                  if r["ok"] and (memory_limit_mb is None or r["peak_rss_mb"] is None
+                                  or r["peak_rss_mb"] <= memory_limit_mb)]
+    if not candidates:
+        return None
+    best = max(r["shots_per_min"] for r in candidates)
+    near_best = [r for r in candidates if r["shots_per_min"] >= best * 0.95]
+    return min(near_best, key=lambda r: (r["parallel"] * r["workers"], r["peak_rss_mb"] or 0))
+
+
+def run_benchmark(run):
+    """扫描并行数和分片进程数组合，输出对比表并保存推荐配置"""
+    ensure_playwright(run)
+    if not os.path.isdir(BENCHMARK_FIXTURE_DIR):
+        print(f"❌ 找不到基准测试夹具目录: {BENCHMARK_FIXTURE_DIR}")
+        sys.exit(1)
+
+    cpu_count = os.cpu_count() or 1
+    memory_mb = total_memory_mb()
+    memory_limit = run.args.bench_memory_limit or (int(memory_mb * 0.7) if memory_mb else None)
+    parallel_levels = parse_int_list(run.args.bench_parallel)
+    worker_levels = [w for w in parse_int_list(run.args.bench_workers) if w <= cpu_count and w <= len(run.devices)]
+    expected = len(run.devices) * len(BENCHMARK_PAGES) * (2 if run.args.full_page else 1)
+    log_dir = os.path.join(run.output_dir, ".benchmark")
+    os.makedirs(log_dir, exist_ok=True)
+
+    server = start_fixture_server()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = [f"{base_url}/{name}/" for name in BENCHMARK_PAGES]
+
+    print("🏁 开始离线基准测试...")
+    print(f"🖥️  CPU: {cpu_count} 核，内存: {f'{memory_mb} MB' if memory_mb else '未知'}"
+          f"{'' if memory_limit is None else f'，推荐配置内存上限: {memory_limit} MB'}")
+    if not HAS_PSUTIL and not os.path.isdir("/proc"):
+        print("⚠️ 未安装 psutil，无法统计内存（pip install psutil）")
+    print(f"🔗 夹具站点: {base_url}（{', '.join(BENCHMARK_PAGES)}）")
+    print(f"📱 每轮截图: {len(run.devices)} 台设备 × {len(BENCHMARK_PAGES)} 个页面 = {expected} 张")
+    print(f"🔁 扫描组合: parallel {parallel_levels} × workers {worker_levels}")
+    print("=" * 50)
+
+    results = []
+    try:
+        for workers in worker_levels:
+            for parallel in parallel_levels:
+                result = run_benchmark_case(run, urls, parallel, workers, expected, log_dir)
+                results.append(result)
+                memory = f"{result['peak_rss_mb']} MB" if result["peak_rss_mb"] is not None else "n/a"
+                status = "✅" if result["ok"] else f"❌ 仅 {result['shots']}/{expected} 张，见 {result['log']}"
+                print(f"  parallel={parallel:<3} workers={workers:<2} {result['shots_per_min']:7.1f} 张/分钟  "
+                      f"峰值内存 {memory:>8}  CPU {result['cpu_percent']:5.1f}%  {status}")
+    finally:
+        server.shutdown()
+
+    print("=" * 50)
+    best = recommend_config(results, memory_limit)
+    if best is None:
+        print("❌ 没有满足条件的配置（全部失败或超出内存上限），未生成推荐配置")
+        sys.exit(1)
+
+    tuning = {
+        "parallel": best["parallel"],
+        "workers": best["workers"],
+        "shots_per_min": best["shots_per_min"],
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "cpu_count": cpu_count,
+        "memory_mb": memory_mb,
+        "memory_limit_mb": memory_limit,
+        "device_type": run.args.device_type,
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(TUNING_PATH), exist_ok=True)
+    with open(TUNING_PATH, "w", encoding="utf-8") as f:
+        json.dump(tuning, f, ensure_ascii=False, indent=2)
+    print(f"🏆 推荐配置: --parallel {best['parallel']} --workers {best['workers']}"
+          f"（{best['shots_per_min']} 张/分钟）")
+    print(f"💾 已保存到 {TUNING_PATH}，之后未指定 --parallel / --workers 的运行会自动使用")
+
+
+def capture_screenshots(run):
+    """执行截图任务"""
+    ensure_playwright(run)
+
+    if (run.args.format != "png" or run.args.compress_level is not None
+            or (run.args.full_page and run.args.full_page_mode == "tiled")):
+        if not HAS_PIL:
+            print("❌ jpeg/webp 输出、--compress-level 和 --full-page-mode tiled 需要 Pillow，请执行: pip install pillow")
+            sys.exit(1)
+
+    if run.args.crawl:
+        run.targets[:] = discover_targets(run)
+        if not run.targets:
+            print("❌ 爬取没有发现可截图的页面")
+            sys.exit(1)
+
+    if run.args.record:
+        asyncio.run(record_archives(run, run.devices, run.targets))
+    elif run.args.replay and not check_archives(run, run.devices, run.targets):
+        sys.exit(1)
+
+    run.manifest = CaptureManifest(run.manifest_path)
+    # 预算规划按指纹判断页面是否有变化，即使不跳过已有截图也需要探测
+    if run.args.fingerprint and (run.args.skip_existing or run.args.budget):
+        run.page_fingerprints.update(probe_fingerprints(run, run.devices, run.targets))
+
+    timings = TimingHistory(run.timings_path)
+    concurrency = run.args.parallel * (1 if run.args.coordinator else run.args.workers)
+    is_done = functools.partial(is_job_done, run)
+    changed = (changed_pages(run.devices, run.targets, run.manifest, functools.partial(page_fingerprint, run))
+               if run.args.budget else set())
+    if run.args.plan_only:
+        # 只输出计划：不登记任务日志，不启动浏览器
+        print_budget_plan(plan_budget(run.devices, run.targets, timings, run.args.budget, concurrency, is_done, changed),
+                          run.budget_plan_path)
+        return
+
+    journal = JobJournal(run.journal_path)
+    previous = journal.unfinished_run()
+    kinds = ["View", "Full"] if run.args.full_page else ["View"]
+    run.resumed_done.update(journal.start_run(run.devices, run.targets, kinds, run.args.resume))
+
+    total = len(run.devices) * len(run.targets)
+    plan = None
+    if run.args.budget:
+        plan = plan_budget(run.devices, run.targets, timings, run.args.budget, concurrency, is_done, changed)
+        run.planned_jobs = {(c["page"], c["device"]) for c in plan["selected"]}
+        total = len(run.planned_jobs) + plan["done"]
+
+    trace = RunTrace(run.trace_dir)
+    reporter = ProgressReporter(run, total, timings=timings, manifest=run.manifest, trace=trace, journal=journal)
+    print_run_header(run)
+    if plan is not None:
+        print_budget_plan(plan, run.budget_plan_path)
+        # 估算偏差时的保护：预计无法在预算结束前完成的任务不再开始
+        run.budget_deadline = time.time() + run.args.budget
+    if run.args.resume and previous:
+        print(f"📒 续跑: 第 {previous[0]} 次运行（开始于 {previous[1]}），任务日志中已完成 {len(run.resumed_done)} 张截图（View / Full 分别计）")
+    elif run.args.resume:
+        print("📒 任务日志中没有未完成的运行，开始新的运行")
+    elif previous:
+        print(f"📒 上次运行（开始于 {previous[1]}）未完成，可使用 --resume 只执行剩余任务")
+    incomplete = []
+    try:
+        if run.args.coordinator:
+            # 分布式模式：任务交给工作节点执行，本进程只负责分发和汇总
+            block_summary, cache_summary = run_coordinator(run, reporter, timings)
+        elif run.args.workers > 1:
+            # 分片模式：多个进程各自运行浏览器，统一输出进度和汇总
+            block_summary, cache_summary = run_sharded(run, reporter, timings)
+        else:
+            asyncio.run(run_devices(run, run.devices, reporter, timings))
+            block_summary = run.block_stats.as_dict()
+            cache_summary = cache_stats_summary(run)
+    finally:
+        # 中断时也保存已完成部分的耗时和清单，下次运行可以继续
+        timings.save()
+        run.manifest.save()
+        reporter.save_layout_groups()
+        trace.close()
+        incomplete = journal.finish_run()
+        journal.close()
+        if run.planned_jobs is not None:
+            # 预算外的任务（规划时排除，或预计无法在预算内完成而未开始）保留为 pending，单独汇总
+            left_out = {(job[0], job[1]) for job in incomplete if job[3] == "pending"}
+            incomplete = [job for job in incomplete if job[3] != "pending"]
+            if left_out:
+                overrun = len(left_out & run.planned_jobs)
+                overrun_info = f"，其中 {overrun} 项因预计超出预算未开始" if overrun else ""
+                print(f"\n💤 预算外未执行 {len(left_out)} 项（页面, 设备）{overrun_info}，使用 --resume 补齐")
+        if incomplete:
+            # 列出缺失的截图，避免中断或失败后悄悄留下空缺
+            print(f"\n⚠️ 任务日志中有 {len(incomplete)} 项未完成（{run.journal_path}）:")
+            for page_name, device_name, kind, state, error_class in incomplete[:20]:
+                print(f"   - {page_name} / {device_name} [{kind}] {state}{f' ({error_class})' if error_class else ''}")
+            if len(incomplete) > 20:
+                print(f"   ... 另有 {len(incomplete) - 20} 项")
+            print("   使用 --resume 只重新执行这些任务")
+    reporter.print_summary()
+    trace.print_summary()
+    print_block_stats(block_summary)
+    print_cache_stats(cache_summary)
+    print(f"🎉 所有截图任务完成！请查看目录: {run.output_dir}")
+
+    lint_passed = not run.args.lint or write_lint_report(run, reporter)
+    diff_passed = not run.args.compare_to or run_visual_diff(run, run.args.compare_to)
+    if run.args.vitals:
+        run_vitals(run)
+    if run.args.report:
+        write_report(run)
+    if not (diff_passed and lint_passed):
+        sys.exit(1)
+
+def ensure_playwright(run):
+    """确保 Playwright 可用，并创建输出目录"""
+    if not HAS_PLAYWRIGHT:
+        install_playwright()
+        # 重新导入
+        from playwright.async_api import async_playwright as _ap
+        globals()["async_playwright"] = _ap
+
+    # 确保输出目录存在
+    if not os.path.exists(run.output_dir):
+        os.makedirs(run.output_dir)
+        print(f"📁 创建截图目录: {run.output_dir}")
+
+def print_run_header(run):
+    # 统计设备类型
+    device_type_counts = {}
+    for device in run.devices:
+        device_type = device.get("device_type", "unknown")
+        device_type_counts[device_type] = device_type_counts.get(device_type, 0) + 1
+
+    print(f"🚀 开始响应式截图测试...")
+    print(f"📅 时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"🔗 目标页面数: {len(run.targets)}")
+    print(f"📱 模拟设备数: {len(run.devices)}")
+    if device_type_counts:
+        type_info = ", ".join([f"{k}: {v}" for k, v in device_type_counts.items()])
+        print(f"📊 设备类型分布: {type_info}")
+    print(f"📅 设备筛选: {'所有机型' if run.args.all_devices else '2015年以后的机型'}")
+    print(f"🎯 设备类型过滤: {run.args.device_type}")
+    print(f"📸 截图模式: {'View + Full Page' if run.args.full_page else 'View 视图'}，格式: {run.args.format}")
+    if run.args.vitals:
+        print(f"📈 截图完成后测量 Core Web Vitals（节流配置: {run.args.vitals_profile}，每项 {run.args.vitals_runs} 次）")
+    if run.args.lint:
+        print(f"🧹 lint 模式: 只为有违规的 (页面, 设备) 截图（移动端点击区域下限 {run.args.lint_tap_size}px）")
+    if run.args.deterministic:
+        print("🧊 确定性模式: 关闭过渡和动画，固定时间、随机数和时区，禁止媒体播放，隐藏光标")
+    if run.args.full_page and run.args.full_page_mode != "native":
+        print(f"🧱 分块全长截图: {'全部页面' if run.args.full_page_mode == 'tiled' else f'页面高度超过 {run.args.tile_threshold}px 时'}")
+    if not run.args.skip_existing:
+        print("🔄 断点续传: 已禁用（重新生成所有截图）")
+    elif run.args.fingerprint:
+        print("🔄 断点续传: 增量模式（跳过已存在且页面指纹未变化的截图）")
+    else:
+        print("🔄 断点续传: 已启用（跳过已存在的截图）")
+    if run.args.record or run.args.replay:
+        print(f"📼 网络模式: HAR 存档离线回放 ({run.har_dir})")
+    else:
+        if run.args.asset_cache_mb > 0:
+            document_info = f"HTML 文档 {run.args.cache_max_age}秒" if run.args.cache_max_age > 0 else "HTML 文档不缓存"
+            disk_info = (f"，磁盘层 {run.args.asset_cache_dir}（上限 {run.args.asset_cache_disk_mb} MB）"
+                         if run.args.asset_cache_dir else "")
+            print(f"💾 共享资源缓存: 内存上限 {run.args.asset_cache_mb} MB/进程{disk_info}，"
+                  f"哈希资源整个运行有效，{document_info}")
+        else:
+            print("💾 共享资源缓存: 已禁用（每个浏览器上下文使用各自的 HTTP 缓存）")
+    if run.blocked_profiles:
+        print(f"🚫 请求拦截: {', '.join(run.blocked_profiles)}")
+    print(f"⚡ 并行处理: {run.args.parallel} 个设备同时运行{'（基准测试推荐配置）' if run.tuning else ''}")
+    if not run.args.no_adaptive:
+        memory_limit = process_memory_limit_mb(run)
+        print(f"🎚️ 自适应并发: {run.args.min_parallel}-{run.args.max_parallel or run.args.parallel * 2}"
+              f"{f'，内存上限 {memory_limit} MB/进程' if memory_limit else ''}")
+    if run.args.watch:
+        print(f"👀 监听模式: 常驻浏览器，app 目录源码改动后只重新截图受影响的页面（单进程，并发 {run.args.parallel}）")
+    elif run.args.coordinator:
+        print(f"🛰️  分布式模式: 协调节点监听 {run.args.coordinator}，工作节点 {run.args.lease_timeout:g}s 无响应视为退出")
+    elif run.args.workers > 1:
+        print(f"🧩 分片进程: {run.args.workers} 个（每个进程独立浏览器）")
+    if run.args.url:
+        print(f"📌 模式: 自定义 URL 测试")
+    elif run.args.crawl:
+        print(f"📌 模式: 站点爬取（{len(run.targets)} 个抽样页面）")
+    else:
+        print(f"📌 模式: 默认全站测试")
+    print("="*50)
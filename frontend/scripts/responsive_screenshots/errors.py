@@ -0,0 +1,29 @@
+"""失败分类：决定失败的任务是否值得重试"""
+
+
+def is_timeout_error(error) -> bool:
+    """Playwright 和 asyncio 的超时异常类名都是 TimeoutError"""
+    return error is not None and type(error).__name__ == "TimeoutError"
+
+
+# 可重试的失败分类；其他错误（页面脚本异常、写盘失败等）重试通常无效
+RETRYABLE_ERRORS = ("timeout", "navigation", "browser_crash")
+
+BROWSER_CRASH_MARKERS = ("crashed", "Target closed", "has been closed", "Browser closed", "Connection closed")
+
+
+def classify_error(error) -> str:
+    """把失败分为 timeout / browser_crash / navigation / other"""
+    if is_timeout_error(error):
+        return "timeout"
+    message = str(error)
+    if any(marker in message for marker in BROWSER_CRASH_MARKERS):
+        return "browser_crash"
+    if "net::ERR_" in message or "NS_ERROR_" in message or "Navigation" in message or "goto" in message:
+        return "navigation"
+    return "other"
+
+
+def error_summary(error) -> str:
+    lines = str(error).strip().splitlines()
+    return (lines[0] if lines else type(error).__name__)[:300]
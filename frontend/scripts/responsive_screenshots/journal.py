@@ -0,0 +1,130 @@
+"""崩溃安全的任务日志（--resume）
+
+每次运行登记全部任务，状态变化立即写入 SQLite（WAL 模式）。进程被杀或浏览器崩溃后，
+--resume 从最近一次未完成的运行继续，已完成的任务不再执行。
+"""
+
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+
+class JobJournal:
+    """崩溃安全的任务日志（SQLite，WAL 模式）
+
+    记录每次运行中每个 (URL, 设备, View/Full) 任务的状态：
+    pending → running → done / skipped / deduped，失败时为 retry（等待重试）或 failed。
+    每次状态变化立即提交，进程被杀或浏览器崩溃后，--resume 从最近一次未完成的运行继续。
+    只由主进程写入，分片子进程通过事件队列上报。
+    """
+
+    FINISHED_STATES = ("done", "skipped", "deduped", "linted")
+    STATES = {"captured": "done", "skipped": "skipped", "deduped": "deduped", "linted": "linted",
+              "failed": "failed", "retrying": "retry"}
+    # FINISHED_STATES 在 SQL 中的占位符
+    FINISHED_PLACEHOLDERS = ", ".join("?" * len(FINISHED_STATES))
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                started_at TEXT, updated_at TEXT, argv TEXT, status TEXT
+            );
+            CREATE TABLE IF NOT EXISTS jobs (
+                run_id INTEGER, url TEXT, page TEXT, device TEXT, kind TEXT,
+                state TEXT, attempts INTEGER DEFAULT 0, error_class TEXT, error TEXT,
+                next_attempt_at TEXT, updated_at TEXT,
+                PRIMARY KEY (run_id, url, device, kind)
+            );
+        """)
+        self.conn.commit()
+        self.run_id = None
+        self.urls = {}
+
+    @staticmethod
+    def now() -> str:
+        return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    def unfinished_run(self):
+        """最近一次未完成的运行 (id, 开始时间)，没有时返回 None"""
+        return self.conn.execute(
+            "SELECT id, started_at FROM runs WHERE status != 'complete' ORDER BY id DESC LIMIT 1").fetchone()
+
+    def start_run(self, devices, targets, kinds, resume: bool):
+        """登记本次运行的所有任务，返回已完成的 {(页面名, 设备名, 类型): done/deduped}（仅 --resume 时非空）
+
+        View 和 Full 分别记录：上次在两者之间中断时，续跑只跳过已完成的类型。
+        deduped 表示该任务没有自己的截图（布局去重，或 lint 通过无需截图）。
+        """
+        self.urls = {target["name"]: target["url"] for target in targets}
+        previous = self.unfinished_run() if resume else None
+        if previous:
+            self.run_id = previous[0]
+            # 上次中断时正在执行或等待重试的任务重新排队；失败的任务在续跑时再试一次
+            self.conn.execute(
+                "UPDATE jobs SET state = 'pending' WHERE run_id = ? AND state IN ('running', 'retry', 'failed')",
+                (self.run_id,))
+            self.conn.execute("UPDATE runs SET status = 'running', updated_at = ? WHERE id = ?",
+                              (self.now(), self.run_id))
+        else:
+            cursor = self.conn.execute(
+                "INSERT INTO runs (started_at, updated_at, argv, status) VALUES (?, ?, ?, 'running')",
+                (self.now(), self.now(), " ".join(sys.argv[1:])))
+            self.run_id = cursor.lastrowid
+            # 已完成运行的任务明细不再需要，只保留运行记录
+            self.conn.execute(
+                "DELETE FROM jobs WHERE run_id IN (SELECT id FROM runs WHERE status = 'complete' AND id < ?)",
+                (self.run_id,))
+
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO jobs (run_id, url, page, device, kind, state, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, 'pending', ?)",
+            [(self.run_id, target["url"], target["name"], device_conf["name"], kind, self.now())
+             for device_conf in devices for target in targets for kind in kinds])
+        self.conn.commit()
+
+        if not previous:
+            return {}
+        rows = self.conn.execute(
+            "SELECT page, device, kind, state FROM jobs "
+            f"WHERE run_id = ? AND state IN ({self.FINISHED_PLACEHOLDERS})",
+            (self.run_id,) + self.FINISHED_STATES).fetchall()
+        return {(page, device, kind): "deduped" if state in ("deduped", "linted") else "done"
+                for page, device, kind, state in rows}
+
+    def mark(self, page_name: str, device_name: str, state: str, kind=None, error_class=None, error=None,
+             next_attempt_at=None, failed_attempt=False):
+        """更新一个任务的状态；kind 为 None 时更新该 (页面, 设备) 所有未完成的类型（已完成的保持不变）"""
+        if self.run_id is None:
+            return
+        if kind is None:
+            condition, key = f"state NOT IN ({self.FINISHED_PLACEHOLDERS})", self.FINISHED_STATES
+        else:
+            condition, key = "kind = ?", (kind,)
+        self.conn.execute(
+            "UPDATE jobs SET state = ?, attempts = attempts + ?, error_class = ?, error = ?, "
+            f"next_attempt_at = ?, updated_at = ? WHERE run_id = ? AND url = ? AND device = ? AND {condition}",
+            (state, 1 if failed_attempt else 0, error_class, error, next_attempt_at, self.now(),
+             self.run_id, self.urls.get(page_name), device_name) + key)
+        self.conn.commit()
+
+    def finish_run(self):
+        """结束本次运行，返回未完成任务 [(页面名, 设备名, 类型, 状态, 失败分类)]"""
+        if self.run_id is None:
+            return []
+        incomplete = self.conn.execute(
+            "SELECT page, device, kind, state, error_class FROM jobs "
+            f"WHERE run_id = ? AND state NOT IN ({self.FINISHED_PLACEHOLDERS}) ORDER BY page, device, kind",
+            (self.run_id,) + self.FINISHED_STATES).fetchall()
+        self.conn.execute("UPDATE runs SET status = ?, updated_at = ? WHERE id = ?",
+                          ("incomplete" if incomplete else "complete", self.now(), self.run_id))
+        self.conn.commit()
+        return incomplete
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,193 @@
+"""命令行参数定义
+
+CLI 和库接口共用同一份参数定义：CLI 解析命令行，库接口通过 default_options()
+取得全部默认值后按需覆盖，两者得到的都是 argparse.Namespace。
+"""
+
+import argparse
+import re
+
+from .targets import DEFAULT_SITE_URL
+
+
+def parse_duration(value: str) -> float:
+    """解析时长（秒）：纯数字为秒，也可以组合 h / m / s 单位，如 90、10m、1h30m"""
+    text = value.strip().lower()
+    parts = re.findall(r"(\d+(?:\.\d+)?)([hms]?)", text)
+    if not parts or "".join(number + unit for number, unit in parts) != text:
+        raise argparse.ArgumentTypeError(f"无效的时长: {value}（示例: 600、10m、1h30m）")
+    scale = {"h": 3600, "m": 60, "s": 1, "": 1}
+    return sum(float(number) * scale[unit] for number, unit in parts)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """构建命令行参数解析器"""
+    parser = argparse.ArgumentParser(description='Responsive Screenshots Tool')
+    parser.add_argument('-url', type=str, help='自定义测试 URL，多个 URL 用分号 ; 分隔 (例如: "google.com;bing.com")')
+    parser.add_argument('--all-devices', action='store_true', help='测试所有机型（包括2015年以前的旧设备）')
+    parser.add_argument('--full-page', action='store_true', help='同时测试 Full Page 视图（默认只测试 View 视图）')
+    parser.add_argument('--DT', '--device-type', type=str, choices=['mobile', 'tablet', 'pc', 'all'], default='all',
+                        dest='device_type', help='只测试指定类型的设备: mobile(手机), tablet(平板), pc(桌面), all(全部，默认)')
+    parser.add_argument('--skip-existing', action='store_true', default=True,
+                        help='跳过已存在且内容未变化的截图，实现断点续传和增量截图（默认：开启）')
+    parser.add_argument('--no-skip-existing', action='store_false', dest='skip_existing',
+                        help='重新生成所有截图（整站全量截图）')
+    parser.add_argument('--no-fingerprint', action='store_false', dest='fingerprint',
+                        help='不探测页面指纹，只要截图文件存在就跳过（旧行为）')
+    parser.add_argument('--cache-max-age', type=int, default=300,
+                        help='共享资源缓存中 HTML 文档（以及服务器未设置 max-age 的脚本、样式、图片、字体）的缓存时间（秒），'
+                             '默认 300 秒（5分钟）。设置为 0 不缓存这些响应')
+    parser.add_argument('--asset-cache-mb', type=int, default=256, metavar='MB',
+                        help='所有浏览器上下文共享的响应缓存的内存上限（MB，按最近使用淘汰），默认 256；分片模式下为每个进程的上限。'
+                             '设置为 0 禁用共享缓存')
+    parser.add_argument('--asset-cache-dir', type=str, default=None,
+                        help='共享响应缓存的磁盘层目录：内存淘汰的条目写入该目录并跨运行保留，默认不使用磁盘层')
+    parser.add_argument('--asset-cache-disk-mb', type=int, default=1024, metavar='MB',
+                        help='磁盘层的容量上限（MB），超出时按最近使用时间淘汰，默认 1024')
+    parser.add_argument('--parallel', type=int, default=None,
+                        help='并行处理的设备数量。默认使用 --benchmark 生成的推荐值，没有推荐配置时为 8。增加此值可提高速度，但会消耗更多内存和 CPU')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='分片进程数。默认使用 --benchmark 生成的推荐值，没有推荐配置时为 1。大于 1 时把设备列表分给 N 个独立进程，每个进程各自启动 Playwright 和浏览器')
+    parser.add_argument('--no-adaptive', action='store_true',
+                        help='关闭自适应并发，整个运行期间固定使用 --parallel 个并发任务')
+    parser.add_argument('--min-parallel', type=int, default=1,
+                        help='自适应并发的下限，默认 1')
+    parser.add_argument('--max-parallel', type=int, default=None,
+                        help='自适应并发的上限，默认为 --parallel 的 2 倍')
+    parser.add_argument('--memory-limit', type=int, default=None, metavar='MB',
+                        help='自适应并发的内存上限（进程树常驻内存，MB），默认为物理内存的 75%%；分片模式下按进程数均分')
+    parser.add_argument('--adapt-interval', type=float, default=2.0,
+                        help='自适应并发的评估间隔（秒），默认 2')
+    parser.add_argument('--resume', action='store_true',
+                        help='从任务日志（screenshots/.journal.sqlite3）中上次未完成的运行继续，只执行未完成的任务')
+    parser.add_argument('--retries', type=int, default=2,
+                        help='超时、导航错误、浏览器崩溃时的最大重试次数，默认 2')
+    parser.add_argument('--retry-backoff', type=float, default=2.0,
+                        help='重试退避基数（秒），第 n 次重试等待 基数 × 2^(n-1)，默认 2')
+    parser.add_argument('--no-tuning', action='store_true',
+                        help='忽略基准测试推荐配置，--parallel / --workers 未指定时使用内置默认值')
+    parser.add_argument('--budget', type=parse_duration, default=None, metavar='DURATION',
+                        help='时间预算（如 10m、1h30m、600）：按历史耗时估算每个任务的成本，优先选择覆盖新断点、新设备类型和'
+                             '内容有变化的页面的任务，只执行能在预算内完成的子集，并列出未执行的任务')
+    parser.add_argument('--plan-only', action='store_true',
+                        help='只输出 --budget 的计划（写入 screenshots/budget_plan.json），不截图')
+    parser.add_argument('--watch', action='store_true',
+                        help='监听模式：与 next dev 一起常驻运行，浏览器和上下文池保持预热，frontend/app 下的源码改动后'
+                             '按导入关系只重新截图受影响的页面（Ctrl-C 退出）')
+    parser.add_argument('--watch-interval', type=float, default=0.5,
+                        help='--watch 检查源码修改时间的间隔（秒），改动需稳定一个间隔后才开始截图，默认 0.5')
+    parser.add_argument('--output-dir', type=str, default=None,
+                        help='截图输出目录，默认 scripts/screenshots')
+    archive_group = parser.add_mutually_exclusive_group()
+    archive_group.add_argument('--record', action='store_true',
+                               help='录制模式：先为每个 URL 录制 HAR 网络存档，再基于存档离线截图')
+    archive_group.add_argument('--replay', action='store_true',
+                               help='回放模式：所有请求都从 HAR 存档返回，不访问网络（需先使用 --record 录制）')
+    parser.add_argument('--har-dir', type=str, default=None,
+                        help='HAR 存档目录，默认 screenshots/.har')
+    parser.add_argument('--compare-to', type=str, default=None, metavar='BASELINE_DIR',
+                        help='截图完成后与基准截图目录逐张对比，生成差异热力图和 diff_report.json')
+    parser.add_argument('--pixel-threshold', type=float, default=0.1,
+                        help='单个像素的感知色差阈值（0-1，YIQ 色彩空间），默认 0.1')
+    parser.add_argument('--diff-threshold', type=float, default=0.001,
+                        help='允许的差异像素比例，超过即判定为失败，默认 0.001（0.1%%）')
+    parser.add_argument('--diff-tile', type=int, default=64,
+                        help='对比时的分块边长（像素），完全相同的分块直接跳过，默认 64')
+    parser.add_argument('--diff-workers', type=int, default=None,
+                        help='视觉对比和审阅报告缩略图生成使用的进程数，默认等于 CPU 核数')
+    parser.add_argument('--lint', action='store_true',
+                        help='响应式 lint：每个 (页面, 设备) 只做一次 DOM 检查（横向溢出、卡片文字裁剪、头部元素重叠、移动端点击区域过小），'
+                             '只有发现违规时才截图，结果写入 screenshots/lint_report.json')
+    parser.add_argument('--lint-tap-size', type=int, default=24, metavar='PX',
+                        help='lint 检查移动端点击区域的最小边长（CSS 像素），默认 24（WCAG 2.5.8）')
+    parser.add_argument('--vitals', action='store_true',
+                        help='截图完成后测量每个 (页面, 设备) 的 Core Web Vitals（LCP、CLS、TBT、TTFB、传输字节），'
+                             '按设备类别施加 CPU 和网络节流，结果写入 screenshots/vitals_report.json 和 vitals.csv')
+    parser.add_argument('--vitals-only', action='store_true',
+                        help='不截图，只测量 Core Web Vitals')
+    parser.add_argument('--vitals-profile', type=str, default='auto',
+                        choices=['auto', 'desktop', 'tablet', 'mobile', 'low_end_mobile'],
+                        help='节流配置: auto(按设备类别选择，2019 年以前的手机使用 low_end_mobile，默认)，或所有设备使用指定配置')
+    parser.add_argument('--vitals-runs', type=int, default=1,
+                        help='每个 (页面, 设备) 测量的次数，各指标取中位数，默认 1')
+    parser.add_argument('--vitals-parallel', type=int, default=2,
+                        help='同时测量的页面数，默认 2（并发过高时 CPU 竞争会抬高 TBT）')
+    parser.add_argument('--vitals-timeout', type=int, default=60,
+                        help='单次测量的页面加载和等待主线程空闲的超时时间（秒），默认 60')
+    parser.add_argument('--report', action='store_true',
+                        help='截图完成后生成审阅报告 screenshots/report.html（页面 × 设备网格，按设备类型分组，需要 Pillow）')
+    parser.add_argument('--report-only', action='store_true',
+                        help='不截图，只根据截图目录中已有的截图生成审阅报告')
+    parser.add_argument('--thumb-size', type=int, default=240, metavar='PX',
+                        help='审阅报告缩略图的最大宽度（像素，高度不超过 1.5 倍），默认 240')
+    parser.add_argument('--dedupe-layout', action='store_true',
+                        help='按布局签名去重：同一页面上布局完全一致的设备只截一张图，其余设备记录为由它代表')
+    parser.add_argument('--readiness', type=str, choices=['signals', 'networkidle'], default='signals',
+                        help='页面就绪判断: signals(水合/字体/首屏图片/布局稳定信号，默认), networkidle(旧方式: 网络空闲 + 固定等待 800ms)')
+    parser.add_argument('--deterministic', action='store_true',
+                        help='确定性模式：导航前注入脚本和样式，关闭过渡和动画、固定 Date / Math.random / 时区、'
+                             '禁止音视频播放、隐藏输入光标，多次运行的截图逐字节一致')
+    parser.add_argument('--ready-timeout', type=int, default=15000,
+                        help='signals 模式下等待就绪信号的最长时间（毫秒），默认 15000')
+    parser.add_argument('--block', type=str, default='',
+                        help='拦截指定类型的请求，多个用逗号分隔: analytics(统计分析), media(音视频), video(视频), audio(音频), iconfont(图标字体)')
+    parser.add_argument('--block-size-probe', action='store_true',
+                        help='拦截统计中存档里没有大小的 URL 发送一次 HEAD 请求获取大小（会访问被拦截的地址），默认只按 HAR 存档估算')
+    parser.add_argument('--format', type=str, choices=['png', 'jpeg', 'webp'], default='png',
+                        help='截图输出格式，默认 png（jpeg/webp 需要安装 Pillow）')
+    parser.add_argument('--quality', type=int, default=85,
+                        help='jpeg/webp 的压缩质量（1-100），默认 85')
+    parser.add_argument('--compress-level', type=int, default=None, choices=range(0, 10), metavar='0-9',
+                        help='png 压缩级别（0-9）。默认直接写入浏览器返回的 PNG，不重新编码')
+    parser.add_argument('--writer-threads', type=int, default=4,
+                        help='截图编码和写盘的线程数，默认 4')
+    parser.add_argument('--writer-queue', type=int, default=16,
+                        help='等待编码写盘的截图数量上限，达到上限时截图协程等待（背压），默认 16')
+    parser.add_argument('--full-page-mode', type=str, choices=['auto', 'native', 'tiled'], default='auto',
+                        help='Full Page 截图方式: native(浏览器一次截取整页), tiled(按视口高度分块滚动截取并流式拼接，内存只与块大小有关), '
+                             'auto(页面高度超过 --tile-threshold 时分块，默认)')
+    parser.add_argument('--tile-threshold', type=int, default=16384, metavar='PX',
+                        help='auto 模式下改用分块截图的页面高度（设备像素，即 CSS 高度 × 像素密度），默认 16384')
+    parser.add_argument('--trace-slowest', type=int, default=0, metavar='N',
+                        help='为最慢的 N 个任务保存 Playwright trace（screenshots/.trace/playwright/），默认 0 不保存')
+    parser.add_argument('--crawl', type=str, nargs='?', const=DEFAULT_SITE_URL, default=None, metavar='START_URL',
+                        help='爬取站点生成测试页面列表：从首页（或 sitemap.xml）出发发现站内链接，按路由模板分组抽样。'
+                             '不指定地址时从默认站点首页开始')
+    parser.add_argument('--crawl-per-template', type=int, default=2,
+                        help='每个路由模板（如 /course/[slug]/[lesson]）抽样的页面数，默认 2')
+    parser.add_argument('--crawl-max-pages', type=int, default=500,
+                        help='爬取时最多请求的页面数，默认 500')
+    parser.add_argument('--crawl-concurrency', type=int, default=8,
+                        help='爬取时同时进行的请求数，默认 8')
+    parser.add_argument('--coordinator', type=str, default=None, metavar='[HOST:]PORT',
+                        help='分布式模式的协调节点：监听指定地址（只写端口时为 127.0.0.1），把 (页面, 设备) 任务分发给 --worker 工作节点，统一汇总结果、耗时和截图')
+    parser.add_argument('--coordinator-token', type=str, default=None, metavar='TOKEN',
+                        help='协调节点与工作节点的共享令牌，监听非本机回环地址时必须设置（两端相同）；'
+                             '未指定时读取环境变量 SCREENSHOT_COORDINATOR_TOKEN')
+    parser.add_argument('--worker', type=str, default=None, metavar='URL',
+                        help='分布式模式的工作节点：从协调节点（如 http://10.0.0.5:8765）领取任务截图，截图上传到协调节点')
+    parser.add_argument('--worker-id', type=str, default=None,
+                        help='工作节点名称，默认为 主机名-进程号')
+    parser.add_argument('--lease-timeout', type=float, default=60,
+                        help='工作节点超过该时间（秒）无响应即视为已退出，其未完成的任务重新分配，默认 60')
+    parser.add_argument('--benchmark', action='store_true',
+                        help='离线基准测试：启动内置夹具站点，扫描 --bench-parallel × --bench-workers 组合，生成推荐配置')
+    parser.add_argument('--bench-parallel', type=str, default='2,4,8,12,16',
+                        help='基准测试扫描的并行数，逗号分隔，默认 2,4,8,12,16')
+    parser.add_argument('--bench-workers', type=str, default='1,2,4',
+                        help='基准测试扫描的分片进程数，逗号分隔，默认 1,2,4（超过 CPU 核数的值会被跳过）')
+    parser.add_argument('--bench-memory-limit', type=int, default=None, metavar='MB',
+                        help='推荐配置允许的峰值内存（MB），默认为物理内存的 70%%')
+    # 仅供库接口使用的选项：截图不写盘，直接在结果中返回编码后的图片字节
+    parser.set_defaults(return_bytes=False)
+    return parser
+
+
+def default_options(**overrides) -> argparse.Namespace:
+    """返回全部默认选项，可用关键字参数覆盖（名称与命令行参数的 dest 相同，如 full_page=True）"""
+    options = build_parser().parse_args([])
+    for name, value in overrides.items():
+        if not hasattr(options, name):
+            raise TypeError(f"未知的选项: {name}")
+        setattr(options, name, value)
+    return options
@@ -0,0 +1,179 @@
+"""预算规划（--budget）
+
+不启动浏览器，按历史耗时估算每个 (页面, 设备) 任务的成本，按覆盖价值挑选能在预算内完成的子集：
+任务的价值是它新增的覆盖（页面、布局断点、设备类型、横竖屏），内容有变化的页面价值加倍；
+每一步选择“新增价值 / 耗时”最高的任务（覆盖价值只会随已选任务增加而减少，可以惰性更新）。
+"""
+
+import bisect
+import heapq
+import json
+import os
+from datetime import datetime
+
+# 布局断点（CSS 像素），与 app/theme-provider.tsx 中的 MUI 断点一致；
+# 移动端 / 桌面端布局由 UA 决定（DeviceProvider），单独作为一个维度
+PLANNER_BREAKPOINTS = (600, 960, 1536, 1920, 2560)
+
+# 各覆盖维度的价值：同一页面上第一次覆盖该维度的取值时获得
+PLANNER_WEIGHTS = (("page", 10.0), ("breakpoint", 6.0), ("device_type", 4.0), ("orientation", 2.0), ("device", 0.5))
+
+# 内容有变化（指纹与上次截图时不同，或从未截图）的页面的价值倍数
+PLANNER_CHANGED_MULTIPLIER = 3.0
+
+# 预留给浏览器启动、指纹探测等的固定开销（秒）
+PLANNER_OVERHEAD_SECONDS = 15
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+
+
+def coverage_features(device_conf, target):
+    """任务覆盖的 (维度, 取值)，取值都限定在所属页面内"""
+    page_name = target["name"]
+    layout = "mobile" if device_conf["is_mobile"] else "desktop"
+    bucket = bisect.bisect_right(PLANNER_BREAKPOINTS, device_conf["width"])
+    device_type = device_conf.get("device_type", "unknown")
+    orientation = "landscape" if device_conf["width"] > device_conf["height"] else "portrait"
+    return {
+        "page": page_name,
+        "breakpoint": (page_name, layout, bucket),
+        "device_type": (page_name, device_type),
+        "orientation": (page_name, device_type, orientation),
+        "device": (page_name, device_conf["name"]),
+    }
+
+
+def changed_pages(devices, targets, manifest, fingerprint_of):
+    """内容有变化的页面：任一设备的 View 截图指纹与本次探测结果不同，或还没有截图记录
+
+    fingerprint_of(device_conf, target) 返回本次探测到的指纹；没有探测到指纹的页面无法判断，视为未变化。
+    """
+    changed = set()
+    for target in targets:
+        for device_conf in devices:
+            fingerprint = fingerprint_of(device_conf, target)
+            if fingerprint is None:
+                continue
+            if manifest is None or manifest.fingerprint(target["url"], device_conf, "View") != fingerprint:
+                changed.add(target["name"])
+                break
+    return changed
+
+
+def plan_budget(devices, targets, timings, budget: float, concurrency: int, is_done, changed=()):
+    """挑选能在 budget 秒内完成的任务，返回计划字典（selected / left_out 为任务列表）
+
+    is_done(device_conf, target) 为 True 的任务已是最新，不参与规划；changed 为内容有变化的页面名。
+    """
+    changed = set(changed)
+    candidates = []
+    done = 0
+    for target in targets:
+        for device_conf in devices:
+            if is_done(device_conf, target):
+                done += 1
+                continue
+            key = timings.key(target["name"], device_conf["name"])
+            candidates.append({
+                "page": target["name"], "device": device_conf["name"],
+                "cost": timings.expected(target["name"], device_conf["name"]),
+                "known": key in timings.entries,
+                "features": coverage_features(device_conf, target),
+                "multiplier": PLANNER_CHANGED_MULTIPLIER if target["name"] in changed else 1.0,
+            })
+
+    # 每个任务的耗时是在 concurrency 个任务并发时测得的，墙钟时间约为总耗时 / 并发数
+    capacity = max(0.0, budget - PLANNER_OVERHEAD_SECONDS) * concurrency
+    covered = set()
+
+    def gain(candidate):
+        features = candidate["features"]
+        value = sum(weight for name, weight in PLANNER_WEIGHTS if (name, features[name]) not in covered)
+        return value * candidate["multiplier"]
+
+    heap = [(-gain(c) / max(c["cost"], 0.1), index, 0) for index, c in enumerate(candidates)]
+    heapq.heapify(heap)
+    selected = []
+    used = 0.0
+    while heap:
+        _, index, stamp = heapq.heappop(heap)
+        candidate = candidates[index]
+        if used + candidate["cost"] > capacity:
+            continue
+        if stamp != len(selected):
+            # 上次计算价值之后又选中了其他任务，重新计算后放回
+            heapq.heappush(heap, (-gain(candidate) / max(candidate["cost"], 0.1), index, len(selected)))
+            continue
+        candidate["value"] = round(gain(candidate), 2)
+        selected.append(candidate)
+        used += candidate["cost"]
+        covered.update((name, candidate["features"][name]) for name, _ in PLANNER_WEIGHTS)
+
+    chosen = {(c["page"], c["device"]) for c in selected}
+    left_out = [c for c in candidates if (c["page"], c["device"]) not in chosen]
+    return {
+        "budget": budget, "concurrency": concurrency, "capacity": capacity, "done": done,
+        "changed_pages": sorted(changed), "candidates": candidates, "selected": selected, "left_out": left_out,
+        "covered": covered,
+    }
+
+
+def print_budget_plan(plan, output_path: str):
+    """输出计划摘要和未执行的任务（按页面分组），并写入 output_path（budget_plan.json）"""
+    candidates, selected, left_out = plan["candidates"], plan["selected"], plan["left_out"]
+    total_cost = sum(c["cost"] for c in candidates)
+    selected_cost = sum(c["cost"] for c in selected)
+    concurrency = plan["concurrency"]
+    known = sum(1 for c in candidates if c["known"])
+
+    def dimension_coverage(name):
+        values = {c["features"][name] for c in candidates}
+        return f"{len({v for v in values if (name, v) in plan['covered']})}/{len(values)}"
+
+    print(f"🧮 预算规划: 预算 {format_duration(plan['budget'])}，并发 {concurrency}"
+          f"（预留启动开销 {PLANNER_OVERHEAD_SECONDS}s）")
+    print(f"   候选 {len(candidates)} 项（另有 {plan['done']} 项已是最新），历史耗时覆盖 {known} 项，"
+          f"全部执行约需 {format_duration(total_cost / concurrency + PLANNER_OVERHEAD_SECONDS)}")
+    if plan["changed_pages"]:
+        names = ", ".join(plan["changed_pages"][:10])
+        more = f" 等 {len(plan['changed_pages'])} 个" if len(plan["changed_pages"]) > 10 else ""
+        print(f"   内容有变化的页面（优先）: {names}{more}")
+    print(f"   选中 {len(selected)} 项，预计 {format_duration(selected_cost / concurrency + PLANNER_OVERHEAD_SECONDS)}；"
+          f"覆盖页面 {dimension_coverage('page')}，断点 {dimension_coverage('breakpoint')}，"
+          f"设备类型 {dimension_coverage('device_type')}，横竖屏 {dimension_coverage('orientation')}")
+    if left_out:
+        by_page = {}
+        for c in left_out:
+            by_page.setdefault(c["page"], []).append(c["device"])
+        print(f"   未执行 {len(left_out)} 项（约 {format_duration(sum(c['cost'] for c in left_out) / concurrency)}），"
+              f"之后可使用 --resume 补齐:")
+        for page_name, device_names in sorted(by_page.items(), key=lambda item: -len(item[1]))[:20]:
+            names = ", ".join(device_names[:4]) + (f" 等 {len(device_names)} 个设备" if len(device_names) > 4 else "")
+            print(f"     - {page_name}: {names}")
+        if len(by_page) > 20:
+            print(f"     ... 另有 {len(by_page) - 20} 个页面")
+
+    def job_record(c):
+        return {"page": c["page"], "device": c["device"], "expected_seconds": round(c["cost"], 2),
+                "estimated": not c["known"], "value": c.get("value")}
+
+    report = {
+        "generated_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "budget_seconds": plan["budget"],
+        "concurrency": concurrency,
+        "estimated_seconds": round(selected_cost / concurrency + PLANNER_OVERHEAD_SECONDS, 1),
+        "changed_pages": plan["changed_pages"],
+        "selected": [job_record(c) for c in selected],
+        "left_out": [job_record(c) for c in left_out],
+    }
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"📝 计划: {output_path}")
@@ -0,0 +1,285 @@
+"""截图审阅报告：页面 × 设备网格的静态 HTML
+
+扫描截图目录中的 <页面>/<设备>_View_<宽>x<高>.<扩展名>，按设备类型（pc / tablet / phone / mobile）
+分组生成网格，每格显示 View 截图的缩略图并链接到原图（及 Full Page 截图）。
+
+缩略图在进程池中生成，按源文件内容哈希缓存在 .thumbs/ 中：文件大小和修改时间未变时
+不重新计算哈希，哈希未变时不重新缩放，只有新增或变化的截图需要处理。
+缩略图使用 loading="lazy" 并写明尺寸，上千张截图的报告也能立即打开。依赖 Pillow。
+"""
+
+import hashlib
+import html
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+try:
+    from PIL import Image
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
+SCREENSHOT_PATTERN = re.compile(r"^(?P<device>.+)_(?P<kind>View|Full)_(?P<width>\d+)x(?P<height>\d+)\.(png|jpg|webp)$")
+
+# 报告中设备类型的分组顺序
+DEVICE_TYPE_ORDER = ["pc", "tablet", "phone", "mobile", "unknown"]
+DEVICE_TYPE_LABELS = {"pc": "桌面", "tablet": "平板", "phone": "手机", "mobile": "移动设备", "unknown": "未知设备"}
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def make_thumbnail(source: str, thumb_path: str, size: int):
+    """生成缩略图（在进程池中执行），限制在 size × 1.5size 内，返回 (宽, 高)"""
+    with Image.open(source) as image:
+        image.draft("RGB", (size, size * 3 // 2))
+        image = image.convert("RGB")
+        image.thumbnail((size, size * 3 // 2), Image.LANCZOS)
+        tmp_path = thumb_path + ".tmp"
+        image.save(tmp_path, format="JPEG", quality=75, optimize=True)
+        os.replace(tmp_path, thumb_path)
+        return image.size
+
+
+class ThumbnailIndex:
+    """缩略图缓存索引 .thumbs/index.json
+
+    files:  {截图相对路径: {"size", "mtime_ns", "hash"}}，文件未变时直接复用哈希
+    thumbs: {缩略图文件名: [宽, 高]}
+    """
+
+    def __init__(self, thumb_dir: str):
+        self.thumb_dir = thumb_dir
+        self.path = os.path.join(thumb_dir, "index.json")
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        self.files = data.get("files", {})
+        self.thumbs = {name: tuple(size) for name, size in data.get("thumbs", {}).items()}
+
+    def digest(self, output_dir: str, relative: str) -> str:
+        stat = os.stat(os.path.join(output_dir, relative))
+        entry = self.files.get(relative)
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return entry["hash"]
+        digest = file_digest(os.path.join(output_dir, relative))
+        self.files[relative] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": digest}
+        return digest
+
+    def has(self, name: str) -> bool:
+        return name in self.thumbs and os.path.exists(os.path.join(self.thumb_dir, name))
+
+    def prune(self, used_files, used_thumbs):
+        """删除已不存在的截图记录和不再引用的缩略图"""
+        self.files = {relative: entry for relative, entry in self.files.items() if relative in used_files}
+        for name in list(self.thumbs):
+            if name not in used_thumbs:
+                del self.thumbs[name]
+                try:
+                    os.remove(os.path.join(self.thumb_dir, name))
+                except OSError:
+                    pass
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"files": self.files, "thumbs": self.thumbs}, f, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def scan_screenshots(output_dir: str):
+    """扫描截图目录，返回 {页面名: {设备名: {"View": 相对路径, "Full": 相对路径, "size": "宽x高"}}}"""
+    pages = {}
+    for page_name in sorted(os.listdir(output_dir)):
+        page_dir = os.path.join(output_dir, page_name)
+        if page_name.startswith(".") or not os.path.isdir(page_dir):
+            continue
+        for filename in os.listdir(page_dir):
+            match = SCREENSHOT_PATTERN.match(filename)
+            if not match:
+                continue
+            cell = pages.setdefault(page_name, {}).setdefault(match.group("device"), {})
+            cell[match.group("kind")] = f"{page_name}/{filename}"
+            cell["size"] = f"{match.group('width')}x{match.group('height')}"
+    return pages
+
+
+def load_layout_groups(output_dir: str, page_name: str):
+    """读取布局去重分组，返回 {被代表的设备: 代表设备}"""
+    try:
+        with open(os.path.join(output_dir, page_name, "layout_groups.json"), "r", encoding="utf-8") as f:
+            groups = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return {device: representative for representative, group in groups.items() for device in group["stands_for"]}
+
+
+def load_diff_failures(output_dir: str):
+    """读取视觉对比报告中失败的截图 {相对路径: 热力图相对路径}"""
+    try:
+        with open(os.path.join(output_dir, "diff_report.json"), "r", encoding="utf-8") as f:
+            report = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return {result["file"].replace(os.sep, "/"): (result.get("heatmap") or "").replace(os.sep, "/")
+            for result in report.get("results", []) if result.get("status") == "fail" and result.get("file")}
+
+
+def build_report(output_dir: str, devices, page_order=None, thumb_size: int = 240, workers=None, log=print):
+    """生成 output_dir/report.html，返回报告路径
+
+    devices 为设备配置列表，用于确定设备类型和列顺序；不在列表中的设备归入 unknown。
+    page_order 为优先排列的页面名，其余页面按名称排序。
+    """
+    if not HAS_PIL:
+        raise RuntimeError("生成审阅报告需要 Pillow，请执行: pip install pillow")
+    started_at = time.time()
+    thumb_dir = os.path.join(output_dir, ".thumbs")
+    os.makedirs(thumb_dir, exist_ok=True)
+
+    pages = scan_screenshots(output_dir)
+    layout_groups = {page_name: load_layout_groups(output_dir, page_name) for page_name in pages}
+    order = {name: index for index, name in enumerate(page_order or [])}
+    page_names = sorted(pages, key=lambda name: (order.get(name, len(order)), name))
+
+    # 列：出现过截图的设备，按类型分组、组内按宽度排序
+    device_confs = {device["name"]: device for device in devices}
+    columns = {}
+    for page_name in page_names:
+        for device_name, cell in pages[page_name].items():
+            columns.setdefault(device_name, cell["size"])
+        for device_name in layout_groups[page_name]:
+            if device_name in device_confs:
+                conf = device_confs[device_name]
+                columns.setdefault(device_name, f"{conf['width']}x{conf['height']}")
+    groups = {}
+    for device_name, size in columns.items():
+        device_type = device_confs.get(device_name, {}).get("device_type", "unknown")
+        groups.setdefault(device_type, []).append((int(size.split("x")[0]), int(size.split("x")[1]), device_name))
+
+    # 缩略图：只处理新增或内容变化的截图
+    index = ThumbnailIndex(thumb_dir)
+    thumbs, todo = {}, {}
+    for page_name, devices_on_page in pages.items():
+        for cell in devices_on_page.values():
+            if "View" not in cell:
+                continue
+            name = f"{index.digest(output_dir, cell['View'])}_{thumb_size}.jpg"
+            thumbs[cell["View"]] = name
+            if not index.has(name):
+                todo[name] = cell["View"]
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                name: executor.submit(make_thumbnail, os.path.join(output_dir, relative),
+                                      os.path.join(thumb_dir, name), thumb_size)
+                for name, relative in todo.items()
+            }
+            for name, future in futures.items():
+                try:
+                    index.thumbs[name] = future.result()
+                except Exception as e:
+                    log(f"  ⚠️ 缩略图生成失败: {todo[name]} ({e})")
+    index.prune(set(thumbs), set(thumbs.values()))
+    index.save()
+
+    diff_failures = load_diff_failures(output_dir)
+    report_path = os.path.join(output_dir, "report.html")
+    tmp_path = report_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(render_report(page_names, pages, groups, layout_groups, thumbs, index.thumbs, diff_failures))
+    os.replace(tmp_path, report_path)
+
+    log(f"🖼️  审阅报告: {report_path}（{len(page_names)} 个页面 × {len(columns)} 个设备，"
+        f"新生成缩略图 {len(todo)} 张，复用 {len(thumbs) - len(todo)} 张，耗时 {time.time() - started_at:.1f}s）")
+    return report_path
+
+
+REPORT_STYLE = """
+body { font-family: -apple-system, "PingFang SC", "Microsoft YaHei", sans-serif; margin: 16px; color: #222; }
+nav a { margin-right: 12px; }
+.grid { overflow-x: auto; margin-bottom: 32px; }
+table { border-collapse: collapse; }
+th, td { border: 1px solid #ddd; padding: 4px; vertical-align: top; text-align: center; font-size: 12px; }
+thead th { position: sticky; top: 0; background: #fafafa; z-index: 1; white-space: nowrap; }
+tbody th { position: sticky; left: 0; background: #fafafa; text-align: left; white-space: nowrap; }
+td img { display: block; background: #f0f0f0; }
+td.fail { outline: 3px solid #d32f2f; outline-offset: -3px; }
+td.missing, td.deduped { color: #999; }
+.links { margin-top: 2px; }
+"""
+
+
+def render_report(page_names, pages, groups, layout_groups, thumbs, thumb_sizes, diff_failures) -> str:
+    """渲染报告 HTML：每个设备类型一张页面 × 设备表格"""
+    escape = html.escape
+    group_types = sorted(groups, key=lambda t: DEVICE_TYPE_ORDER.index(t) if t in DEVICE_TYPE_ORDER else len(DEVICE_TYPE_ORDER))
+    total = sum(len(cells) for cells in pages.values())
+    parts = [
+        "<!DOCTYPE html>",
+        '<html lang="zh-CN"><head><meta charset="utf-8">',
+        "<title>响应式截图审阅报告</title>",
+        f"<style>{REPORT_STYLE}</style></head><body>",
+        "<h1>响应式截图审阅报告</h1>",
+        f"<p>生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}，{len(page_names)} 个页面，{total} 组截图"
+        f"{f'，视觉对比失败 {len(diff_failures)} 张（红框）' if diff_failures else ''}</p>",
+        "<nav>" + "".join(
+            f'<a href="#{escape(t)}">{escape(DEVICE_TYPE_LABELS.get(t, t))} ({len(groups[t])})</a>' for t in group_types
+        ) + "</nav>",
+    ]
+    for device_type in group_types:
+        columns = sorted(groups[device_type], reverse=True)
+        parts.append(f'<h2 id="{escape(device_type)}">{escape(DEVICE_TYPE_LABELS.get(device_type, device_type))}</h2>')
+        parts.append('<div class="grid"><table><thead><tr><th>页面</th>')
+        for width, height, device_name in columns:
+            parts.append(f"<th>{escape(device_name)}<br>{width}x{height}</th>")
+        parts.append("</tr></thead><tbody>")
+        for page_name in page_names:
+            parts.append(f"<tr><th>{escape(page_name)}</th>")
+            for _, _, device_name in columns:
+                parts.append(render_cell(pages.get(page_name, {}).get(device_name), layout_groups[page_name].get(device_name),
+                                         thumbs, thumb_sizes, diff_failures))
+            parts.append("</tr>")
+        parts.append("</tbody></table></div>")
+    parts.append("</body></html>")
+    return "\n".join(parts)
+
+
+def render_cell(cell, representative, thumbs, thumb_sizes, diff_failures) -> str:
+    escape = html.escape
+    if cell is None:
+        if representative:
+            return f'<td class="deduped">🔗 同<br>{escape(representative)}</td>'
+        return '<td class="missing">—</td>'
+    links = []
+    image = ""
+    failed = any(cell.get(kind) in diff_failures for kind in ("View", "Full"))
+    if "View" in cell:
+        name = thumbs.get(cell["View"])
+        if name in thumb_sizes:
+            width, height = thumb_sizes[name]
+            image = (f'<a href="{escape(cell["View"])}" target="_blank">'
+                     f'<img loading="lazy" decoding="async" src=".thumbs/{escape(name)}" width="{width}" height="{height}" '
+                     f'alt="{escape(cell["View"])}"></a>')
+        else:
+            links.append(f'<a href="{escape(cell["View"])}" target="_blank">View</a>')
+    if "Full" in cell:
+        links.append(f'<a href="{escape(cell["Full"])}" target="_blank">Full</a>')
+    for kind in ("View", "Full"):
+        heatmap = diff_failures.get(cell.get(kind))
+        if heatmap:
+            links.append(f'<a href="{escape(heatmap)}" target="_blank">{kind} 差异</a>')
+    cell_class = ' class="fail"' if failed else ""
+    links_html = '<div class="links">' + " · ".join(links) + "</div>" if links else ""
+    return f"<td{cell_class}>{image}{links_html}</td>"
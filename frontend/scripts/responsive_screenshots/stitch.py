@@ -0,0 +1,173 @@
+"""分块全长截图的拼接写盘
+
+超长页面的 Full Page 截图按视口高度逐块截取，每块解码后立即追加到输出：
+
+- png：流式写入。每行像素经 zlib 压缩后按 IDAT 块写出，IHDR 中的高度在结束时回填；
+- jpeg / webp：解码后的像素行追加到临时文件，结束时通过 mmap 交给 Pillow 编码，
+  像素数据由文件页承载，内存紧张时可以被系统换出。
+
+内存占用只与单块大小有关，与页面长度无关。依赖 Pillow 解码浏览器返回的 PNG。
+"""
+
+import io
+import mmap
+import os
+import struct
+import tempfile
+import zlib
+
+try:
+    from PIL import Image
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# 各格式支持的最大高度（像素）
+MAX_HEIGHT = {"png": 2 ** 31 - 1, "jpeg": 65535, "webp": 16383}
+
+# IDAT 块大小：压缩数据累积到该大小时写出一个块
+IDAT_CHUNK_SIZE = 256 * 1024
+
+
+def png_chunk(chunk_type: bytes, data: bytes) -> bytes:
+    crc = zlib.crc32(chunk_type + data) & 0xFFFFFFFF
+    return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", crc)
+
+
+def png_ihdr(width: int, height: int) -> bytes:
+    """8 位 RGB、无隔行扫描的 IHDR 块"""
+    return png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+
+
+class TileStitcher:
+    """把自上而下的截图块拼接为一张图片
+
+    add_tile 在写盘线程池中逐块调用（按顺序，同一时刻只有一个），finish 返回文件路径，
+    keep_bytes 时不写盘并返回图片字节。出错或放弃时调用 abort 清理临时文件。
+    """
+
+    def __init__(self, path: str, image_format: str, quality: int, compress_level, keep_bytes: bool = False):
+        if not HAS_PIL:
+            raise RuntimeError("分块全长截图需要 Pillow，请执行: pip install pillow")
+        self.path = path
+        self.image_format = image_format
+        self.quality = quality
+        self.compress_level = 6 if compress_level is None else compress_level
+        self.keep_bytes = keep_bytes
+        self.width = None
+        self.height = 0
+        self.output = None
+        self.compressor = None
+        self.pending = []
+        self.pending_size = 0
+        # jpeg / webp 的像素暂存：RGBX / RGBA 可以被 Pillow 直接共享，不会再复制一份完整位图
+        self.raw_mode = "RGBX" if image_format == "jpeg" else "RGBA"
+        self.raw_file = None
+
+    def add_tile(self, data: bytes, skip_rows: int, take_rows: int):
+        """追加一块截图：跳过顶部 skip_rows 行（与上一块重叠的部分），取其后 take_rows 行"""
+        tile = Image.open(io.BytesIO(data))
+        if self.width is None:
+            self._start(tile.width)
+        elif tile.width != self.width:
+            raise ValueError(f"截图块宽度不一致: {tile.width} != {self.width}")
+        take_rows = min(take_rows, tile.height - skip_rows)
+        if take_rows <= 0:
+            return
+        if self.height + take_rows > MAX_HEIGHT[self.image_format]:
+            raise ValueError(f"{self.image_format} 最大高度为 {MAX_HEIGHT[self.image_format]} 像素，"
+                             f"页面过长，请改用 --format png")
+        tile = tile.crop((0, skip_rows, self.width, skip_rows + take_rows))
+
+        if self.image_format == "png":
+            raw = tile.convert("RGB").tobytes()
+            stride = self.width * 3
+            # 每行前加过滤类型 0（None）
+            rows = b"".join(b"\x00" + raw[offset:offset + stride] for offset in range(0, len(raw), stride))
+            self._write_idat(self.compressor.compress(rows))
+        else:
+            self.raw_file.write(tile.convert(self.raw_mode).tobytes())
+        self.height += take_rows
+
+    def finish(self):
+        """结束拼接并写出文件，返回文件路径（keep_bytes 时返回图片字节）"""
+        try:
+            return self._finish()
+        except BaseException:
+            self.abort()
+            raise
+
+    def _finish(self):
+        if not self.height:
+            raise ValueError("没有截到任何截图块")
+        if self.image_format == "png":
+            self._write_idat(self.compressor.flush(), force=True)
+            self.output.write(png_chunk(b"IEND", b""))
+            # 回填 IHDR 中的实际高度
+            self.output.seek(len(PNG_SIGNATURE))
+            self.output.write(png_ihdr(self.width, self.height))
+        else:
+            self._encode_from_raw()
+
+        if self.keep_bytes:
+            data = self.output.getvalue()
+            self.output = None
+            return data
+        self.output.close()
+        self.output = None
+        os.replace(self.path + ".tmp", self.path)
+        return self.path
+
+    def abort(self):
+        if self.raw_file is not None:
+            self.raw_file.close()
+            self.raw_file = None
+        if self.output is not None and not self.keep_bytes:
+            self.output.close()
+            remove_quietly(self.path + ".tmp")
+        self.output = None
+
+    def _start(self, width: int):
+        self.width = width
+        # 先写临时文件再原子替换，中断时不会留下被断点续传误认为已完成的半截文件
+        self.output = io.BytesIO() if self.keep_bytes else open(self.path + ".tmp", "wb")
+        if self.image_format == "png":
+            self.output.write(PNG_SIGNATURE)
+            self.output.write(png_ihdr(width, 0))
+            self.compressor = zlib.compressobj(self.compress_level)
+        else:
+            self.raw_file = tempfile.TemporaryFile(prefix="screenshot-tiles-")
+
+    def _write_idat(self, data: bytes, force: bool = False):
+        if data:
+            self.pending.append(data)
+            self.pending_size += len(data)
+        if self.pending_size >= IDAT_CHUNK_SIZE or (force and self.pending_size):
+            self.output.write(png_chunk(b"IDAT", b"".join(self.pending)))
+            self.pending = []
+            self.pending_size = 0
+
+    def _encode_from_raw(self):
+        self.raw_file.flush()
+        try:
+            with mmap.mmap(self.raw_file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                image = Image.frombuffer(self.raw_mode, (self.width, self.height), buffer,
+                                         "raw", self.raw_mode, 0, 1)
+                if self.image_format == "jpeg":
+                    # 不使用 optimize：它需要缓冲整张图片的编码数据
+                    image.save(self.output, format="JPEG", quality=self.quality)
+                else:
+                    image.save(self.output, format="WEBP", quality=self.quality, method=4)
+                del image
+        finally:
+            self.raw_file.close()
+            self.raw_file = None
+
+
+def remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
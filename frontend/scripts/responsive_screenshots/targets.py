@@ -0,0 +1,75 @@
+"""测试页面列表：默认页面和 -url 参数的解析"""
+
+from urllib.parse import urlparse
+
+# 默认测试站点
+DEFAULT_SITE_URL = "https://cxk.fohuifayu.com/"
+
+
+def default_targets():
+    """内置的默认测试页面列表 [{"name": 页面名, "url": URL}]"""
+    targets = []
+    # 默认测试列表
+    # 1. 首页
+    targets.append({"name": "Home", "url": DEFAULT_SITE_URL})
+
+    # 2. 课程页面 (1-6)
+    for i in range(1, 7):
+        targets.append({"name": f"Course_{i}", "url": f"{DEFAULT_SITE_URL}course/{i}"})
+
+    targets.append({"name": "Course_2_1", "url": f"{DEFAULT_SITE_URL}course/2/lesson1"})
+
+    # 3. 问答页面 (1-3)
+    for i in range(1, 4):
+        targets.append({"name": f"QA_{i}", "url": f"{DEFAULT_SITE_URL}qa/{i}"})
+
+    targets.append({"name": "Qa_2_1", "url": f"{DEFAULT_SITE_URL}qa/2/lesson5?tab=question1"})
+
+    # 4. 参考资料页面 (1-6)
+    for i in range(1, 6):
+        targets.append({"name": f"Reference_{i}", "url": f"{DEFAULT_SITE_URL}reference/{i}"})
+
+    targets.append({"name": "Reference_3_5", "url": f"{DEFAULT_SITE_URL}reference/3/lesson5"})
+
+    # 5. 下载页面
+    targets.append({"name": "Download", "url": f"{DEFAULT_SITE_URL}download"})
+
+    return targets
+
+
+def normalize_url(raw_url: str) -> str:
+    """补全协议（本地开发通常使用 http://）"""
+    url = raw_url.strip()
+    if not url.startswith('http://') and not url.startswith('https://'):
+        # 如果是 localhost 或 127.0.0.1，使用 http://，否则使用 https://
+        if 'localhost' in url or '127.0.0.1' in url:
+            url = 'http://' + url
+        else:
+            url = 'https://' + url
+    return url
+
+
+def page_name_for_url(url: str) -> str:
+    """简单的命名生成逻辑（只使用路径，不包含域名，避免 localhost:3000 等特殊字符问题）"""
+    # 只使用路径部分，替换特殊字符为安全字符；路径为空时使用根路径标识
+    path = urlparse(url).path.strip('/').replace('/', '_')
+    return path or "root"
+
+
+def build_targets(urls):
+    """把 URL 字符串（或已包含 name/url 的字典）转换为页面列表"""
+    targets = []
+    for item in urls:
+        if isinstance(item, dict):
+            targets.append(dict(item))
+            continue
+        if not item.strip():
+            continue
+        url = normalize_url(item)
+        targets.append({"name": page_name_for_url(url), "url": url})
+    return targets
+
+
+def parse_url_argument(value: str):
+    """解析 -url 参数：多个 URL 用分号 ; 分隔"""
+    return build_targets(value.split(';'))
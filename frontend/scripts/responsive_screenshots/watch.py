@@ -0,0 +1,190 @@
+"""前端源码的导入关系图（--watch）
+
+监听模式下，保存一个组件后只需要重新截图用到它的页面。这里用正则解析 app 目录下源码的
+import / export ... from / require / 动态 import / CSS @import，建立反向依赖图，
+从改动的文件沿导入方向向上查找，直到 page / layout / template 这些路由入口文件。
+
+桶文件（如 components/shared/index.ts 只做重新导出）按导出名传递：修改 TitleBanner.tsx
+只影响从桶文件导入了 TitleBanner 的模块，而不是所有导入过这个桶文件的模块。
+解析是保守的：无法判断用到哪些导出（命名空间导入、副作用导入、动态导入）时视为用到全部导出。
+"""
+
+import os
+import re
+
+# 参与依赖分析的源码扩展名，按解析导入路径时尝试的顺序排列
+SOURCE_EXTENSIONS = (".tsx", ".ts", ".jsx", ".js", ".mjs", ".css", ".scss")
+
+# 不扫描的目录
+IGNORED_DIRS = ("node_modules", ".next", "__tests__", "__mocks__")
+
+# 路由入口文件：所在目录（page）或祖先目录（layout / template / head）中的这些文件决定页面的渲染结果
+PAGE_ENTRY_NAMES = ("page",)
+LAYOUT_ENTRY_NAMES = ("layout", "template", "head")
+
+_BLOCK_COMMENT = re.compile(r"/\*[\s\S]*?\*/")
+_LINE_COMMENT = re.compile(r"(^|[^:\\'\"`])//[^\n]*")
+_IMPORT_FROM = re.compile(r"\bimport\s+(type\s+)?([\w\s{},*$]+?)\s+from\s*['\"]([^'\"]+)['\"]")
+_SIDE_EFFECT_IMPORT = re.compile(r"\bimport\s*['\"]([^'\"]+)['\"]")
+_EXPORT_FROM = re.compile(r"\bexport\s+(type\s+)?(\*(?:\s+as\s+[\w$]+)?|\{[^}]*\})\s+from\s*['\"]([^'\"]+)['\"]")
+_DYNAMIC_IMPORT = re.compile(r"\b(?:import|require)\(\s*['\"]([^'\"]+)['\"]\s*\)")
+_CSS_IMPORT = re.compile(r"@import\s+(?:url\()?\s*['\"]([^'\"]+)['\"]")
+
+
+def scan_sources(root: str):
+    """返回目录下全部源码文件的修改时间 {绝对路径: mtime}"""
+    sources = {}
+    for directory, dirs, files in os.walk(os.path.normpath(root)):
+        dirs[:] = [d for d in dirs if d not in IGNORED_DIRS and not d.startswith(".")]
+        for name in files:
+            if not name.endswith(SOURCE_EXTENSIONS):
+                continue
+            path = os.path.join(directory, name)
+            try:
+                sources[path] = os.path.getmtime(path)
+            except OSError:
+                continue
+    return sources
+
+
+def _parse_import_names(clause: str):
+    """import 子句中用到的导出名，命名空间导入返回 None（全部导出）"""
+    clause = clause.strip()
+    if "*" in clause:
+        return None
+    names = set()
+    braces = re.search(r"\{([^}]*)\}", clause)
+    default = clause[:braces.start()] if braces else clause
+    if default.strip(" ,"):
+        names.add("default")
+    if braces:
+        for item in braces.group(1).split(","):
+            words = item.split()
+            if words and words[0] == "type":
+                continue
+            if words:
+                names.add(words[0])
+    return names
+
+
+def _parse_export_names(clause: str):
+    """export ... from 子句：返回 {导出名: 来源模块中的名字}；export * 返回 None，export * as ns 返回 {ns: None}"""
+    clause = clause.strip()
+    if clause.startswith("*"):
+        alias = re.match(r"\*\s+as\s+([\w$]+)", clause)
+        return {alias.group(1): None} if alias else None
+    mapping = {}
+    for item in clause.strip("{}").split(","):
+        words = item.split()
+        if not words or words[0] == "type":
+            continue
+        mapping[words[-1] if len(words) == 3 and words[1] == "as" else words[0]] = words[0]
+    return mapping
+
+
+def parse_imports(text: str, is_css: bool = False):
+    """解析源码中的依赖，返回 [(模块路径, 种类, 名字)]
+
+    种类为 "import"（名字为用到的导出名集合，None 表示全部）或 "reexport"
+    （名字为 {导出名: 来源名} 映射，None 表示 export *）。
+    """
+    if is_css:
+        return [(spec, "import", None) for spec in _CSS_IMPORT.findall(_BLOCK_COMMENT.sub("", text))]
+    text = _LINE_COMMENT.sub(r"\1", _BLOCK_COMMENT.sub("", text))
+    found = []
+    for type_only, clause, spec in _IMPORT_FROM.findall(text):
+        # 只导入类型不影响渲染结果
+        if not type_only:
+            found.append((spec, "import", _parse_import_names(clause)))
+    for spec in _SIDE_EFFECT_IMPORT.findall(text):
+        found.append((spec, "import", None))
+    for type_only, clause, spec in _EXPORT_FROM.findall(text):
+        if not type_only:
+            found.append((spec, "reexport", _parse_export_names(clause)))
+    for spec in _DYNAMIC_IMPORT.findall(text):
+        found.append((spec, "import", None))
+    return found
+
+
+def resolve_import(spec: str, importer: str, alias_root: str, sources):
+    """把模块路径解析为 sources 中的文件；包导入或解析不到时返回 None
+
+    支持相对路径和 tsconfig 的 "@/*" 别名（相对 alias_root），依次尝试原路径、补扩展名和目录下的 index 文件。
+    """
+    if spec.startswith("@/"):
+        base = os.path.join(alias_root, spec[2:])
+    elif spec.startswith("."):
+        base = os.path.join(os.path.dirname(importer), spec)
+    else:
+        return None
+    base = os.path.normpath(base)
+    candidates = [base] + [base + ext for ext in SOURCE_EXTENSIONS]
+    candidates += [os.path.join(base, "index" + ext) for ext in SOURCE_EXTENSIONS]
+    for candidate in candidates:
+        if candidate in sources:
+            return candidate
+    return None
+
+
+class ImportGraph:
+    """源码文件之间的反向依赖图"""
+
+    def __init__(self, root: str, alias_root: str, sources=None):
+        self.root = root
+        self.sources = sources if sources is not None else scan_sources(root)
+        # 被导入文件 -> [(导入方, 种类, 名字)]
+        self.importers = {}
+        for path in self.sources:
+            try:
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    text = f.read()
+            except OSError:
+                continue
+            for spec, kind, names in parse_imports(text, is_css=path.endswith((".css", ".scss"))):
+                target = resolve_import(spec, path, alias_root, self.sources)
+                if target is not None and target != path:
+                    self.importers.setdefault(target, []).append((path, kind, names))
+
+    def affected(self, changed_paths):
+        """改动的文件及所有直接或间接用到其改动部分的文件，返回 {文件: 改动的导出名集合（None 为全部）}"""
+        state = {path: None for path in changed_paths}
+        pending = list(state)
+        while pending:
+            path = pending.pop()
+            changed = state[path]
+            for importer, kind, names in self.importers.get(path, ()):
+                if kind == "import":
+                    if changed is not None and names is not None and not (changed & names):
+                        continue
+                    exported = None
+                elif names is None:
+                    exported = changed
+                else:
+                    exported = {name for name, source in names.items()
+                                if changed is None or source is None or source in changed}
+                    if not exported:
+                        continue
+                if importer in state:
+                    previous = state[importer]
+                    if previous is None or (exported is not None and exported <= previous):
+                        continue
+                    exported = None if exported is None else previous | exported
+                state[importer] = exported
+                pending.append(importer)
+        return state
+
+
+def route_entry_files(route_dir: str, app_dir: str):
+    """渲染该路由目录下页面时用到的入口文件：本目录的 page，以及本目录和各级祖先目录的 layout / template / head"""
+    entries = []
+    directory = os.path.normpath(route_dir)
+    app_dir = os.path.normpath(app_dir)
+    names = PAGE_ENTRY_NAMES + LAYOUT_ENTRY_NAMES
+    while True:
+        for name in names:
+            entries.extend(os.path.join(directory, name + ext) for ext in SOURCE_EXTENSIONS)
+        if directory == app_dir or not directory.startswith(app_dir + os.sep):
+            break
+        directory = os.path.dirname(directory)
+        names = LAYOUT_ENTRY_NAMES
+    return entries
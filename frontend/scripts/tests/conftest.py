@@ -0,0 +1,9 @@
+"""截图工具的单元测试：只覆盖不需要浏览器的纯函数和数据结构
+
+在 frontend/scripts 目录下运行: python -m pytest -q tests
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
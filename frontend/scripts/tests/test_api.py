@@ -0,0 +1,143 @@
+import argparse
+import asyncio
+import os
+
+import pytest
+
+from responsive_screenshots import cli, engine
+from responsive_screenshots.api import CaptureResult, StreamReporter, capture, resolve_options
+from responsive_screenshots.options import default_options
+
+PHONE = {"name": "phone", "width": 390, "height": 844, "is_mobile": True, "has_touch": True}
+DESKTOP = {"name": "desktop", "width": 1280, "height": 800, "is_mobile": False, "has_touch": False}
+
+
+def collect(urls, devices=None, options=None):
+    async def consume():
+        return [result async for result in capture(urls, devices, options)]
+    return asyncio.run(consume())
+
+
+def test_default_options_rejects_unknown_names():
+    assert default_options(full_page=True).full_page is True
+    with pytest.raises(TypeError, match="fullpage"):
+        default_options(fullpage=True)
+
+
+def test_resolve_options_copies_namespaces():
+    assert vars(resolve_options(None)) == vars(default_options())
+    assert resolve_options({"format": "webp"}).format == "webp"
+    with pytest.raises(TypeError):
+        resolve_options({"no_such_option": 1})
+
+    original = default_options(quality=70)
+    resolved = resolve_options(original)
+    assert isinstance(resolved, argparse.Namespace) and resolved is not original
+    # capture() 会修改选项（workers、skip_existing），调用方传入的选项保持不变
+    resolved.quality = 10
+    assert original.quality == 70
+
+
+@pytest.mark.parametrize("overrides, name", [
+    ({"record": True}, "record"),
+    ({"replay": True}, "replay"),
+    ({"crawl": "localhost:3000"}, "crawl"),
+    ({"coordinator": "127.0.0.1:8765"}, "coordinator"),
+    ({"budget": 60}, "budget"),
+    ({"vitals": True}, "vitals"),
+    ({"compare_to": "baseline"}, "compare_to"),
+    ({"workers": 2}, "workers"),
+])
+def test_capture_rejects_cli_only_options(overrides, name):
+    with pytest.raises(ValueError, match=name):
+        collect(["localhost:3000/"], [PHONE], overrides)
+
+
+def fake_run_devices(calls):
+    async def run_devices(run, devices, reporter, timings):
+        calls.append(run)
+        for target in run.targets:
+            for device_conf in devices:
+                await asyncio.sleep(0)
+                view_path, _ = engine.screenshot_paths(run, device_conf, target["name"])
+                reporter.report("retrying", target["name"], device_conf["name"], "timeout")
+                reporter.report("captured", target["name"], device_conf["name"], elapsed=1.0,
+                                extra={"stages": {"navigate": 0.5}}, outputs={"View": view_path})
+    return run_devices
+
+
+def test_concurrent_captures_use_separate_runs(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(engine, "HAS_PLAYWRIGHT", True)
+    monkeypatch.setattr(engine, "run_devices", fake_run_devices(calls))
+
+    async def consume(output_dir, urls):
+        options = {"output_dir": str(output_dir), "no_tuning": True, "skip_existing": False}
+        return [result async for result in capture(urls, [PHONE, DESKTOP], options)]
+
+    async def both():
+        return await asyncio.gather(consume(tmp_path / "a", ["localhost:3000/"]),
+                                    consume(tmp_path / "b", ["localhost:3000/about", "localhost:3000/faq"]))
+
+    first, second = asyncio.run(both())
+    assert len(calls) == 2 and calls[0] is not calls[1]
+    # 重试不产出结果，每个 (页面, 设备) 只有一个最终结果
+    assert [(r.status, r.page, r.device_name) for r in first] == [("captured", "root", "phone"),
+                                                                  ("captured", "root", "desktop")]
+    assert {r.page for r in second} == {"about", "faq"} and len(second) == 4
+    assert first[0].files["View"].startswith(str(tmp_path / "a"))
+    assert first[0].stages == {"navigate": 0.5} and first[0].ok
+    # 各自保存耗时历史和截图清单
+    assert os.path.exists(calls[0].timings_path) and os.path.exists(calls[1].manifest_path)
+
+
+def test_stream_reporter_converts_results(tmp_path):
+    options = default_options(output_dir=str(tmp_path), no_tuning=True, full_page=True, format="webp")
+    run = engine.configure(options, devices=[PHONE], targets=[{"name": "home", "url": "https://example.com/"}])
+    results = asyncio.Queue()
+    reporter = StreamReporter(run, 2, results)
+    reporter.report("skipped", "home", "phone", "已存在")
+    reporter.report("failed", "home", "phone", "超时", extra={"error": "Timeout 15000ms", "error_class": "timeout"})
+
+    skipped, failed = results.get_nowait(), results.get_nowait()
+    # 跳过的任务返回已存在的截图路径
+    assert skipped.url == "https://example.com/"
+    assert skipped.files == {"View": str(tmp_path / "home" / "phone_View_390x844.webp"),
+                             "Full": str(tmp_path / "home" / "phone_Full_390x844.webp")}
+    assert not failed.ok and failed.files == {} and failed.error_class == "timeout"
+    assert reporter.counts["skipped"] == 1 and reporter.counts["failed"] == 1
+
+
+def test_capture_result_keeps_bytes_when_return_bytes(tmp_path):
+    run = engine.configure(default_options(output_dir=str(tmp_path), no_tuning=True, return_bytes=True),
+                           devices=[PHONE], targets=[])
+    result = CaptureResult("captured", "home", "https://example.com/", PHONE, outputs={"View": b"png"}, run=run)
+    assert result.images == {"View": b"png"} and result.files == {}
+
+
+@pytest.fixture
+def entry_points(monkeypatch):
+    """把引擎的各个入口替换为只记录调用的函数"""
+    calls = []
+    for name in ("capture_screenshots", "run_worker", "run_benchmark", "write_report", "run_vitals", "run_watch"):
+        monkeypatch.setattr(engine, name, lambda run, name=name: calls.append((name, run)))
+    return calls
+
+
+def test_cli_configures_a_run_and_dispatches(tmp_path, entry_points):
+    cli.main(["-url", "localhost:3000/course/1", "--DT", "pc", "--output-dir", str(tmp_path), "--no-tuning"])
+    (name, run), = entry_points
+    assert name == "capture_screenshots"
+    assert run.targets == [{"name": "course_1", "url": "http://localhost:3000/course/1"}]
+    assert run.devices and all(device["device_type"] == "pc" for device in run.devices)
+    assert run.output_dir == str(tmp_path) and run.args.parallel == 8
+
+    cli.main(["--benchmark", "--output-dir", str(tmp_path)])
+    assert entry_points[-1][0] == "run_benchmark"
+
+
+def test_cli_reports_invalid_options_as_usage_errors(entry_points, capsys):
+    with pytest.raises(SystemExit):
+        cli.main(["--plan-only"])
+    assert "--plan-only" in capsys.readouterr().err
+    assert entry_points == []
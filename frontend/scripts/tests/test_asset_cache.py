@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from responsive_screenshots.asset_cache import AssetCache, cache_lifetime
+
+HASHED = "https://example.com/_next/static/chunks/app-3f2a9c1d.js"
+PLAIN = "https://example.com/images/logo.png"
+
+
+@pytest.mark.parametrize("url, resource_type, status, headers, expected", [
+    (HASHED, "script", 200, {}, None),
+    (PLAIN, "image", 200, {"cache-control": "public, immutable"}, None),
+    (PLAIN, "image", 200, {"cache-control": "max-age=600"}, 600),
+    (PLAIN, "image", 200, {"cache-control": "max-age=60, s-maxage=120"}, 120),
+    (PLAIN, "image", 200, {}, 30),
+    (PLAIN, "image", 200, {"cache-control": "no-cache"}, 0),
+    ("https://example.com/", "document", 200, {"cache-control": "no-cache"}, 30),
+    ("https://example.com/", "document", 200, {"cache-control": "private"}, 0),
+    (HASHED, "script", 200, {"cache-control": "no-store"}, 0),
+    (HASHED, "script", 200, {"set-cookie": "id=1"}, 0),
+    (HASHED, "script", 200, {"vary": "*"}, 0),
+    (HASHED, "script", 304, {}, 0),
+])
+def test_cache_lifetime(url, resource_type, status, headers, expected):
+    assert cache_lifetime(url, resource_type, status, headers, 30) == expected
+
+
+def store(cache, url, size, variant="mobile", resource_type="image", headers=None):
+    return cache.store(url, variant, resource_type, 200, headers or {}, b"x" * size, 30)
+
+
+def lookup(cache, url, variant="mobile", resource_type="image"):
+    return asyncio.run(cache.lookup(url, variant, resource_type))
+
+
+def test_memory_layer_evicts_least_recently_used():
+    cache = AssetCache(memory_bytes=100)
+    store(cache, "https://example.com/a.png", 20)
+    store(cache, "https://example.com/b.png", 20)
+    store(cache, "https://example.com/c.png", 20)
+    # 访问 a 后 b 成为最久未使用的条目
+    assert lookup(cache, "https://example.com/a.png") is not None
+    store(cache, "https://example.com/d.png", 25)
+    store(cache, "https://example.com/e.png", 25)
+    assert list(cache.entries) == ["https://example.com/c.png", "https://example.com/a.png",
+                                   "https://example.com/d.png", "https://example.com/e.png"]
+    assert cache.used == 90
+    assert cache.stats["evicted"] == 1
+    assert lookup(cache, "https://example.com/b.png") is None
+
+
+def test_oversized_and_uncacheable_responses_are_not_stored():
+    cache = AssetCache(memory_bytes=100)
+    headers = store(cache, PLAIN, 26, headers={"Content-Length": "26", "Cache-Control": "max-age=60"})
+    assert "Content-Length" not in headers
+    store(cache, "https://example.com/private.png", 10, headers={"cache-control": "no-store"})
+    assert cache.entries == {}
+    assert cache.stats["uncacheable"] == 2
+    assert cache.stats["misses"] == 2
+
+
+def test_documents_are_cached_per_user_agent():
+    cache = AssetCache(memory_bytes=100)
+    store(cache, "https://example.com/", 10, variant="mobile", resource_type="document")
+    assert lookup(cache, "https://example.com/", "mobile", "document") is not None
+    assert lookup(cache, "https://example.com/", "desktop", "document") is None
+
+
+def test_evicted_entries_spill_to_disk_and_survive_restart(tmp_path):
+    disk = str(tmp_path / "cache")
+    cache = AssetCache(memory_bytes=40, disk_dir=disk, disk_bytes=1000)
+    store(cache, HASHED, 10, resource_type="script")
+    for name in "abcd":
+        store(cache, f"https://example.com/{name}.png", 10)
+    assert HASHED not in cache.entries
+    assert cache.stats["spilled"] == 1
+    cache.close()
+
+    restarted = AssetCache(memory_bytes=40, disk_dir=disk, disk_bytes=1000)
+    entry = lookup(restarted, HASHED, resource_type="script")
+    assert entry is not None and entry.body == b"x" * 10
+    assert restarted.stats["disk_hits"] == 1
+    # 只在内存层中的条目不会跨运行保留
+    assert lookup(restarted, "https://example.com/d.png") is None
+
+
+def test_prune_disk_keeps_total_within_budget(tmp_path):
+    disk = str(tmp_path / "cache")
+    cache = AssetCache(memory_bytes=40, disk_dir=disk, disk_bytes=1000)
+    for name in "abcdefgh":
+        store(cache, f"https://example.com/{name}.png", 10)
+    # 后 4 个条目仍在内存中，前 4 个已写入磁盘
+    assert cache.stats["spilled"] == 4
+    cache.disk_bytes = 20
+    cache.prune_disk()
+    assert len(list(tmp_path.glob("cache/*/*.bin"))) == 2
+    assert len(list(tmp_path.glob("cache/*/*.json"))) == 2
@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+from responsive_screenshots.controller import ConcurrencyController, percentile
+
+
+@pytest.mark.parametrize("fraction, expected", [(0.5, 3), (0.9, 5), (0.95, 5), (0.0, 1), (1.0, 5)])
+def test_percentile_nearest_rank(fraction, expected):
+    assert percentile([5, 1, 4, 2, 3], fraction) == expected
+
+
+def run(scenario, initial=4, minimum=1, maximum=8, memory_limit_mb=1000):
+    """在事件循环中创建控制器并执行 scenario(controller)，返回 (控制器, 日志)"""
+    logs = []
+
+    async def main():
+        controller = ConcurrencyController(initial, minimum, maximum, memory_limit_mb, logs.append)
+        await scenario(controller)
+        return controller
+
+    return asyncio.run(main()), logs
+
+
+def saturate(controller, latencies=(1.0, 1.0), timeouts=0):
+    controller.in_flight = controller.limit
+    controller.window = [(latency, False) for latency in latencies] + [(30.0, True)] * timeouts
+
+
+def test_healthy_saturated_window_adds_one():
+    async def scenario(controller):
+        saturate(controller)
+        await controller.evaluate(200, 0.3)
+
+    controller, logs = run(scenario)
+    assert controller.limit == 5
+    assert controller.window == []
+    assert "4 → 5" in logs[0]
+
+
+def test_no_increase_when_not_saturated_or_at_maximum():
+    async def scenario(controller):
+        controller.window = [(1.0, False)]
+        await controller.evaluate(200, 0.3)
+        saturate(controller)
+        await controller.evaluate(200, 0.3)
+        saturate(controller)
+        await controller.evaluate(200, 0.3)
+
+    controller, logs = run(scenario, initial=3, maximum=4)
+    assert controller.limit == 4
+    assert len(logs) == 1
+
+
+@pytest.mark.parametrize("rss_mb, load, timeouts, reason", [
+    (1200, 0.3, 0, "内存"),
+    (200, 2.0, 0, "CPU"),
+    (200, 0.3, 1, "超时"),
+])
+def test_pressure_halves_and_cools_down(rss_mb, load, timeouts, reason):
+    async def scenario(controller):
+        saturate(controller, timeouts=timeouts)
+        await controller.evaluate(rss_mb, load)
+        # 冷却两个周期：即使健康也不增加
+        for _ in range(2):
+            saturate(controller)
+            await controller.evaluate(200, 0.3)
+        assert controller.limit == 4
+        saturate(controller)
+        await controller.evaluate(200, 0.3)
+
+    controller, logs = run(scenario, initial=8, maximum=16)
+    assert reason in logs[0]
+    assert controller.limit == 5
+    assert (controller.lowest, controller.highest, controller.changes) == (4, 8, 2)
+
+
+def test_latency_regression_against_baseline():
+    async def scenario(controller):
+        saturate(controller, latencies=(1.0, 1.0, 1.2))
+        await controller.evaluate(None, None)
+        saturate(controller, latencies=(3.0, 3.5))
+        await controller.evaluate(None, None)
+
+    controller, logs = run(scenario, initial=4, memory_limit_mb=None)
+    assert "导航延迟" in logs[-1]
+    assert controller.limit == 2
+    # 基线取最小中位数，每周期最多上浮 5%
+    assert controller.baseline_latency == pytest.approx(1.05)
+
+
+def test_decrease_stops_at_minimum():
+    async def scenario(controller):
+        for _ in range(3):
+            saturate(controller)
+            await controller.evaluate(2000, None)
+
+    controller, logs = run(scenario, initial=4, minimum=2)
+    assert controller.limit == 2
+    assert len(logs) == 1
+
+
+def test_acquire_waits_for_limit():
+    async def scenario(controller):
+        await controller.acquire()
+        waiter = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        await controller.set_limit(2, "测试")
+        await asyncio.wait_for(waiter, 1)
+        assert controller.in_flight == 2
+
+    run(scenario, initial=1)
@@ -0,0 +1,89 @@
+import json
+import shutil
+import subprocess
+
+import pytest
+
+from responsive_screenshots.deterministic import (DETERMINISTIC_CSS, DETERMINISTIC_EPOCH_MS, DETERMINISTIC_FRAME_MS,
+                                                  DETERMINISTIC_RANDOM_SEED, deterministic_init_script)
+
+# 在 node 中用最小的浏览器桩对象执行注入脚本，输出 JSON 结果
+HARNESS = """
+const vm = require('vm');
+const frames = [];
+const sheets = [];
+const context = {
+    performance: { now: () => Math.random() * 1e6 },
+    requestAnimationFrame: (callback) => frames.push(callback),
+    HTMLMediaElement: function () {},
+    DOMException: class extends Error {},
+    CSSStyleSheet: class { replaceSync(text) { this.text = text; sheets.push(text); } },
+    document: { adoptedStyleSheets: [], addEventListener: () => {} },
+    Promise,
+};
+context.window = context;
+vm.createContext(context);
+vm.runInContext(require('fs').readFileSync(0, 'utf8'), context);
+const run = (code) => vm.runInContext(code, context);
+const nextFrame = () => frames.splice(0).forEach((callback) => callback());
+const result = { random: run('[Math.random(), Math.random(), Math.random()]') };
+result.frame0 = [run('Date.now()'), run('new Date().getTime()'), run('Date.now()')];
+nextFrame();
+nextFrame();
+result.frame2 = run('Date.now()');
+result.explicit = run('new Date(0).getTime()');
+result.string = run('typeof Date()');
+result.instance = run('new Date() instanceof Date');
+result.name = run('Date.name');
+result.sheets = sheets;
+console.log(JSON.stringify(result));
+"""
+
+
+def mulberry32(seed, count):
+    values, state = [], seed & 0xFFFFFFFF
+
+    def imul(a, b):
+        return (a * b) & 0xFFFFFFFF
+
+    for _ in range(count):
+        state = (state + 0x6D2B79F5) & 0xFFFFFFFF
+        t = imul(state ^ (state >> 15), state | 1)
+        t ^= (t + imul(t ^ (t >> 7), t | 61)) & 0xFFFFFFFF
+        values.append(((t ^ (t >> 14)) & 0xFFFFFFFF) / 4294967296)
+    return values
+
+
+def run_init_script():
+    node = shutil.which("node")
+    if node is None:
+        pytest.skip("需要 node 执行注入脚本")
+    output = subprocess.run([node, "-e", HARNESS], input=deterministic_init_script(), capture_output=True,
+                            text=True, check=True, timeout=30).stdout
+    return json.loads(output)
+
+
+def test_math_random_uses_seeded_mulberry32():
+    first, second = run_init_script(), run_init_script()
+    assert first["random"] == mulberry32(DETERMINISTIC_RANDOM_SEED, 3)
+    assert second["random"] == first["random"]
+
+
+def test_date_advances_per_animation_frame():
+    result = run_init_script()
+    # 同一帧内时间不变，与 performance.now() 无关
+    assert result["frame0"] == [DETERMINISTIC_EPOCH_MS] * 3
+    assert result["frame2"] == DETERMINISTIC_EPOCH_MS + 2 * DETERMINISTIC_FRAME_MS
+    assert result["explicit"] == 0
+    assert result["string"] == "string"
+    assert result["instance"] is True
+    assert result["name"] == "Date"
+
+
+def test_injected_css_holds_final_animation_frame():
+    assert run_init_script()["sheets"] == [DETERMINISTIC_CSS]
+    rules = {line.strip().rstrip(";") for line in DETERMINISTIC_CSS.splitlines()}
+    for rule in ("transition: none !important", "animation-duration: 0s !important",
+                 "animation-delay: 0s !important", "animation-iteration-count: 1 !important",
+                 "animation-fill-mode: forwards !important", "caret-color: transparent !important"):
+        assert rule in rules
@@ -0,0 +1,142 @@
+import json
+import queue
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import quote
+
+import pytest
+
+from responsive_screenshots.distributed import Coordinator, is_loopback, serve_coordinator
+
+
+def job(page_name, device_name, expected=10.0):
+    return {"target": {"name": page_name, "url": f"https://example.com/{page_name}"},
+            "device": {"name": device_name}, "expected": expected}
+
+
+def result(page_name, device_name, status="captured"):
+    return ["result", status, page_name, device_name, "", 1.0, None]
+
+
+def drain(events):
+    items = []
+    while not events.empty():
+        items.append(events.get_nowait())
+    return items
+
+
+@pytest.fixture
+def coordinator():
+    return Coordinator([job("home", "phone"), job("home", "desktop"), job("about", "phone")], 60, queue.Queue())
+
+
+def test_lease_hands_out_jobs_in_order(coordinator):
+    assert [j["device"]["name"] for j in coordinator.lease("w1", 2)["jobs"]] == ["phone", "desktop"]
+    response = coordinator.lease("w2", 5)
+    assert [j["target"]["name"] for j in response["jobs"]] == ["about"]
+    assert not response["finished"]
+    assert drain(coordinator.events) == [("w1", ("joined",)), ("w2", ("joined",))]
+
+
+def test_expired_leases_are_requeued_first(coordinator):
+    coordinator.lease("w1", 2)
+    coordinator.leases[("home", "phone")]["expires"] = time.time() - 1
+    assert coordinator.expire() == {"w1": 1}
+    assert "w1" not in coordinator.workers
+    assert [job["device"]["name"] for job in coordinator.pending] == ["phone", "phone"]
+    assert coordinator.lease("w2", 1)["jobs"][0]["target"]["name"] == "home"
+
+
+def test_results_finish_jobs_once(coordinator):
+    coordinator.lease("w1", 3)
+    drain(coordinator.events)
+    coordinator.record("w1", [result("home", "phone"), result("home", "phone")])
+    assert drain(coordinator.events) == [("w1", tuple(result("home", "phone")))]
+    assert ("home", "phone") not in coordinator.leases
+    # 重试中的结果不结束租约
+    coordinator.record("w1", [result("about", "phone", "retrying")])
+    assert ("about", "phone") in coordinator.leases
+    coordinator.record("w1", [result("home", "desktop"), result("about", "phone")])
+    assert coordinator.finished()
+
+
+def test_late_result_from_expired_worker_keeps_new_lease(coordinator):
+    coordinator.lease("w1", 1)
+    coordinator.leases[("home", "phone")]["expires"] = time.time() - 1
+    coordinator.expire()
+    coordinator.lease("w2", 1)
+    drain(coordinator.events)
+
+    coordinator.record("w1", [result("home", "phone")])
+    assert coordinator.leases[("home", "phone")]["worker"] == "w2"
+    # 迟到的结果被丢弃，退出的节点也不会重新登记
+    assert drain(coordinator.events) == []
+    assert "w1" not in coordinator.workers
+
+    coordinator.record("w2", [result("home", "phone")])
+    assert ("home", "phone") not in coordinator.leases
+    assert drain(coordinator.events) == [("w2", tuple(result("home", "phone")))]
+
+
+def test_budget_deadline_holds_back_long_jobs():
+    coordinator = Coordinator([job("home", "phone", 5), job("about", "phone", 500)], 60, queue.Queue(),
+                              deadline=time.time() + 60)
+    assert [j["target"]["name"] for j in coordinator.lease("w1", 5)["jobs"]] == ["home"]
+    assert [j["target"]["name"] for j in coordinator.overrun] == ["about"]
+
+
+@pytest.mark.parametrize("host, expected", [
+    ("127.0.0.1", True), ("localhost", True), ("::1", True), ("0.0.0.0", False), ("192.168.1.5", False),
+    ("example.com", False),
+])
+def test_is_loopback(host, expected):
+    assert is_loopback(host) == expected
+
+
+def test_non_loopback_bind_requires_token(tmp_path):
+    with pytest.raises(ValueError, match="--coordinator-token"):
+        serve_coordinator(Coordinator([], 60, queue.Queue()), ("0.0.0.0", 0), {}, str(tmp_path))
+
+
+@pytest.fixture
+def server(tmp_path, coordinator):
+    server = serve_coordinator(coordinator, ("127.0.0.1", 0), {"format": "png"}, str(tmp_path), token="secret")
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def call(server, method, path, data=None, token="secret", worker="w1"):
+    headers = {"X-Worker-Id": worker}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    url = f"http://127.0.0.1:{server.server_address[1]}{path}"
+    request = urllib.request.Request(url, data=data, method=method, headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_token_is_required(server):
+    assert call(server, "GET", "/config", token=None)[0] == 401
+    assert call(server, "GET", "/config", token="wrong")[0] == 401
+    assert call(server, "GET", "/config") == (200, {"options": {"format": "png"}})
+
+
+def test_uploads_are_limited_to_leased_screenshots(server, tmp_path):
+    call(server, "POST", "/lease", json.dumps({"worker": "w1", "slots": 1}).encode("utf-8"))
+    assert call(server, "PUT", "/files/home/phone_View_390x844.png", b"png") == (200, {"ok": True})
+    assert (tmp_path / "home" / "phone_View_390x844.png").read_bytes() == b"png"
+
+    # 其他节点、未领取的任务、非截图文件和协调节点自己的文件都不能写入
+    for path, worker in (("/files/home/phone_Full_390x844.png", "w2"),
+                         ("/files/home/desktop_View_1920x1080.png", "w1")):
+        assert call(server, "PUT", path, b"x", worker=worker)[0] == 403
+    for path in ("/files/.journal.sqlite3", "/files/.", "/files/home/layout_groups.json",
+                 "/files/" + quote("../outside.png"), "/files/" + quote("home/phone/../../x.png"),
+                 "/files/.diff/phone_View_390x844.png"):
+        assert call(server, "PUT", path, b"x")[0] == 400
+    assert sorted(p.name for p in tmp_path.rglob("*")) == ["home", "phone_View_390x844.png"]
@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+
+from responsive_screenshots.errors import RETRYABLE_ERRORS, classify_error, error_summary, is_timeout_error
+
+
+class TimeoutError(Exception):
+    """与 playwright.async_api.TimeoutError 同名的异常"""
+
+
+@pytest.mark.parametrize("error, expected", [
+    (TimeoutError("Timeout 30000ms exceeded."), "timeout"),
+    (asyncio.TimeoutError(), "timeout"),
+    (Exception("Target closed"), "browser_crash"),
+    (Exception("Page crashed"), "browser_crash"),
+    (Exception("Browser closed.\n==== logs ===="), "browser_crash"),
+    (Exception("page.goto: net::ERR_CONNECTION_REFUSED at https://example.com/"), "navigation"),
+    (Exception("NS_ERROR_NET_RESET"), "navigation"),
+    (Exception("Target page, context or browser has been closed"), "browser_crash"),
+    (Exception("Navigation interrupted by another navigation"), "navigation"),
+    (Exception("Evaluation failed: ReferenceError: x is not defined"), "other"),
+    (OSError(28, "No space left on device"), "other"),
+])
+def test_classify_error(error, expected):
+    assert classify_error(error) == expected
+
+
+def test_only_transient_failures_are_retryable():
+    assert {"timeout", "navigation", "browser_crash"} == set(RETRYABLE_ERRORS)
+    assert "other" not in RETRYABLE_ERRORS
+    assert not is_timeout_error(None)
+    assert not is_timeout_error(ValueError("Timeout"))
+
+
+def test_error_summary_keeps_first_line():
+    assert error_summary(Exception("page.goto: Timeout\nCall log:\n  - navigating")) == "page.goto: Timeout"
+    assert error_summary(Exception("x" * 500)) == "x" * 300
+    # 没有消息时使用异常类名
+    assert error_summary(KeyError()) == "KeyError"
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from responsive_screenshots import engine
+from responsive_screenshots.engine import CaptureManifest, fingerprint_document, is_job_done, screenshot_paths
+from responsive_screenshots.options import default_options
+
+PHONE = {"name": "phone", "width": 390, "height": 844, "is_mobile": True, "has_touch": True}
+HOME = {"name": "home", "url": "https://example.com/"}
+HTML = (b'<html><script src="/_next/static/build-abc123/_buildManifest.js" nonce="n1"></script>'
+        b'<main>Hello</main></html>')
+
+
+def test_fingerprint_ignores_nonce_and_tracks_build_and_content():
+    base = fingerprint_document(HTML)
+    assert fingerprint_document(HTML.replace(b'nonce="n1"', b'nonce="n2"')) == base
+    assert fingerprint_document(HTML.replace(b"Hello", b"Bye")) != base
+    assert fingerprint_document(HTML.replace(b"build-abc123", b"build-def456")) != base
+    # 有 ETag 时只看 ETag 和构建 ID
+    assert fingerprint_document(HTML, etag='"v1"') == fingerprint_document(HTML.replace(b"Hello", b"Bye"), etag='"v1"')
+    assert fingerprint_document(HTML, etag='"v1"') != fingerprint_document(HTML, etag='"v2"')
+
+
+@pytest.fixture
+def run(tmp_path):
+    """已截过 home/phone 的 View 截图、清单中记录了指纹 old 的运行环境"""
+    run = engine.configure(default_options(output_dir=str(tmp_path), no_tuning=True), devices=[PHONE], targets=[HOME])
+    run.manifest = CaptureManifest(run.manifest_path)
+    viewport_path, _ = screenshot_paths(run, PHONE, "home")
+    (tmp_path / "home").mkdir()
+    (tmp_path / "home" / "phone_View_390x844.png").write_bytes(b"png")
+    run.manifest.record(HOME["url"], PHONE, "View", "old", viewport_path)
+    return run
+
+
+def test_unchanged_fingerprint_skips(run):
+    run.page_fingerprints[("home", "mobile")] = "old"
+    assert is_job_done(run, PHONE, HOME)
+
+
+def test_changed_fingerprint_recaptures(run):
+    run.page_fingerprints[("home", "mobile")] = "new"
+    assert not is_job_done(run, PHONE, HOME)
+
+
+def test_failed_probe_falls_back_to_file_check(run):
+    run.page_fingerprints[("home", "mobile")] = None
+    assert is_job_done(run, PHONE, HOME)
+    os.remove(screenshot_paths(run, PHONE, "home")[0])
+    assert not is_job_done(run, PHONE, HOME)
+
+
+def test_manifest_key_separates_sizes_and_kinds(run, tmp_path):
+    assert run.manifest.fingerprint(HOME["url"], PHONE, "Full") is None
+    assert run.manifest.fingerprint(HOME["url"], dict(PHONE, width=393), "View") is None
+    run.manifest.save()
+    reloaded = CaptureManifest(str(tmp_path / ".manifest.json"))
+    assert reloaded.fingerprint(HOME["url"], PHONE, "View") == "old"
+    assert reloaded.entries[CaptureManifest.key(HOME["url"], PHONE, "View")]["file"] == "home/phone_View_390x844.png"
+
+
+def test_full_page_needs_both_kinds(run):
+    run.page_fingerprints[("home", "mobile")] = "old"
+    run.args.full_page = True
+    assert not is_job_done(run, PHONE, HOME)
@@ -0,0 +1,67 @@
+import time
+
+from responsive_screenshots.engine import JobQueue
+
+
+def device(name, is_mobile=True):
+    return {"name": name, "is_mobile": is_mobile, "has_touch": is_mobile}
+
+
+PHONE, TABLET, DESKTOP = device("phone"), device("tablet"), device("desktop", is_mobile=False)
+TARGETS = [{"name": name, "url": f"https://example.com/{name}"} for name in ("home", "about", "course")]
+
+
+class FakeTimings:
+    def __init__(self, entries):
+        self.entries = entries
+
+    def expected(self, page_name, device_name):
+        return self.entries.get((page_name, device_name), 10.0)
+
+
+def names(job):
+    return job["target"]["name"], job["device"]["name"]
+
+
+def test_longest_jobs_come_first():
+    timings = FakeTimings({("course", "phone"): 40.0, ("home", "phone"): 5.0, ("about", "desktop"): 25.0})
+    queue = JobQueue([PHONE, DESKTOP], TARGETS, timings)
+    assert len(queue) == 6
+    assert [job["expected"] for job in queue.pending] == [40.0, 25.0, 10.0, 10.0, 10.0, 5.0]
+    assert names(queue.next_job()) == ("course", "phone")
+    assert names(queue.next_job()) == ("about", "desktop")
+
+
+def test_workers_prefer_their_device_then_their_context_pool():
+    timings = FakeTimings({("home", "desktop"): 50.0, ("home", "tablet"): 30.0})
+    queue = JobQueue([PHONE, TABLET, DESKTOP], TARGETS[:1], timings)
+    # 先领取自己设备的任务，其次帮 tablet（同一上下文池，只需调整视口），最后才领取更长的桌面任务
+    assert names(queue.next_job(PHONE)) == ("home", "phone")
+    assert names(queue.next_job(PHONE)) == ("home", "tablet")
+    assert names(queue.next_job(PHONE)) == ("home", "desktop")
+    assert queue.next_job(PHONE) is None
+
+
+def test_retried_jobs_wait_until_not_before():
+    queue = JobQueue([PHONE], TARGETS[:1], FakeTimings({}))
+    job = queue.next_job()
+    queue.retry(job, 60)
+    assert queue.next_job() is None
+    assert 59 < queue.retry_wait() <= 60
+    job["not_before"] = time.time() - 1
+    assert queue.next_job() is job
+    assert queue.retry_wait() is None
+
+
+def test_budget_plan_and_deadline_filter_jobs():
+    planned = {("home", "phone"), ("course", "phone"), ("about", "desktop")}
+    timings = FakeTimings({("course", "phone"): 120.0, ("about", "desktop"): 20.0})
+    queue = JobQueue([PHONE, DESKTOP], TARGETS, timings, planned_jobs=planned)
+    assert {names(job) for job in queue.pending} == planned
+
+    # 截止时间前只够完成 30 秒以内的任务，超出的任务不再开始
+    queue.deadline = time.time() + 30
+    assert names(queue.next_job()) == ("about", "desktop")
+    assert [names(job) for job in queue.overrun] == [("course", "phone")]
+    assert names(queue.next_job()) == ("home", "phone")
+    assert queue.next_job() is None
@@ -0,0 +1,59 @@
+from responsive_screenshots.journal import JobJournal
+
+DEVICES = [{"name": "phone"}, {"name": "desktop"}]
+TARGETS = [{"name": "home", "url": "https://example.com/"}]
+KINDS = ["View", "Full"]
+
+
+def states(journal):
+    rows = journal.conn.execute("SELECT device, kind, state FROM jobs WHERE run_id = ?", (journal.run_id,))
+    return {(device, kind): state for device, kind, state in rows}
+
+
+def test_mark_updates_only_the_given_kind(tmp_path):
+    journal = JobJournal(str(tmp_path / "journal.sqlite3"))
+    journal.start_run(DEVICES, TARGETS, KINDS, resume=False)
+    journal.mark("home", "phone", "done", kind="View")
+    journal.mark("home", "phone", "skipped", kind="Full")
+    assert states(journal)[("phone", "View")] == "done"
+    assert states(journal)[("phone", "Full")] == "skipped"
+    assert states(journal)[("desktop", "View")] == "pending"
+
+
+def test_mark_without_kind_keeps_finished_kinds(tmp_path):
+    journal = JobJournal(str(tmp_path / "journal.sqlite3"))
+    journal.start_run(DEVICES, TARGETS, KINDS, resume=False)
+    journal.mark("home", "phone", "done", kind="View")
+    journal.mark("home", "phone", "failed", error_class="timeout", failed_attempt=True)
+    assert states(journal)[("phone", "View")] == "done"
+    assert states(journal)[("phone", "Full")] == "failed"
+
+
+def test_resume_after_crash_between_view_and_full(tmp_path):
+    path = str(tmp_path / "journal.sqlite3")
+    journal = JobJournal(path)
+    journal.start_run(DEVICES, TARGETS, KINDS, resume=False)
+    journal.mark("home", "phone", "done", kind="View")
+    journal.mark("home", "phone", "running", kind="Full")
+    journal.mark("home", "desktop", "deduped")
+    journal.close()
+
+    # 进程在 View 和 Full 之间被杀：续跑只跳过 View
+    resumed = JobJournal(path)
+    done = resumed.start_run(DEVICES, TARGETS, KINDS, resume=True)
+    assert done == {
+        ("home", "phone", "View"): "done",
+        ("home", "desktop", "View"): "deduped",
+        ("home", "desktop", "Full"): "deduped",
+    }
+    assert states(resumed)[("phone", "Full")] == "pending"
+
+
+def test_finish_run_reports_incomplete_kinds(tmp_path):
+    journal = JobJournal(str(tmp_path / "journal.sqlite3"))
+    journal.start_run(DEVICES, TARGETS, KINDS, resume=False)
+    journal.mark("home", "phone", "done", kind="View")
+    journal.mark("home", "phone", "failed", kind="Full", error_class="write")
+    journal.mark("home", "desktop", "done")
+    assert journal.finish_run() == [("home", "phone", "Full", "failed", "write")]
+    assert journal.unfinished_run() is not None
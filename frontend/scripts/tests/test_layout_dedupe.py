@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from responsive_screenshots import engine
+from responsive_screenshots.engine import JobTimer, ProgressReporter, claim_layout, release_layout_claim
+from responsive_screenshots.options import default_options
+
+
+def device(name, width, is_mobile=True):
+    return {"name": name, "width": width, "height": 800, "is_mobile": is_mobile, "has_touch": is_mobile}
+
+
+PHONE_A, PHONE_B, PHONE_WIDE = device("phone_390", 390), device("phone_393", 393), device("phone_430", 430)
+DESKTOP = device("desktop_1280", 1280, is_mobile=False)
+
+STACKED = {"overflow": False, "landscape": False,
+           "items": [["HEADER", 0, 40, "flex", "row"], ["MAIN", 0, 40, "block", "row"]]}
+SIDEBAR = {"overflow": False, "landscape": False,
+           "items": [["HEADER", 0, 40, "flex", "row"], ["ASIDE", 0, 10, "block", "row"]]}
+
+
+class FakePage:
+    def __init__(self, layout):
+        self.layout = layout
+
+    async def evaluate(self, script):
+        assert script == engine.LAYOUT_SIGNATURE_JS
+        return self.layout
+
+
+@pytest.fixture
+def run(tmp_path):
+    options = default_options(output_dir=str(tmp_path), no_tuning=True, dedupe_layout=True)
+    return engine.configure(options, devices=[PHONE_A, PHONE_B, PHONE_WIDE, DESKTOP], targets=[])
+
+
+def claim(reporter, device_conf, layout, page_name="home"):
+    return asyncio.run(claim_layout(reporter.run, FakePage(layout), device_conf, page_name, reporter, JobTimer(), {}))
+
+
+def test_same_signature_is_deduped_to_the_first_device(run):
+    reporter = ProgressReporter(run, 4, verbose=False)
+    key = claim(reporter, PHONE_A, STACKED)
+    assert key is not None and key[:3] == ("home", True, 2)
+    assert claim(reporter, PHONE_B, STACKED) is None
+    assert claim(reporter, PHONE_WIDE, SIDEBAR) is not None
+    assert reporter.counts["deduped"] == 1
+    assert reporter.layout_groups == {"home": {"phone_390": {"signature": key[3], "stands_for": ["phone_393"]}}}
+
+
+def test_signature_is_scoped_by_page_and_context(run):
+    reporter = ProgressReporter(run, 3, verbose=False)
+    assert claim(reporter, PHONE_A, STACKED) is not None
+    # 不同页面、桌面端（不同 UA 和缩放）即使签名相同也各自截图
+    assert claim(reporter, PHONE_B, STACKED, page_name="about") is not None
+    assert claim(reporter, DESKTOP, STACKED) is not None
+    assert reporter.counts["deduped"] == 0
+
+
+def test_failed_representative_releases_its_claim(run):
+    reporter = ProgressReporter(run, 2, verbose=False)
+    key = claim(reporter, PHONE_A, STACKED)
+    # 只有代表设备能释放认领
+    release_layout_claim(run, key, "phone_393")
+    assert run.layout_claims[key] == "phone_390"
+    release_layout_claim(run, key, "phone_390")
+    assert run.layout_claims == {}
+    assert claim(reporter, PHONE_B, STACKED) == key
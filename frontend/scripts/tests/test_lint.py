@@ -0,0 +1,71 @@
+import asyncio
+import json
+
+import pytest
+
+from responsive_screenshots import engine
+from responsive_screenshots.engine import LINT_JS, LINT_LIMIT_PER_RULE, ProgressReporter, run_lint, write_lint_report
+from responsive_screenshots.options import default_options
+
+PHONE = {"name": "phone", "is_mobile": True}
+OVERFLOW = {"rule": "overflow", "selector": "main > div.wide", "detail": "超出视口 40px",
+            "rect": {"x": 0, "y": 10, "width": 430, "height": 20}}
+TAP = {"rule": "tap-target", "selector": "header > button", "detail": "点击区域 30×30px，小于 44px",
+       "rect": {"x": 4, "y": 4, "width": 30, "height": 30}}
+
+
+class FakePage:
+    def __init__(self, result):
+        self.result = result
+        self.calls = []
+
+    async def evaluate(self, script, params):
+        self.calls.append((script, params))
+        return self.result
+
+
+@pytest.fixture
+def lint_run(tmp_path):
+    options = default_options(output_dir=str(tmp_path), no_tuning=True, lint=True, lint_tap_size=44)
+    return engine.configure(options, devices=[PHONE], targets=[])
+
+
+def test_run_lint_passes_device_options_and_unpacks_result(lint_run):
+    page = FakePage({"violations": [TAP], "counts": {"tap-target": 3}})
+    assert asyncio.run(run_lint(lint_run, page, PHONE)) == ([TAP], {"tap-target": 3})
+    assert page.calls == [(LINT_JS, {"isMobile": True, "tapSize": 44, "limit": LINT_LIMIT_PER_RULE})]
+
+
+def report_lint(reporter, page_name, device_name, violations, counts):
+    status = "captured" if violations else "linted"
+    reporter.report(status, page_name, device_name, extra={"lint": violations, "lint_counts": counts,
+                                                           "url": f"https://example.com/{page_name}",
+                                                           "device_type": "mobile"})
+
+
+def test_lint_report_aggregates_rules_and_lists_failures(lint_run, capsys):
+    reporter = ProgressReporter(lint_run, 3, verbose=False)
+    report_lint(reporter, "home", "phone", [OVERFLOW, TAP], {"overflow": 1, "tap-target": 25})
+    report_lint(reporter, "about", "phone", [], {})
+    report_lint(reporter, "about", "desktop", [OVERFLOW], {"overflow": 2})
+    assert (reporter.counts["captured"], reporter.counts["linted"]) == (2, 1)
+
+    assert write_lint_report(lint_run, reporter) is False
+    with open(lint_run.lint_report_path, encoding="utf-8") as f:
+        report = json.load(f)
+    assert report["passed"] is False
+    assert report["tap_size"] == 44
+    # 命中数来自页面统计（超过每条规则的报告上限时仍然完整）
+    assert report["summary"] == {"checked": 3, "with_violations": 2, "by_rule": {"overflow": 3, "tap-target": 25}}
+    assert [(r["page"], r["device"]) for r in report["results"]] == [("about", "desktop"), ("home", "phone")]
+    assert report["results"][1]["violations"] == [OVERFLOW, TAP]
+    assert "[overflow] main > div.wide" in capsys.readouterr().out
+
+
+def test_lint_report_passes_without_violations(lint_run):
+    reporter = ProgressReporter(lint_run, 1, verbose=False)
+    report_lint(reporter, "home", "desktop", [], {})
+    assert write_lint_report(lint_run, reporter) is True
+    with open(lint_run.lint_report_path, encoding="utf-8") as f:
+        report = json.load(f)
+    assert report["passed"] is True and report["results"] == []
@@ -0,0 +1,92 @@
+from responsive_screenshots.planner import PLANNER_OVERHEAD_SECONDS, changed_pages, format_duration, plan_budget
+
+
+def device(name, width, height, is_mobile, device_type):
+    return {"name": name, "width": width, "height": height, "is_mobile": is_mobile, "device_type": device_type}
+
+
+PHONE_A = device("phone_390", 390, 844, True, "mobile")
+PHONE_B = device("phone_393", 393, 852, True, "mobile")
+DESKTOP = device("desktop_1920", 1920, 1080, False, "desktop")
+DEVICES = [PHONE_A, PHONE_B, DESKTOP]
+TARGETS = [{"name": "home", "url": "https://example.com/"}, {"name": "about", "url": "https://example.com/about"}]
+
+
+class FakeTimings:
+    """历史耗时：entries 中没有的任务使用默认估计"""
+
+    def __init__(self, entries, default=10.0):
+        self.entries = entries
+        self.default = default
+
+    def key(self, page_name, device_name):
+        return f"{page_name}|{device_name}"
+
+    def expected(self, page_name, device_name):
+        return self.entries.get(self.key(page_name, device_name), self.default)
+
+
+def not_done(device_conf, target):
+    return False
+
+
+def chosen(plan):
+    return {(c["page"], c["device"]) for c in plan["selected"]}
+
+
+def test_everything_fits_in_a_large_budget():
+    plan = plan_budget(DEVICES, TARGETS, FakeTimings({}), 3600, 1, not_done)
+    assert len(plan["selected"]) == 6
+    assert plan["left_out"] == []
+
+
+def test_new_coverage_beats_near_duplicate_devices():
+    # 容量只够 3 个任务：先覆盖每个页面，再覆盖桌面断点，390w / 393w 同一断点的第二台手机最后
+    plan = plan_budget(DEVICES, TARGETS, FakeTimings({}), PLANNER_OVERHEAD_SECONDS + 30, 1, not_done)
+    assert chosen(plan) == {("home", "phone_390"), ("about", "phone_390"), ("home", "desktop_1920")}
+    assert {c["device"] for c in plan["left_out"]} == {"phone_393", "desktop_1920"}
+    assert plan["capacity"] == 30
+
+
+def test_changed_pages_are_preferred():
+    plan = plan_budget(DEVICES, TARGETS, FakeTimings({}), PLANNER_OVERHEAD_SECONDS + 10, 1, not_done,
+                       changed=("about",))
+    assert chosen(plan) == {("about", "phone_390")}
+    assert plan["changed_pages"] == ["about"]
+
+
+def test_cost_and_concurrency_shape_the_selection():
+    timings = FakeTimings({"home|phone_390": 100.0, "about|phone_390": 2.0})
+    plan = plan_budget([PHONE_A], TARGETS, timings, PLANNER_OVERHEAD_SECONDS + 25, 2, not_done)
+    # 并发 2 时容量为 50 秒任务耗时，100 秒的任务放不下
+    assert chosen(plan) == {("about", "phone_390")}
+    assert [c["known"] for c in plan["candidates"]] == [True, True]
+
+
+def test_done_jobs_are_excluded_from_planning():
+    def is_done(device_conf, target):
+        return target["name"] == "home"
+
+    plan = plan_budget(DEVICES, TARGETS, FakeTimings({}), 3600, 1, is_done)
+    assert plan["done"] == 3
+    assert {c["page"] for c in plan["candidates"]} == {"about"}
+
+
+def test_changed_pages_compares_view_fingerprints():
+    class FakeManifest:
+        def fingerprint(self, url, device_conf, kind):
+            assert kind == "View"
+            return {"https://example.com/": "abc"}.get(url)
+
+    fingerprints = {"home": "abc", "about": "def"}
+    changed = changed_pages(DEVICES, TARGETS, FakeManifest(), lambda d, t: fingerprints[t["name"]])
+    assert changed == {"about"}
+    # 没有探测到指纹的页面视为未变化，没有清单时探测到的页面都视为变化
+    assert changed_pages(DEVICES, TARGETS, None, lambda d, t: None) == set()
+    assert changed_pages(DEVICES, TARGETS, None, lambda d, t: "x") == {"home", "about"}
+
+
+def test_format_duration():
+    assert format_duration(42.4) == "42s"
+    assert format_duration(125) == "2m05s"
+    assert format_duration(3 * 3600 + 7 * 60) == "3h07m"
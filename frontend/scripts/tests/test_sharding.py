@@ -0,0 +1,55 @@
+import pytest
+
+from responsive_screenshots import engine
+from responsive_screenshots.engine import merge_block_stats, shard_devices
+from responsive_screenshots.options import default_options
+
+TARGETS = [{"name": "home", "url": "https://example.com/"}, {"name": "about", "url": "https://example.com/about"}]
+DEVICES = [{"name": name} for name in ("a", "b", "c", "d", "e")]
+
+
+class FakeTimings:
+    """每个设备在每个页面上的历史耗时"""
+
+    def __init__(self, per_page):
+        self.per_page = per_page
+
+    def expected(self, page_name, device_name):
+        return self.per_page[device_name]
+
+
+@pytest.fixture
+def run(tmp_path):
+    return engine.configure(default_options(output_dir=str(tmp_path), no_tuning=True), devices=DEVICES,
+                            targets=TARGETS)
+
+
+def names(shards):
+    return [[device["name"] for device in shard] for shard in shards]
+
+
+def test_longest_devices_go_to_the_least_loaded_shard(run):
+    timings = FakeTimings({"a": 30, "b": 20, "c": 15, "d": 10, "e": 5})
+    # 每个设备的总耗时为两个页面之和：60 / 40 / 30 / 20 / 10
+    assert names(shard_devices(run, DEVICES, 2, timings)) == [["a", "d"], ["b", "c", "e"]]
+
+
+def test_empty_shards_are_dropped(run):
+    timings = FakeTimings({name: 1 for name in "abcde"})
+    assert names(shard_devices(run, DEVICES[:2], 4, timings)) == [["a"], ["b"]]
+
+
+def test_only_planned_jobs_are_counted(run):
+    run.planned_jobs = {("home", "a"), ("home", "b"), ("about", "b"), ("home", "c")}
+    timings = FakeTimings({name: 10 for name in "abcde"})
+    # d、e 没有计划任务，不分配；b 有两个任务最先分配
+    assert names(shard_devices(run, DEVICES, 2, timings)) == [["b"], ["a", "c"]]
+
+
+def test_merge_block_stats_sums_shard_summaries():
+    total = {}
+    merge_block_stats(total, {"analytics": {"requests": 3, "bytes": 100, "unknown": 1}})
+    merge_block_stats(total, {"analytics": {"requests": 2, "bytes": 50, "unknown": 0},
+                              "media": {"requests": 1, "bytes": 10, "unknown": 0}})
+    assert total == {"analytics": {"requests": 5, "bytes": 150, "unknown": 1},
+                     "media": {"requests": 1, "bytes": 10, "unknown": 0}}
@@ -0,0 +1,87 @@
+import io
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from responsive_screenshots import stitch
+from responsive_screenshots.stitch import TileStitcher
+
+
+def tile_bytes(rows):
+    """每行一种颜色的截图块：rows 为 [(r, g, b), ...]"""
+    image = Image.new("RGB", (4, len(rows)))
+    for y, color in enumerate(rows):
+        for x in range(4):
+            image.putpixel((x, y), color)
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def column(image):
+    return [image.getpixel((0, y))[:3] for y in range(image.height)]
+
+
+RED, GREEN, BLUE, WHITE = (255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 255)
+
+
+def test_png_stitches_tiles_and_skips_overlap(tmp_path):
+    path = str(tmp_path / "full.png")
+    stitcher = TileStitcher(path, "png", 85, None)
+    stitcher.add_tile(tile_bytes([RED, RED, GREEN]), 0, 3)
+    # 第二块与上一块重叠一行，最后一块只取剩余页面高度
+    stitcher.add_tile(tile_bytes([GREEN, BLUE, BLUE]), 1, 3)
+    stitcher.add_tile(tile_bytes([WHITE, WHITE, WHITE]), 0, 1)
+    assert stitcher.finish() == path
+    assert not (tmp_path / "full.png.tmp").exists()
+    with Image.open(path) as image:
+        assert image.size == (4, 6)
+        assert column(image) == [RED, RED, GREEN, BLUE, BLUE, WHITE]
+
+
+def test_keep_bytes_returns_image_without_writing(tmp_path):
+    path = str(tmp_path / "full.png")
+    stitcher = TileStitcher(path, "png", 85, 1, keep_bytes=True)
+    stitcher.add_tile(tile_bytes([RED, GREEN]), 0, 2)
+    data = stitcher.finish()
+    assert not (tmp_path / "full.png").exists()
+    with Image.open(io.BytesIO(data)) as image:
+        assert column(image) == [RED, GREEN]
+
+
+@pytest.mark.parametrize("image_format", ["jpeg", "webp"])
+def test_lossy_formats_encode_from_raw_rows(tmp_path, image_format):
+    path = str(tmp_path / f"full.{image_format}")
+    stitcher = TileStitcher(path, image_format, 95, None)
+    stitcher.add_tile(tile_bytes([WHITE] * 8), 0, 8)
+    stitcher.add_tile(tile_bytes([WHITE] * 8), 0, 8)
+    assert stitcher.finish() == path
+    with Image.open(path) as image:
+        assert image.format == image_format.upper()
+        assert image.size == (4, 16)
+
+
+def test_width_mismatch_and_abort_clean_up(tmp_path):
+    path = str(tmp_path / "full.png")
+    stitcher = TileStitcher(path, "png", 85, None)
+    stitcher.add_tile(tile_bytes([RED]), 0, 1)
+    wide = io.BytesIO()
+    Image.new("RGB", (8, 1)).save(wide, format="PNG")
+    with pytest.raises(ValueError):
+        stitcher.add_tile(wide.getvalue(), 0, 1)
+    stitcher.abort()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_height_limit_and_empty_finish(tmp_path, monkeypatch):
+    monkeypatch.setitem(stitch.MAX_HEIGHT, "jpeg", 3)
+    stitcher = TileStitcher(str(tmp_path / "full.jpeg"), "jpeg", 85, None)
+    stitcher.add_tile(tile_bytes([RED, RED]), 0, 2)
+    with pytest.raises(ValueError, match="--format png"):
+        stitcher.add_tile(tile_bytes([RED, RED]), 0, 2)
+    stitcher.abort()
+
+    empty = TileStitcher(str(tmp_path / "empty.png"), "png", 85, None)
+    with pytest.raises(ValueError):
+        empty.finish()
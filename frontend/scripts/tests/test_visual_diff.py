@@ -0,0 +1,73 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+
+from responsive_screenshots.engine import compare_image_pair, yiq_delta
+
+
+def save(path, array):
+    Image.fromarray(array).save(str(path))
+    return str(path)
+
+
+def blank(height=40, width=30, value=255):
+    return np.full((height, width, 3), value, dtype=np.uint8)
+
+
+def test_yiq_delta_is_normalized():
+    black, white = np.zeros((1, 3), dtype=np.uint8), np.full((1, 3), 255, dtype=np.uint8)
+    assert yiq_delta(black, black)[0] == 0
+    # 35215 是全部颜色对中的最大距离，黑白之间略小于 1
+    assert 0.95 < yiq_delta(black, white)[0] <= 1
+    # 同样的数值差，亮度（绿色）变化比蓝色变化更明显
+    green, blue = np.array([[0, 40, 0]], dtype=np.uint8), np.array([[0, 0, 40]], dtype=np.uint8)
+    assert yiq_delta(black, green)[0] > yiq_delta(black, blue)[0]
+
+
+def test_identical_images_pass_without_heatmap(tmp_path):
+    new = save(tmp_path / "new.png", blank())
+    baseline = save(tmp_path / "baseline.png", blank())
+    heatmap = str(tmp_path / "diff" / "heat.png")
+    result = compare_image_pair(new, baseline, heatmap, 16, 0.1, 0.001)
+    assert result["status"] == "pass"
+    assert result["changed_pixels"] == 0
+    assert result["heatmap"] is None
+
+
+def test_size_mismatch_fails(tmp_path):
+    new = save(tmp_path / "new.png", blank(height=50))
+    baseline = save(tmp_path / "baseline.png", blank())
+    result = compare_image_pair(new, baseline, str(tmp_path / "heat.png"), 16, 0.1, 0.001)
+    assert result["status"] == "fail"
+    assert result["reason"] == "size_mismatch"
+    assert result["size"] == [30, 50]
+    assert result["baseline_size"] == [30, 40]
+
+
+def test_changed_block_is_counted_per_tile(tmp_path):
+    current = blank()
+    current[20:24, 18:22] = 0  # 4x4 黑块，落在第 2 行第 2 列的分块中
+    new = save(tmp_path / "new.png", current)
+    baseline = save(tmp_path / "baseline.png", blank())
+    heatmap = str(tmp_path / "diff" / "heat.png")
+    result = compare_image_pair(new, baseline, heatmap, 16, 0.1, 0.001)
+    assert result["status"] == "fail"
+    assert result["changed_pixels"] == 16
+    assert result["changed_tiles"] == 1
+    assert result["total_tiles"] == 3 * 2
+    assert result["heatmap"] == heatmap
+    with Image.open(heatmap) as image:
+        assert image.size == (30, 40)
+        assert image.getpixel((19, 21))[0] == 255
+
+
+def test_subtle_changes_below_thresholds_pass(tmp_path):
+    current = blank()
+    current[0:2, 0:2] = 0  # 明显的差异，但只占 4 / 1200 像素
+    current[10:20, :] = 253  # 肉眼不可见的色差
+    new = save(tmp_path / "new.png", current)
+    baseline = save(tmp_path / "baseline.png", blank())
+    result = compare_image_pair(new, baseline, str(tmp_path / "heat.png"), 16, 0.1, 0.01)
+    assert result["status"] == "pass"
+    assert result["changed_pixels"] == 4
@@ -0,0 +1,75 @@
+import csv
+import json
+
+import pytest
+
+from responsive_screenshots import engine
+from responsive_screenshots.engine import (find_vitals_regressions, format_vitals_value, summarize_vitals,
+                                           vitals_rating, write_vitals_report)
+from responsive_screenshots.options import default_options
+
+
+def row(page_name, device_name, profile, lcp, cls=0.01, tbt=50, ttfb=300, size=400 * 1024):
+    return {"page": page_name, "url": f"https://example.com/{page_name}", "device": device_name,
+            "device_type": "mobile", "year": 2023, "width": 390, "height": 844, "profile": profile, "runs": 3,
+            "lcp": lcp, "fcp": lcp / 2 if lcp else None, "cls": cls, "tbt": tbt, "ttfb": ttfb, "bytes": size,
+            "requests": 20, "lcp_element": "img.hero"}
+
+
+RESULTS = [row("home", f"phone_{i}", "mobile", lcp) for i, lcp in enumerate((1000, 2000, 3000, 5000))]
+RESULTS += [row("home", "desktop", "desktop", 900), row("about", "phone_0", "mobile", None)]
+
+
+@pytest.mark.parametrize("metric, value, expected", [
+    ("lcp", 2500, "good"), ("lcp", 2501, "needs-improvement"), ("lcp", 4001, "poor"),
+    ("cls", 0.3, "poor"), ("bytes", 10, ""), ("lcp", None, ""),
+])
+def test_vitals_rating(metric, value, expected):
+    assert vitals_rating(metric, value) == expected
+
+
+def test_summary_takes_p75_across_devices_per_profile():
+    summary = summarize_vitals(RESULTS)
+    assert [(e["page"], e["profile"], e["devices"]) for e in summary] == [
+        ("about", "mobile", 1), ("home", "desktop", 1), ("home", "mobile", 4)]
+    home = summary[2]
+    assert home["lcp"] == 3000
+    assert home["lcp_rating"] == "needs-improvement"
+    assert home["bytes"] == 400 * 1024 and "bytes_rating" not in home
+    # 没有取值的指标汇总为 None
+    assert summary[0]["lcp"] is None and summary[0]["lcp_rating"] == ""
+
+
+def test_regressions_need_absolute_and_relative_increase():
+    before = [{"page": "home", "profile": "mobile", "lcp": 2000, "cls": 0.05, "tbt": 1000, "ttfb": None,
+               "bytes": 400 * 1024}]
+    after = [{"page": "home", "profile": "mobile", "lcp": 2300, "cls": 0.08, "tbt": 1090, "ttfb": 900,
+              "bytes": 500 * 1024},
+             {"page": "about", "profile": "mobile", "lcp": 9000}]
+    # LCP +300ms 超过 250ms 和 10%；TBT +90ms 低于容差；没有上次取值或上次没有该页面的不比较
+    assert find_vitals_regressions(after, before) == [
+        ("home", "mobile", "lcp", 2000, 2300), ("home", "mobile", "cls", 0.05, 0.08),
+        ("home", "mobile", "bytes", 400 * 1024, 500 * 1024)]
+
+
+def test_format_vitals_value():
+    assert format_vitals_value("lcp", 1234.4) == "1234ms"
+    assert format_vitals_value("cls", 0.1) == "0.100"
+    assert format_vitals_value("bytes", 2048) == "2KB"
+    assert format_vitals_value("tbt", None) == "-"
+
+
+def test_report_compares_with_previous_run(tmp_path, capsys):
+    run = engine.configure(default_options(output_dir=str(tmp_path), no_tuning=True, vitals_runs=3),
+                           devices=[], targets=[])
+    assert write_vitals_report(run, RESULTS)["regressions"] == []
+
+    slower = [dict(r, lcp=r["lcp"] + 1000) if r["profile"] == "desktop" else r for r in RESULTS]
+    report = write_vitals_report(run, slower)
+    assert report["regressions"] == [
+        {"page": "home", "profile": "desktop", "metric": "lcp", "previous": 900, "current": 1900}]
+    saved = json.loads((tmp_path / "vitals_report.json").read_text(encoding="utf-8"))
+    assert [r["device"] for r in saved["results"]][:2] == ["phone_0", "desktop"]
+    with open(tmp_path / "vitals.csv", encoding="utf-8") as f:
+        assert len(list(csv.DictReader(f))) == len(RESULTS)
+    assert "回退 1 项" in capsys.readouterr().out
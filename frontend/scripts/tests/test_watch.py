@@ -0,0 +1,122 @@
+import asyncio
+import os
+import threading
+
+import pytest
+
+from responsive_screenshots import engine
+from responsive_screenshots.crawl import match_route_template, route_directories
+from responsive_screenshots.options import default_options
+from responsive_screenshots.watch import ImportGraph, parse_imports
+
+SOURCES = {
+    "app/layout.tsx": 'import "./globals.css";\nexport default function RootLayout() {}\n',
+    "app/globals.css": "body { margin: 0; }\n",
+    "app/page.tsx": 'import { Hero } from "@/components/shared";\n',
+    "app/(marketing)/about/page.tsx": 'import { TitleBanner } from "@/components/shared";\n'
+                                      'import type { Course } from "@/types/course";\n',
+    "app/course/[slug]/page.tsx": 'import Player from "./Player";\n// import { Hero } from "@/components/shared";\n',
+    "app/course/[slug]/Player.tsx": "export default function Player() {}\n",
+    "components/shared/index.ts": 'export { TitleBanner } from "./TitleBanner";\nexport * from "./Hero";\n',
+    "components/shared/TitleBanner.tsx": "export function TitleBanner() {}\n",
+    "components/shared/Hero.tsx": "export function Hero() {}\n",
+    "types/course.ts": "export interface Course {}\n",
+}
+
+
+@pytest.fixture
+def project(tmp_path):
+    for name, text in SOURCES.items():
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+    root = str(tmp_path)
+    return root, os.path.join(root, "app"), ImportGraph(root, alias_root=root)
+
+
+def affected_files(project, *changed):
+    root, _, graph = project
+    affected = graph.affected([os.path.join(root, name) for name in changed])
+    return {os.path.relpath(path, root) for path in affected}
+
+
+def test_parse_imports_kinds_and_names():
+    found = parse_imports('import A, { b, type C } from "./x";\nimport * as ns from "./y";\n'
+                          'export { d as e } from "./z";\nexport * from "./w";\nconst m = import("./lazy");\n')
+    assert ("./x", "import", {"default", "b"}) in found
+    assert ("./y", "import", None) in found
+    assert ("./z", "reexport", {"e": "d"}) in found
+    assert ("./w", "reexport", None) in found
+    assert ("./lazy", "import", None) in found
+
+
+def test_barrel_exports_are_followed_by_name(project):
+    assert affected_files(project, "components/shared/TitleBanner.tsx") == {
+        "components/shared/TitleBanner.tsx", "components/shared/index.ts", "app/(marketing)/about/page.tsx"}
+    # export * 无法得知转发了哪些名字，保守地视为桶文件的全部导出都有改动；注释掉的导入不算
+    assert affected_files(project, "components/shared/Hero.tsx") == {
+        "components/shared/Hero.tsx", "components/shared/index.ts",
+        "app/page.tsx", "app/(marketing)/about/page.tsx"}
+
+
+def test_type_only_imports_and_css_imports(project):
+    assert affected_files(project, "types/course.ts") == {"types/course.ts"}
+    assert affected_files(project, "app/globals.css") == {"app/globals.css", "app/layout.tsx"}
+
+
+@pytest.mark.parametrize("path, expected", [
+    ("/", "/"),
+    ("/about", "/about"),
+    ("/course/intro", "/course/[slug]"),
+    ("/course/new", "/course/new"),
+    ("/docs", "/docs/[[...slug]]"),
+    ("/docs/a/b", "/docs/[[...slug]]"),
+    ("/blog/a/b", "/blog/[...slug]"),
+    ("/posts/123", "/posts/[id]"),
+    ("/learn/lesson12", "/learn/[lesson]"),
+])
+def test_match_route_template(path, expected):
+    templates = ["/", "/about", "/course/[slug]", "/course/new", "/docs/[[...slug]]", "/blog/[...slug]"]
+    assert match_route_template(path, templates) == expected
+
+
+def test_route_directories_drop_route_groups(project):
+    _, app_dir, _ = project
+    assert set(route_directories(app_dir)) == {"/", "/about", "/course/[slug]"}
+
+
+def test_affected_targets(project, tmp_path):
+    root, app_dir, graph = project
+    targets = [{"name": name, "url": "https://example.com" + path}
+               for name, path in (("home", "/"), ("about", "/about"), ("course", "/course/intro"),
+                                  ("legacy", "/legacy/page"))]
+    run = engine.configure(default_options(output_dir=str(tmp_path), no_tuning=True), devices=[], targets=targets)
+    route_dirs = route_directories(app_dir)
+
+    def names(*changed):
+        found, templates = engine.affected_targets(
+            run, [graph], [os.path.join(root, name) for name in changed], app_dir, route_dirs)
+        return [target["name"] for target in found], templates
+
+    assert names("app/course/[slug]/Player.tsx") == (["course"], ["/course/[slug]"])
+    assert names("components/shared/TitleBanner.tsx") == (["about"], ["/about"])
+    # 根布局受影响时所有页面都重新截图，包括匹配不到路由模板的页面
+    assert names("app/globals.css") == (["home", "about", "course", "legacy"], ["/", "/about", "/course/[slug]"])
+
+
+def test_wait_for_source_changes_scans_off_the_event_loop(monkeypatch, tmp_path):
+    scans = [{"a.tsx": 1}, {"a.tsx": 2, "b.tsx": 1}, {"a.tsx": 2, "b.tsx": 1}]
+    threads = []
+
+    def fake_scan(app_dir):
+        threads.append(threading.current_thread())
+        return scans.pop(0)
+
+    run = engine.configure(default_options(output_dir=str(tmp_path), no_tuning=True, watch_interval=0.01),
+                           devices=[], targets=[])
+    monkeypatch.setattr(engine, "scan_sources", fake_scan)
+    changed, current = asyncio.run(engine.wait_for_source_changes(run, "app", {"a.tsx": 1}))
+    # 第一次扫描没有改动，第二次发现改动，第三次确认已稳定
+    assert changed == {"a.tsx", "b.tsx"}
+    assert current == {"a.tsx": 2, "b.tsx": 1}
+    assert threads and threading.main_thread() not in threads